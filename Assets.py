@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+import pygame as pyg
+
+"""
+Asset manager for the client. Resolves asset paths relative to the game folder on every OS, converts images to the
+display's pixel format once and loads fonts from the game's own files the first time they're used, never scanning the
+system fonts
+"""
+
+asset_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Img")  # Folder of the game's assets
+
+
+class AssetManager:
+    """
+    Loads and caches images and fonts, and keeps track of how long loading took
+    """
+    def __init__(self, directory):
+        """
+        :param directory: Folder the assets are in, fonts are bundled in a Fonts folder inside it
+        """
+        self.directory = directory
+        self._images = {}  # (file name, convert) --> loaded surface
+        self._fonts = {}   # (font name, size, underline) --> font object
+        self.load_times = []  # List of (asset description, seconds it took to load)
+        self._lock = threading.Lock()  # Scenes can be built on a background thread while the main thread renders
+
+    def path(self, *parts):
+        """
+        Returns the full path of an asset
+        :param parts: Path parts relative to the asset folder
+        """
+        return os.path.join(self.directory, *parts)
+
+    def image(self, name, convert=True):
+        """
+        Loads an image once and returns the cached surface after that
+        :param name: File name of the image in the asset folder
+        :param convert: Convert to the display's pixel format so blitting doesn't convert every frame (needs the display
+                        mode to be set), pass False for images used before that like the window icon
+        :return: Image surface
+        """
+        key = (name, convert)
+        with self._lock:
+            if key not in self._images:
+                start = time.perf_counter()
+                surface = pyg.image.load(self.path(name))
+                if convert:
+                    # Keeping the alpha channel only if the image has one
+                    surface = surface.convert_alpha() if surface.get_flags() & pyg.SRCALPHA else surface.convert()
+                self._images[key] = surface
+                self.load_times.append((f"image {name}", time.perf_counter() - start))
+            return self._images[key]
+
+    def font(self, name, size, underline=False):
+        """
+        Returns a cached font. A None name is pygame's default font, which is bundled with pygame. Other names are ttf
+        files bundled in the Fonts folder
+        :param name: Font name, the ttf file name without its extension. None for the default font
+        :param size: Font size
+        :param underline: Should the font be underlined
+        :return: Font object
+        """
+        key = (name, size, underline)
+        with self._lock:
+            if key not in self._fonts:
+                start = time.perf_counter()
+                font = pyg.font.Font(None if name is None else self.path("Fonts", name + ".ttf"), size)
+                font.set_underline(underline)
+                self._fonts[key] = font
+                self.load_times.append((f"font {name} {size}", time.perf_counter() - start))
+            return self._fonts[key]
+
+    def lazy_font(self, name, size, underline=False):
+        """
+        Returns a LazyFont, a font that's only loaded the first time it's used
+        :param name: Font name, None for the default font
+        :param size: Font size
+        :param underline: Should the font be underlined
+        """
+        return LazyFont(self, name, size, underline)
+
+    def report(self):
+        """
+        Returns a one line summary of the loading times, slowest asset included
+        """
+        if not self.load_times:
+            return "No assets loaded"
+        total = sum(seconds for _, seconds in self.load_times)
+        slowest = max(self.load_times, key=lambda load_time: load_time[1])
+        return (f"Loaded {len(self.load_times)} assets in {total * 1000:.1f} ms "
+                f"(slowest: {slowest[0]} {slowest[1] * 1000:.1f} ms)")
+
+
+class LazyFont:
+    """
+    Stands in for a font and loads it through the asset manager the first time any of the font's methods is used, so
+    fonts cost nothing until a scene renders with them. Use it like a font
+    """
+    __slots__ = ("_manager", "_key", "_font")
+
+    def __init__(self, manager, name, size, underline=False):
+        """
+        :param manager: AssetManager to load the font with
+        :param name: Font name, None for the default font
+        :param size: Font size
+        :param underline: Should the font be underlined
+        """
+        self._manager = manager
+        self._key = (name, size, underline)
+        self._font = None  # Loaded font, None until first used
+
+    def get(self):
+        """
+        Returns the font, loading it if this is the first use
+        """
+        if self._font is None:
+            self._font = self._manager.font(*self._key)
+        return self._font
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)  # Only called for the font's own attributes, like render and size
+
+
+assets = AssetManager(asset_dir)  # Asset manager shared by the whole client
@@ -0,0 +1,300 @@
+import asyncio
+import random
+import time
+from Clientcom import ENC_KEY_LEN, ENC_HEADER, LONG_HEADER, PING, frame_msg
+from KeyComm import RSACipher, AESCipher
+from Roster import PlayerRoster
+import Messages
+
+"""Headless bot client, plays the game without pygame. Used by LoadGenerator.py to put load on the server"""
+
+categories = ("CPOINT", "CNUMBER", "CRAISE")  # Category messages a bot can choose
+
+
+class LatencyStats:
+    """
+    Class for collecting latency samples of many bots and reporting percentiles
+    """
+    def __init__(self):
+        self.samples = {}  # Kind of latency --> list of samples in seconds
+
+    def record(self, kind, seconds):
+        """
+        Records a latency sample
+        :param kind: Kind of latency (handshake, username, ...)
+        :param seconds: Measured latency in seconds
+        """
+        self.samples.setdefault(kind, []).append(seconds)
+
+    def report(self):
+        """
+        Returns a formatted report of the percentiles of each latency kind in milliseconds
+        """
+        lines = [f"{'kind':<16}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}"]
+        for kind, samples in sorted(self.samples.items()):
+            samples = sorted(samples)
+            lines.append(f"{kind:<16}{len(samples):>8}" +
+                         "".join(f"{_percentile(samples, p) * 1000:>10.2f}" for p in (50, 90, 99, 100)))
+        return "\n".join(lines)
+
+
+def _percentile(sorted_samples, percent):
+    """
+    Returns the percentile of a sorted list using the nearest rank method
+    :param sorted_samples: Sorted list of samples
+    :param percent: Percentile to get (0-100)
+    """
+    index = max(0, int(round(percent / 100 * len(sorted_samples))) - 1)
+    return sorted_samples[index]
+
+
+class BotClient:
+    """
+    Headless client that plays the game with random choices, uses the same handshake and framing as ClientComm
+    """
+    def __init__(self, server_ip, port, username, stats, rsa_cipher=None, think_time=(0.5, 2.0), seed=None, room=None):
+        """
+        :param server_ip: Server's ip
+        :param port: Port of communication
+        :param username: Username to play with
+        :param stats: LatencyStats object to record latencies into
+        :param rsa_cipher: RSA cipher to trade keys with, generating one per bot is slow so bots can share one
+        :param think_time: Tuple of the min and max seconds to wait before answering, voting and choosing
+        :param seed: Seed for the bot's random choices
+        :param room: Room code to send before joining, for servers behind Router.py. None to not send one
+        """
+        self.server_ip = server_ip
+        self.port = port
+        self.username = username
+        self.stats = stats
+        self.RSA_cipher = rsa_cipher if rsa_cipher is not None else RSACipher()
+        self.AES_cipher = None
+        self.think_time = think_time
+        self.random = random.Random(seed)
+        self.room = room
+
+        self.reader = None
+        self.writer = None
+        self.connected = False   # Changes to None when disconnected and True when connected
+        self.active_players = PlayerRoster()  # Usernames of the players in the game
+        self._sent_at = {}        # Kind of latency --> time the request was sent
+        self._pending = set()     # Delayed send tasks, kept so they don't get garbage collected
+        # Message type --> handler, messages the bot doesn't react to are left out
+        self.handlers = {
+            Messages.UsernameApproved: self._on_username_approved,
+            Messages.UsernameDenied: self._on_username_denied,
+            Messages.PlayerList: self._on_player_list,
+            Messages.PlayerJoined: self._on_player_joined,
+            Messages.PlayerLeft: self._on_player_left,
+            Messages.CategoryTurn: self._on_category_turn,
+            Messages.Task: self._on_task,
+            Messages.Answers: self._on_answers,
+            Messages.VoteResult: self._on_vote_result,
+            Messages.BackToLobby: self._on_back_to_lobby,
+            Messages.Ping: self._on_ping,
+        }
+
+    async def run(self):
+        """
+        Connects to the server, trades keys and plays until the connection is closed
+        """
+        start = time.perf_counter()
+        try:
+            self.reader, self.writer = await asyncio.open_connection(self.server_ip, self.port)
+            # == Trading keys, same as ClientComm ==
+            self.writer.write(self.RSA_cipher.key.publickey().exportKey())
+            await self.writer.drain()
+            enc_key = await self.reader.readexactly(ENC_KEY_LEN)
+            self.AES_cipher = AESCipher(self.RSA_cipher.decrypt(enc_key))
+            self.stats.record("handshake", time.perf_counter() - start)
+            self.connected = True
+
+            if self.room is not None:
+                await self._send("M" + self.room)  # The router reads the room code from the first message
+            await self._join()
+            # === Main receiving loop ===
+            while True:
+                self._handle(await self._recv())
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, ValueError) as e:
+            self.stats.record("disconnect", time.perf_counter() - start)
+            print("BotClient -", self.username, str(e) or type(e).__name__)
+        finally:
+            self.connected = None
+            for task in self._pending:
+                task.cancel()
+            if self.writer is not None:
+                self.writer.close()
+
+    async def _join(self):
+        """
+        Asks the server to join the game
+        """
+        await self._send("U" + self.username, "username")
+
+    async def _recv(self):
+        """
+        Receives a single message, decrypting it if the server sent an encryption heads up
+        :return: Received message (String)
+        """
+        data_len = int(await self.reader.readexactly(2))
+        data = (await self.reader.readexactly(data_len)).decode()
+        if data == ENC_HEADER:
+            data_len = int(await self.reader.readexactly(3))
+            data = self.AES_cipher.decrypt(await self.reader.readexactly(data_len)).decode()
+        elif data == LONG_HEADER:
+            data_len = int(await self.reader.readexactly(4))
+            data = (await self.reader.readexactly(data_len)).decode()
+        return data
+
+    async def _send(self, msg, latency_kind=None):
+        """
+        Sends a message to the server
+        :param msg: Message to send (String)
+        :param latency_kind: If given, the time until the next matching response is recorded under this kind
+        """
+        if latency_kind is not None:
+            self._sent_at[latency_kind] = time.perf_counter()
+        self.writer.write(frame_msg(msg))
+        await self.writer.drain()
+
+    def _send_later(self, msg, latency_kind=None):
+        """
+        Sends a message after a random think time without blocking the receiving loop
+        :param msg: Message to send (String)
+        :param latency_kind: Passed on to _send
+        """
+        async def delayed():
+            await asyncio.sleep(self.random.uniform(*self.think_time))
+            await self._send(msg, latency_kind)
+
+        task = asyncio.ensure_future(delayed())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _record_response(self, latency_kind):
+        """
+        Records the latency of a response if the matching request was sent
+        :param latency_kind: Kind of latency passed to _send
+        """
+        sent_at = self._sent_at.pop(latency_kind, None)
+        if sent_at is not None:
+            self.stats.record(latency_kind, time.perf_counter() - sent_at)
+
+    def _handle(self, msg):
+        """
+        Reacts to a message from the server like a player would
+        :param msg: Message from server
+        """
+        Messages.dispatch(self.handlers, Messages.parse(msg))
+
+    def _on_username_approved(self, message):
+        # Username approved, readying up
+        self._record_response("username")
+        self._send_later("RY")
+
+    def _on_username_denied(self, message):
+        # Username disapproved, trying again with a new name
+        self._record_response("username")
+        self.username = self.username[:7] + str(self.random.randint(100, 999))
+        self._send_later("U" + self.username, "username")
+
+    def _on_player_list(self, message):
+        self.active_players.replace(message.players, message.seq)
+
+    def _on_player_joined(self, message):
+        if not self.active_players.add(message.seat, message.username, message.seq):
+            self._request_player_list()
+
+    def _on_player_left(self, message):
+        if not self.active_players.remove(message.seat, message.seq):
+            self._request_player_list()
+
+    def _request_player_list(self):
+        """
+        Asks the server for the whole player list after missing an update
+        """
+        self._send_now("S")
+
+    def _on_ping(self, message):
+        self._send_now(PING)
+
+    def _send_now(self, msg):
+        """
+        Sends a message right away without blocking the receiving loop
+        :param msg: Message to send (String)
+        """
+        task = asyncio.ensure_future(self._send(msg))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _on_category_turn(self, message):
+        if message.chooser is None:  # We are the chooser
+            self._send_later(self.random.choice(categories), "category")
+
+    def _on_task(self, message):
+        # Answering according to the category
+        self._record_response("category")
+        if message.category == "P":    # Point task
+            answer = self.random.choice(self.active_players.copy())
+        elif message.category == "N":  # Number task
+            answer = str(self.random.randint(0, 10))
+        else:                          # Raise task
+            answer = self.random.choice(("Yes", "No"))
+        self._send_later("A" + answer, "answer")
+
+    def _on_answers(self, message):
+        # Voting for a random other player
+        self._record_response("answer")
+        my_seat = self.active_players.seat(self.username)
+        others = [seat for seat in message.answers if seat != my_seat]
+        self._send_later("V" + str(self.random.choice(others or list(message.answers))), "vote")
+
+    def _on_vote_result(self, message):
+        self._record_response("vote")
+
+    def _on_back_to_lobby(self, message):
+        # Readying up for the next game
+        self._send_later("RY")
+
+
+class SpectatorBot(BotClient):
+    """
+    Headless spectator, joins read only and counts the public messages it gets. Used to put load on the server's
+    spectator fan-out
+    """
+    def __init__(self, server_ip, port, name, stats, rsa_cipher=None, room=None):
+        """
+        :param server_ip: Server's ip
+        :param port: Port of communication
+        :param name: Name shown in the bot's prints, spectators don't have usernames
+        :param stats: LatencyStats object to record latencies into
+        :param rsa_cipher: RSA cipher to trade keys with
+        :param room: Room code to send before joining, None to not send one
+        """
+        super().__init__(server_ip, port, name, stats, rsa_cipher, room=room)
+        self.messages_received = 0
+        # Spectators only react to the player list, everything else is just counted
+        self.handlers = {
+            Messages.SpectatingApproved: self._on_spectating_approved,
+            Messages.PlayerList: self._on_player_list,
+            Messages.PlayerJoined: self._on_player_joined,
+            Messages.PlayerLeft: self._on_player_left,
+        }
+
+    async def _join(self):
+        await self._send("O", "spectate")
+
+    def _handle(self, msg):
+        self.messages_received += 1
+        message = Messages.parse(msg)
+        if type(message) == Messages.Task:
+            raise ValueError("Spectator got a task")  # Tasks must never reach spectators
+        Messages.dispatch(self.handlers, message)
+
+    def _on_spectating_approved(self, message):
+        self._record_response("spectate")
+
+    def _request_player_list(self):
+        # Spectators are read only, the server ignores anything they send. Updates are sent in order so they can only be
+        # missed if the spectator was dropped for being too slow
+        print("BotClient -", self.username, "missed a player list update")
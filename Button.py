@@ -1,4 +1,6 @@
 import pygame as pyg
+from TextCache import render_text
+from Assets import assets
 
 
 class Button(pyg.sprite.Sprite):
@@ -32,24 +34,41 @@ class Button(pyg.sprite.Sprite):
             self.text = text
             self.text_color = text_color
         else:  # If there isn't text
-            self.font = pyg.font.SysFont(None, 0)
+            self.font = assets.font(None, 1)  # Default font, through the asset manager's lock
             self.text = ""
             self.text_color = (0, 0, 0)
         self.pressed = False    # Was the button pressed
         self._is_held = False   # Is the button held, for internal use
+        self._normal_image = None   # Pre-rendered image of the button
+        self._pressed_image = None  # Pre-rendered image of the pressed button
         self._render_button()   # Rendering for one time in order to set variables correctly
 
     def _render_button(self):
         """
-            Renders the button (Internal use only)
+            Pre-renders the normal and pressed images of the button (Internal use only)
+            Only needs to be called again if the button's text, colors, size or position change
         """
-        t_surf = self.font.render(self.text, True, self.text_color, self.cur_color)  # Text surface
-        self.image = pyg.Surface((self.width, self.height), pyg.SRCALPHA)
-        pyg.draw.rect(self.image, self.cur_color, self.image.get_rect())  # Drawing rect on image
-        self.image.blit(t_surf, ((self.width - t_surf.get_width()) / 2, (self.height - t_surf.get_height()) / 2))
-
+        self._normal_image = self._render_image(self.color)
+        self._pressed_image = self._render_image(self.pressed_color)
+        self._update_image()
         self.rect = self.image.get_rect(topleft=self.pos)  # Updating self rect object
 
+    def _render_image(self, color):
+        """
+            Renders the button in the given color (Internal use only)
+        """
+        t_surf = render_text(self.font, self.text, True, self.text_color, color)  # Text surface
+        image = pyg.Surface((self.width, self.height), pyg.SRCALPHA)
+        pyg.draw.rect(image, color, image.get_rect())  # Drawing rect on image
+        image.blit(t_surf, ((self.width - t_surf.get_width()) / 2, (self.height - t_surf.get_height()) / 2))
+        return image
+
+    def _update_image(self):
+        """
+            Swaps to the pre-rendered image matching the current color (Internal use only)
+        """
+        self.image = self._pressed_image if self.cur_color == self.pressed_color else self._normal_image
+
     def update(self, event_list):
         """
         Updates the button using the event list (use for sprite.Group)
@@ -65,20 +84,20 @@ class Button(pyg.sprite.Sprite):
                     # Updating the color and held boolean
                     self.cur_color = self.pressed_color
                     self._is_held = True
+                    self._update_image()
 
             # If the mouse the button was released
             elif event.type == pyg.MOUSEBUTTONUP and event.button == 1:
                 # If the user already started the press on the button
                 if self._is_held:
                     self.cur_color = self.color
+                    self._update_image()
                     m_pos = pyg.mouse.get_pos()
                     if self.rect.collidepoint(m_pos):
                         # Updating the pressed variable
                         self.pressed = True
                 self._is_held = False
 
-        self._render_button()
-
     def clear_active(self):
         """
             Resets the button's state, use after using button's logic
@@ -1,37 +1,73 @@
-import queue
+import select
 import socket
 import threading
+from collections import deque
 from KeyComm import RSACipher, AESCipher
 
+# === Protocol constants, shared with the headless bot client ===
+PUBLIC_KEY_LEN = 271  # Length of the client's exported RSA public key
+ENC_KEY_LEN = 172     # Length of the RSA encrypted AES key the server sends back
+ENC_HEADER = "!ENC"   # Message telling the client the next message is encrypted
+LONG_HEADER = "!LNG"  # Message telling the client the next message is too long for 2 digits of length
+PING = "H"            # Heartbeat the server sends when it didn't hear from the client for a while, answered right away
+
+
+def frame_msg(msg: str):
+    """
+    Frames a message for sending to the server, 2 digits of length followed by the message itself
+    :param msg: Message to frame (String)
+    :return: Framed message (Bytes)
+    """
+    msg = msg.encode()  # Encoding message into bytes
+    return str(len(msg)).zfill(2).encode() + msg
+
 
 class ClientComm:
     """
-    class to represent client communication
+    class to represent client communication. All the socket I/O happens on the I/O thread, the main client program
+    only queues messages to send and drains the received ones, so a slow network never stalls a frame
     """
-    def __init__(self, server_ip, port, msg_q):
+    def __init__(self, server_ip, port, notify=None, room=None):
         """
-        Initializes the client communication object
+        Initializes the client communication object, call start to connect
         :param server_ip: Server's ip
         :param port: Port of communication
-        :param msg_q: Queue of received messages
+        :param notify: Function called from the I/O thread when messages arrive or the connection state changes
+        :param room: Room code to join, for servers behind a router. None to not send one
         """
         self.socket = None  # Socket for communication
         self.server_ip = server_ip
         self.port = port
-        self.msg_q = msg_q
         self.connected = False  # Changes to None when disconnected and True when connected
+        self.notify = notify if notify is not None else (lambda: None)
+
+        # deque appends and pops are atomic, so the two threads hand messages over without locking
+        self._inbox = deque()   # Received messages waiting for the main client program
+        self._outbox = deque()  # Framed messages waiting for the I/O thread to send them
+        self._in_buffer = bytearray()   # Received bytes that don't make a full message yet
+        self._out_buffer = bytearray()  # Bytes the socket didn't accept yet
+        if room is not None:
+            self._outbox.append(frame_msg("M" + room))  # The room code must be the first message after trading keys
+        # Writing a byte into the wake socket wakes the I/O thread up from select when there's something to send
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
 
         # Ciphers
         self.AES_cipher = None
         self.RSA_cipher = RSACipher()
 
-        # Starting the main loop (receiving and key trade) thread
-        self.thread = threading.Thread(target=self._main_loop, daemon=True)
+        self.thread = threading.Thread(target=self._main_loop, daemon=True)  # I/O thread
+
+    def start(self):
+        """
+        Starts the I/O thread, which connects to the server
+        """
         self.thread.start()
 
     def _main_loop(self):
         """
-        Connects to server, trades keys for encryption and then gets in a receiving loop
+        Connects to server, trades keys for encryption and then gets in the I/O loop
         """
 
         self.socket = socket.socket()  # Creating socket object
@@ -42,68 +78,155 @@ class ClientComm:
         except Exception as e:
             print("clientComm - _main_loop", str(e))
             self.connected = None
+            self.notify()
             exit()
         else:
 
             # == Trading keys process before continuing ==
             public_key = self.RSA_cipher.key.publickey().exportKey()
-            # Sending client public key to server (Length is always 271 bytes)
+            # Sending client public key to server (Length is always PUBLIC_KEY_LEN bytes)
             try:
-                self.socket.send(public_key)
+                self.socket.sendall(public_key)
             except Exception as e:
                 self.connected = None
+                self.notify()
                 print("clientComm - _main_loop, key trading", str(e))
                 exit()
 
-            # Getting back encrypted AES key (length is always 172 bytes)
+            # Getting back encrypted AES key (length is always ENC_KEY_LEN bytes)
             try:
-                enc_key = self.socket.recv(172)
+                enc_key = self._recv_exact(ENC_KEY_LEN)
+                # Decoding AES key and creating aes object
+                self.AES_cipher = AESCipher(self.RSA_cipher.decrypt(enc_key))
             except Exception as e:
                 print("clientComm - _main_loop, key trading", str(e))
                 self._disconnect()
-            # Decoding AES key and creating aes object
-            self.AES_cipher = AESCipher(self.RSA_cipher.decrypt(enc_key))
 
-            # === Main receiving loop ===
+            # === Main I/O loop ===
+            self.socket.setblocking(False)
             self.connected = True
+            self.notify()
             while True:
-                data = ""
                 try:
-                    data_len = self.socket.recv(2).decode()  # Receiving 2 bits of data
-                    data = self.socket.recv(int(data_len)).decode()  # Receiving actual message
+                    self._io_step()
                 except Exception as e:  # If communication was faulty
                     print("clientComm - _main_loop", str(e))
                     self._disconnect()
-                # If data is a special receive encrypted command
-                if data == "!ENC":
-                    # The next message is encrypted
-                    try:
-                        data_len = self.socket.recv(3).decode()  # Encrypted message have a lengths of 3 bits
-                        data = self.socket.recv(int(data_len))   # Receiving encrypted message
-                        data = self.AES_cipher.decrypt(data).decode()  # Decrypting message
-                    except Exception as e:
-                        print("clientComm - _main_loop, encryption recv", str(e))
-                        self._disconnect()
-                self.msg_q.put(data)  # Putting message into queue for processing in the main client program
+
+    def _recv_exact(self, length):
+        """
+        Receives exactly length bytes from the blocking socket
+        :param length: Amount of bytes to receive
+        :return: Received bytes
+        """
+        data = b""
+        while len(data) < length:
+            chunk = self.socket.recv(length - len(data))
+            if not chunk:
+                raise ConnectionError("Server closed the connection")
+            data += chunk
+        return data
+
+    def _io_step(self):
+        """
+        Waits until the socket can be read, or written while there's something to send, and handles it
+        """
+        # Moving the queued messages into the send buffer
+        while self._outbox:
+            self._out_buffer += self._outbox.popleft()
+        write_list = [self.socket] if self._out_buffer else []
+        readable, writable, _ = select.select([self.socket, self._wake_recv], write_list, [])
+
+        if self._wake_recv in readable:
+            try:
+                self._wake_recv.recv(4096)  # Emptying the wake socket, the messages are taken above
+            except BlockingIOError:
+                pass
+
+        if writable:
+            sent = self.socket.send(self._out_buffer)
+            del self._out_buffer[:sent]
+
+        if self.socket in readable:
+            data = self.socket.recv(65536)
+            if not data:
+                raise ConnectionError("Server closed the connection")
+            self._in_buffer += data
+            messages = self._parse_messages()
+            if messages:
+                self._inbox.extend(messages)  # Putting messages into the inbox for the main client program
+                self.notify()  # Waking the main client program up, once for the whole batch
+
+    def _parse_messages(self):
+        """
+        Takes all the complete messages out of the receive buffer, decrypting the encrypted ones
+        :return: List of messages (Strings)
+        """
+        buffer = self._in_buffer
+        messages = []
+        offset = 0
+        while len(buffer) - offset >= 2:
+            data_len = int(buffer[offset:offset + 2])  # 2 bytes of length
+            data_end = offset + 2 + data_len
+            if len(buffer) < data_end:
+                break  # Rest of the message didn't arrive yet
+            data = buffer[offset + 2:data_end].decode()
+            # If data is a special receive encrypted command
+            if data == ENC_HEADER:
+                # The next message is encrypted, encrypted message have a lengths of 3 bytes
+                if len(buffer) - data_end < 3:
+                    break
+                enc_len = int(buffer[data_end:data_end + 3])
+                enc_end = data_end + 3 + enc_len
+                if len(buffer) < enc_end:
+                    break
+                data = self.AES_cipher.decrypt(bytes(buffer[data_end + 3:enc_end])).decode()  # Decrypting message
+                data_end = enc_end
+            # If data is a special receive long message command
+            elif data == LONG_HEADER:
+                # The next message has a length of 4 bytes
+                if len(buffer) - data_end < 4:
+                    break
+                long_len = int(buffer[data_end:data_end + 4])
+                long_end = data_end + 4 + long_len
+                if len(buffer) < long_end:
+                    break
+                data = buffer[data_end + 4:long_end].decode()
+                data_end = long_end
+            if data == PING:
+                self._out_buffer += frame_msg(PING)  # Answering on the I/O thread, the main program never sees pings
+            else:
+                messages.append(data)
+            offset = data_end
+        del buffer[:offset]
+        return messages
+
+    def receive_all(self):
+        """
+        Takes all the messages received since the last call
+        :return: List of messages (Strings), in the order they arrived
+        """
+        messages = []
+        inbox = self._inbox
+        while inbox:
+            messages.append(inbox.popleft())
+        return messages
 
     def send(self, msg: str):
         """
-        sends message to server
+        Queues a message for sending to server, never blocks. Messages queued before connecting are sent once connected
         :param msg: Message to send (String)
         """
-        msg = msg.encode()  # Encoding message into bytes
-        msg_len = str(len(msg)).zfill(2).encode()  # Calculating message length
+        self._outbox.append(frame_msg(msg))
         try:
-            # Trying to send message to server
-            self.socket.send(msg_len)
-            self.socket.send(msg)
-        except Exception as e:
-            print("clientComm - send", str(e))
-            self._disconnect()
+            self._wake_send.send(b"\0")  # Waking the I/O thread up to send it
+        except BlockingIOError:
+            pass  # Wake socket is full, the I/O thread is already going to wake up
 
     def _disconnect(self):
         """
-        Internal method to disconnect from server
+        Internal method to disconnect from server, called on the I/O thread
         """
         self.connected = None
+        self.notify()
         exit()
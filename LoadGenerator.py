@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+from BotClient import BotClient, SpectatorBot, LatencyStats
+from KeyComm import RSACipher
+
+"""
+Load generator, runs many headless bots across many games in one process and reports message latency percentiles.
+Every server process hosts a single game, so start one Server.py per game and pass each one's address with --server,
+or start Router.py and give each game a room of its own with --rooms
+Example: python LoadGenerator.py --server 127.0.0.1:7878 --server 127.0.0.1:7879 --bots-per-game 6 --duration 120
+Example: python LoadGenerator.py --server 127.0.0.1:7878 --rooms 4 --bots-per-game 6 --duration 120
+"""
+
+
+async def run_load(servers, bots_per_game, duration, think_time, connect_interval, spectators_per_game=0, rooms=0):
+    """
+    Runs the bots until the duration passes
+    :param servers: List of (ip, port) tuples, one game per server unless rooms is given
+    :param bots_per_game: Amount of bots to connect to each server
+    :param duration: Seconds to run for
+    :param think_time: Tuple of the min and max think time of each bot
+    :param connect_interval: Seconds to wait between bot connections, to avoid a connection storm
+    :param spectators_per_game: Amount of spectator bots to connect to each game, after the players
+    :param rooms: Amount of rooms to play in on each server, for servers behind Router.py. 0 to not send room codes
+    :return: LatencyStats with all the recorded latencies
+    """
+    stats = LatencyStats()
+    rsa_cipher = RSACipher()  # Generating an RSA key per bot is slow, the server still gives each bot its own AES key
+    tasks = []
+    # One game per room, or per server if there are no rooms
+    games = [(ip, port, f"room{room_index}" if rooms else None)
+             for (ip, port) in servers for room_index in range(max(rooms, 1))]
+    for game_index, (ip, port, room) in enumerate(games):
+        for bot_index in range(bots_per_game):
+            bot = BotClient(ip, port, f"b{game_index}x{bot_index}", stats, rsa_cipher=rsa_cipher,
+                            think_time=think_time, seed=game_index * bots_per_game + bot_index, room=room)
+            tasks.append(asyncio.ensure_future(bot.run()))
+            await asyncio.sleep(connect_interval)
+        for spectator_index in range(spectators_per_game):
+            spectator = SpectatorBot(ip, port, f"s{game_index}x{spectator_index}", stats, rsa_cipher=rsa_cipher,
+                                     room=room)
+            tasks.append(asyncio.ensure_future(spectator.run()))
+            await asyncio.sleep(connect_interval)
+
+    # Letting the bots play until the time is up
+    await asyncio.wait(tasks, timeout=duration)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return stats
+
+
+def parse_server(address):
+    """
+    Parses an ip:port string into a tuple
+    :param address: Address string
+    """
+    ip, port = address.rsplit(":", 1)
+    return ip, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless bot load generator for the Fakin' It server")
+    parser.add_argument("--server", action="append", type=parse_server, dest="servers",
+                        help="ip:port of a server to fill with bots, can be given multiple times (one game per server)")
+    parser.add_argument("--bots-per-game", type=int, default=4, help="Bots to connect to each server (min 4 to start)")
+    parser.add_argument("--spectators-per-game", type=int, default=0,
+                        help="Read only spectator bots to connect to each server")
+    parser.add_argument("--rooms", type=int, default=0,
+                        help="Rooms to play in on each server, for a server behind Router.py (one game per room)")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run for")
+    parser.add_argument("--think-min", type=float, default=0.5, help="Min seconds a bot waits before acting")
+    parser.add_argument("--think-max", type=float, default=2.0, help="Max seconds a bot waits before acting")
+    parser.add_argument("--connect-interval", type=float, default=0.01, help="Seconds between bot connections")
+    args = parser.parse_args()
+
+    servers = args.servers or [("127.0.0.1", 7878)]
+    stats = asyncio.run(run_load(servers, args.bots_per_game, args.duration, (args.think_min, args.think_max),
+                                 args.connect_interval, args.spectators_per_game, args.rooms))
+    games = len(servers) * max(args.rooms, 1)
+    print(f"{games * args.bots_per_game} bots and {games * args.spectators_per_game} spectators across "
+          f"{games} games, latencies in ms:")
+    print(stats.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,147 +1,218 @@
 import pygame as pyg
-import queue
 from Clientcom import ClientComm
+from Scheduler import Scheduler
 import Scenes
+import Messages
+from Assets import assets
 
 server_ip = input("Please enter the server ip to connect to:\n")  # Ip of server to connect to and display onscreen
-msg_q = queue.Queue()  # Queue of message sent by server
-client = ClientComm(server_ip, 7878, msg_q)  # Creating client communication object
+room = input("Please enter the room code (leave empty if the server has no rooms):\n")  # Room to join behind a router
 
 # Display settings
 screenWidth, screenHeight = (1200, 800)
 
-# Initializing scenes
-Scenes.init_scenes(server_ip, (screenWidth, screenHeight))
-to_send = Scenes.to_send_q
+scheduler = Scheduler(Scenes.clock)  # Decides when to run frames, sleeps while there's nothing to do
+client = ClientComm(server_ip, 7878, scheduler.notify, room or None)  # Creating client communication object
+
+# Initializing scenes, opens the window. Scenes queue their messages straight to the client's I/O thread
+Scenes.init_scenes(server_ip, (screenWidth, screenHeight), client.send)
+print(assets.report())  # Startup asset loading summary
+client.start()  # Connecting, only after the display is up since the I/O thread posts wake up events
 
 # ==== SCENES ====
-cur_scene = Scenes.LoadingScene()  # Current scene will point on the current active scene, start on the loading scene
-FailedConnection = Scenes.FailedConnectionScene()   # Failed connection screen
-ConnectionScreen = Scenes.ConnectionScreen()        # Connection screen, gets username
-LobbyScreen = Scenes.LobbyScene()                   # Lobby screen
-ChooseScreen = Scenes.ChooseCategory()              # Choose category screen, get function when choosing and waiting for another to choose
-RoundScreen = Scenes.GameRound()                    # Task display and functionality to answer it
-VoteScreen = Scenes.VotingRound()                   # Voting and showing each other player's answer
-VoteResultsScreen = Scenes.VoteResults()            # Vote results screen
-RoundResultsScreen = Scenes.RoundResults()          # Point results for each round
-FinalResultsScreen = Scenes.FinalResults()          # Final results of entire game
+# Scenes are constructed the first time they are shown
+scenes = Scenes.SceneRegistry()
+cur_scene = scenes.get(Scenes.LoadingScene)  # Current scene will point on the current active scene, start on the loading scene
+# Constructing the rest of the scenes in the background while connecting and typing a username, in order of appearance
+scenes.prewarm(Scenes.ConnectionScreen, Scenes.LobbyScene, Scenes.ChooseCategory, Scenes.GameRound,
+               Scenes.VotingRound, Scenes.VoteResults, Scenes.RoundResults, Scenes.FinalResults)
+
+
+def present(scene):
+    """
+    Draws the scene if it changed and updates only the changed parts of the display
+    :param scene: Scene to present
+    """
+    rects = scene.render()
+    if rects:  # Nothing is drawn or sent to the display if the scene didn't change
+        pyg.display.update(rects)
+
+
+def process_events(scene, events):
+    """
+    Passes the events to the scene, fully redrawing it if the window was resized or uncovered
+    :param scene: Current scene
+    :param events: pygame event list
+    """
+    for event in events:
+        if event.type in Scenes.window_events:
+            scene.invalidate()
+            break
+    scene.process_input(events)
 
 
 def failed_screen():
     """
     Method to call when switching to failed connection screen, loops infinitely until game closes
     """
-    cur_scene.draw()
-    pyg.display.flip()
+    cur_scene.invalidate()
+    present(cur_scene)
     while True:
-        cur_scene.process_input(pyg.event.get())
+        process_events(cur_scene, scheduler.wait(cur_scene.is_animating()))
         cur_scene.update()
+        present(cur_scene)
+
+
+# == Message handlers ==
+
+
+def on_username_approved(message):
+    global cur_scene
+    cur_scene = scenes.get(Scenes.LobbyScene)  # Moving on to lobby scene
+
+
+def on_username_denied(message):
+    if type(cur_scene) == Scenes.ConnectionScreen:
+        cur_scene.invalidate_username(message.reason)  # Showing invalid username text
+
+
+def on_player_list(message):
+    Scenes.active_players.replace(message.players, message.seq)  # Updating the scenes' active player list
+
+
+def on_player_joined(message):
+    if not Scenes.active_players.add(message.seat, message.username, message.seq):
+        client.send("S")  # Missed an update, asking for the whole list
+
+
+def on_player_left(message):
+    if not Scenes.active_players.remove(message.seat, message.seq):
+        client.send("S")  # Missed an update, asking for the whole list
+
+
+def on_back_to_lobby(message):
+    global cur_scene
+    cur_scene = scenes.get(Scenes.LobbyScene)  # Changing scene to lobby
+    cur_scene.reset_scene()  # Resetting lobby scene
+
+
+def on_category_turn(message):
+    global cur_scene
+    cur_scene = scenes.get(Scenes.ChooseCategory)  # Updating the scene to be the category choose scene
+    if message.chooser is not None:  # If we aren't the current category chooser
+        # Updating the text on the scene
+        cur_scene.choosing_player = Scenes.active_players.name(message.chooser, "")
+        cur_scene.update_wait_text()
+    else:  # If we are the chooser
+        cur_scene.choosing = True
+
+
+def on_task(message):
+    global cur_scene
+    cur_scene = scenes.get(Scenes.GameRound)  # Updating the scene to be the game round scene
+    if message.category == "P":  # Point task
+        cur_scene.point_round()
+    elif message.category == "N":  # Number task
+        cur_scene.number_round()
+    else:  # Raise task
+        cur_scene.raise_round()
+    cur_scene.set_task(message.text)
+
+
+def on_answers(message):
+    global cur_scene
+    cur_scene = scenes.get(Scenes.VotingRound)  # Moving to vote screen
+    cur_scene.set_answers(message.answers, message.task)  # Setting the scenes answers to be the answers got from server
+
+
+def on_vote_result(message):
+    global cur_scene
+    cur_scene = scenes.get(Scenes.VoteResults)  # Switching to result scene
+    if message.majority_seat is not None:
+        # Updating result screen with parameters got from server
+        cur_scene.start_scene_majority(Scenes.active_players.name(message.majority_seat, ""), message.was_faker)
+    else:
+        # There was no majority vote
+        cur_scene.start_scene_no_majority()
+
+
+def on_round_points(message):
+    global cur_scene
+    cur_scene = scenes.get(Scenes.RoundResults)  # Updating current scene to be the point results scene
+    cur_scene.set_player_points(message.points)  # Updating saved points in scene
+
+
+def on_winners(message):
+    global cur_scene
+    cur_scene = scenes.get(Scenes.FinalResults)  # Changing to final results scene
+    cur_scene.set_winners(*message)              # Updating winners
+
+
+# Message type --> handler
+handlers = {
+    Messages.UsernameApproved: on_username_approved,
+    Messages.UsernameDenied: on_username_denied,
+    Messages.PlayerList: on_player_list,
+    Messages.PlayerJoined: on_player_joined,
+    Messages.PlayerLeft: on_player_left,
+    Messages.BackToLobby: on_back_to_lobby,
+    Messages.CategoryTurn: on_category_turn,
+    Messages.Task: on_task,
+    Messages.Answers: on_answers,
+    Messages.VoteResult: on_vote_result,
+    Messages.RoundPoints: on_round_points,
+    Messages.Winners: on_winners,
+}
 
 
 # While we are waiting for the client comm to connect fully to the server
 while not client.connected:
 
     # Staying on the connection screen scene until we connect or get an error
-    cur_scene.process_input(pyg.event.get())
+    process_events(cur_scene, scheduler.wait(cur_scene.is_animating()))
 
-    cur_scene.draw()
-    pyg.display.flip()
+    present(cur_scene)
     cur_scene.update()
 
     # If failed to connect to server
     if client.connected is None:
-        cur_scene = FailedConnection
+        cur_scene = scenes.get(Scenes.FailedConnectionScene)
         failed_screen()
 
 Running = True
 
-cur_scene = ConnectionScreen  # When connected to server switching to main menu scene
+cur_scene = scenes.get(Scenes.ConnectionScreen)  # When connected to server switching to main menu scene
+shown_scene = None  # Scene that was presented last frame
 # == Main game loop ==
 while Running:
-    # Getting the event list
-    event_list = pyg.event.get()
+    # Waiting for input or a message from the server (or the next frame of an animation) and getting the event list
+    event_list = scheduler.wait(cur_scene.is_animating())
 
     # Processing input
-    cur_scene.process_input(event_list)
-
-    # Reading waiting messages and processing them
-    while not msg_q.empty():
-        msg = msg_q.get()
-        command_code = msg[0]  # Getting the message's command code
-        if not len(msg) == 1:  # If the message is not only a command code
-            msg = msg[1:]      # Setting the message to be equal to itself not including the command code
-
-        if command_code == "Y":  # Server approved username
-            cur_scene = LobbyScreen  # Moving on to lobby scene
-
-        elif command_code == "N":  # Server disapproved username
-            if type(cur_scene) == Scenes.ConnectionScreen:
-                cur_scene.invalidate_username(msg)  # Showing invalid username text
-
-        elif command_code == "L":  # Updated player list
-            Scenes.update_players(msg)  # Updating the scenes' active player list
-
-        elif command_code == "Q":  # Quit back to lobby command
-            cur_scene = LobbyScreen  # Changing scene to lobby
-            cur_scene.reset_scene()  # Resetting lobby scene
-
-        elif command_code == "C":  # Choose category command
-            cur_scene = ChooseScreen  # Updating the scene to be the category choose scene
-            if msg[0] == "&":  # If we aren't the current category chooser
-                # Updating the text on the scene
-                cur_scene.choosing_player = msg[1:]
-                cur_scene.update_wait_text()
-            elif msg == "Y":  # If we are the chooser
-                cur_scene.choosing = True
-
-        elif command_code == "T":  # Task command
-            cur_scene = RoundScreen  # Updating the scene to be the game round scene
-            if msg[0] == "P":  # Point task
-                cur_scene.point_round()
-            elif msg[0] == "N":  # Number task
-                cur_scene.number_round()
-            else:  # Raise task
-                cur_scene.raise_round()
-            cur_scene.set_task(msg[1:])  # Removing second command code and setting the task
-
-        elif command_code == "V":  # Vote command
-            cur_scene = VoteScreen  # Moving to vote screen
-            cur_scene.set_answers(msg)  # Setting the scenes answers to be the answers got from server
-
-        elif command_code == "G":  # Vote results command
-            cur_scene = VoteResultsScreen  # Switching to result scene
-            if msg[0] == "T":  # T means it was a majority vote, F means it wasn't:
-                majority_vote_name = msg[1:-1]  # Getting the name of the majority vote player
-                was_faker = msg[-1] == "T"  # If the final character is T that means the player was the faker else the final character is F
-                # Updating result screen with parameters got from server
-                cur_scene.start_scene_majority(majority_vote_name, was_faker)
-            else:
-                # There was no majority vote
-                cur_scene.start_scene_no_majority()
-
-        elif command_code == "P":  # Points for round results command
-            cur_scene = RoundResultsScreen    # Updating current scene to be the point results scene
-            cur_scene.set_player_points(msg)  # Updating saved points in scene
-
-        elif command_code == "W":  # Points for final results screen
-            cur_scene = FinalResultsScreen    # Changing to final results scene
-            cur_scene.set_winners(msg)        # Updating winners
-
-        else:
+    process_events(cur_scene, event_list)
+
+    # Processing all the messages that arrived since the last frame
+    for msg in client.receive_all():
+        try:
+            message = Messages.parse(msg)
+        except ValueError as e:
             # Else it's an invalid message
-            print(command_code, msg)
+            print("Invalid message", str(e))
+            continue
+        Messages.dispatch(handlers, message)
 
-    # Sending waiting messages to servers
-    while not to_send.empty():
-        client.send(to_send.get())
+        cur_scene.invalidate()  # Messages change what the scene shows
 
     # If we disconnected from the server we switch to the failed connection scene
     if client.connected is None:
-        cur_scene = FailedConnection
+        cur_scene = scenes.get(Scenes.FailedConnectionScene)
         failed_screen()
 
-    # Updating scene values and drawing the scene onto the screen
+    # A scene that was just switched to needs to be drawn fully
+    if cur_scene is not shown_scene:
+        cur_scene.invalidate()
+        shown_scene = cur_scene
+
+    # Updating scene values and drawing the changed parts of the scene onto the screen
     cur_scene.update()
-    cur_scene.draw()
-    # Updating display
-    pyg.display.flip()
+    present(cur_scene)
@@ -0,0 +1,159 @@
+from collections import namedtuple
+
+"""
+Typed messages the server sends to clients. parse turns a raw message into one of the message tuples in one go, so the
+client and the headless bot client don't slice message strings on their own. Both react to messages with a dispatch
+dictionary of message type --> handler
+"""
+
+# === Messages ===
+# Per-player values are sent as seat:value entries, seats are the numeric ids the server gives players when they join
+UsernameApproved = namedtuple("UsernameApproved", ())          # Y - Server approved the username
+UsernameDenied = namedtuple("UsernameDenied", ("reason",))     # N - Server disapproved the username, reason to show
+SpectatingApproved = namedtuple("SpectatingApproved", ())      # O - Server approved spectating, only public messages follow
+PlayerList = namedtuple("PlayerList", ("seq", "players"))      # L - Snapshot of the players, (seat, username) pairs
+PlayerJoined = namedtuple("PlayerJoined", ("seq", "seat", "username"))  # J - Player joined, goes at the end of the list
+PlayerLeft = namedtuple("PlayerLeft", ("seq", "seat"))         # X - Player left the game
+BackToLobby = namedtuple("BackToLobby", ())                    # Q - Quit back to lobby
+Ping = namedtuple("Ping", ())                                  # H - Heartbeat, answer with H right away
+CategoryTurn = namedtuple("CategoryTurn", ("chooser",))        # C - Seat of the category chooser, None if it's our turn
+Task = namedtuple("Task", ("category", "text"))                # T - Task of a category (P/N/R) to answer
+Answers = namedtuple("Answers", ("answers", "task"))           # V - Dictionary of seat --> answer and the task
+VoteResult = namedtuple("VoteResult", ("majority_seat", "was_faker"))  # G - majority_seat is None if no majority
+RoundPoints = namedtuple("RoundPoints", ("points",))           # P - Dictionary of seat --> points of the round
+Winners = namedtuple("Winners", ("best_faker", "best_detective", "overall_winner"))  # W - Score of each winner
+Score = namedtuple("Score", ("seat", "points"))                # Seat and points of a winner, seat is None if no one won
+
+task_categories = ("P", "N", "R")  # Point, number and raise task categories
+
+# Messages without parameters are the same every time
+_username_approved = UsernameApproved()
+_spectating_approved = SpectatingApproved()
+_back_to_lobby = BackToLobby()
+_ping = Ping()
+
+
+def _parse_entry(entry):
+    """
+    Splits a seat:value entry
+    :return: Tuple of seat (int) and value (String)
+    """
+    seat, separator, value = entry.partition(":")
+    if not separator:
+        raise ValueError(f"Invalid seat entry {entry!r}")
+    return int(seat), value
+
+
+def _parse_entries(entries, value_type=str):
+    """
+    Parses a list of seat:value entries into a dictionary of seat --> value, in order
+    """
+    parsed = {}
+    for entry in entries:
+        seat, value = _parse_entry(entry)
+        parsed[seat] = value_type(value)
+    return parsed
+
+
+def _parse_player_list(body):
+    # Sequence number of the list followed by the seat:username entries, all separated by &
+    seq, _, players = body.partition("&")
+    return PlayerList(int(seq), list(_parse_entries(players.split("&")).items()) if players else [])
+
+
+def _parse_player_joined(body):
+    # Sequence number of the update and the seat:username entry
+    seq, _, player = body.partition("&")
+    return PlayerJoined(int(seq), *_parse_entry(player))
+
+
+def _parse_player_left(body):
+    # Sequence number of the update and the seat
+    seq, _, seat = body.partition("&")
+    return PlayerLeft(int(seq), int(seat))
+
+
+def _parse_category_turn(body):
+    if body == "Y":  # We are the chooser
+        return CategoryTurn(None)
+    if body.startswith("&"):  # Another player is choosing
+        return CategoryTurn(int(body[1:]))
+    raise ValueError(f"Invalid category message {body!r}")
+
+
+def _parse_task(body):
+    if body[:1] not in task_categories:
+        raise ValueError(f"Invalid task category {body[:1]!r}")
+    return Task(body[0], body[1:])
+
+
+def _parse_answers(body):
+    answers = body.split("&")
+    return Answers(_parse_entries(answers[:-1]), answers[-1])  # The task is the final part
+
+
+def _parse_vote_result(body):
+    if body == "F":  # There was no majority vote
+        return VoteResult(None, False)
+    if body[:1] != "T" or body[-1:] not in ("T", "F"):
+        raise ValueError(f"Invalid vote result {body!r}")
+    # T, the seat of the majority vote player and T if they were the faker or F if they weren't
+    return VoteResult(int(body[1:-1]), body[-1] == "T")
+
+
+def _parse_score(score):
+    # seat:points, the seat is empty if no one won
+    seat, separator, points = score.partition(":")
+    if not separator:
+        raise ValueError(f"Invalid score {score!r}")
+    return Score(int(seat) if seat else None, int(points))
+
+
+def _parse_winners(body):
+    winners = body.split("&")
+    if len(winners) != 3:
+        raise ValueError(f"Expected 3 winners, got {len(winners)}")
+    return Winners(*map(_parse_score, winners))
+
+
+# Command code --> function parsing the rest of the message
+parsers = {
+    "Y": lambda body: _username_approved,
+    "N": UsernameDenied,
+    "O": lambda body: _spectating_approved,
+    "L": _parse_player_list,
+    "J": _parse_player_joined,
+    "X": _parse_player_left,
+    "Q": lambda body: _back_to_lobby,
+    "H": lambda body: _ping,
+    "C": _parse_category_turn,
+    "T": _parse_task,
+    "V": _parse_answers,
+    "G": _parse_vote_result,
+    "P": lambda body: RoundPoints(_parse_entries(body.split("&"), int)),
+    "W": _parse_winners,
+}
+
+
+def parse(msg):
+    """
+    Parses a message from the server
+    :param msg: Message from server (String)
+    :return: Message tuple
+    :raises ValueError: If the message is empty, has an unknown command code or is malformed
+    """
+    parser = parsers.get(msg[:1])
+    if parser is None:
+        raise ValueError(f"Unknown command code in message {msg!r}")
+    return parser(msg[1:])
+
+
+def dispatch(handlers, message):
+    """
+    Calls the handler of a message, messages without a handler are ignored
+    :param handlers: Dictionary of message type --> function that gets the message
+    :param message: Message tuple
+    """
+    handler = handlers.get(type(message))
+    if handler is not None:
+        handler(message)
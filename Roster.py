@@ -0,0 +1,93 @@
+"""
+Client side list of the players in the game, kept up to date by the server's player list snapshots and join / leave
+deltas. Shared by the client and the headless bot client
+"""
+
+
+class PlayerRoster:
+    """
+    Ordered set of players with O(1) adding, removing and lookups. Each player has a numeric seat, given by the server
+    when they join, that per-player messages use instead of the username. Every update from the server has a sequence
+    number, a delta is only applied if it's the one right after the last applied update
+    """
+    def __init__(self, players=(), seq=0):
+        """
+        :param players: Initial (seat, username) pairs, in order
+        :param seq: Sequence number of the initial list
+        """
+        self._players = {}  # Seat --> username, dicts keep insertion order
+        self._seats = {}    # Username --> seat
+        self.replace(players, seq)
+
+    def replace(self, players, seq=0):
+        """
+        Replaces the whole list with a snapshot from the server
+        :param players: (seat, username) pairs, in order
+        :param seq: Sequence number of the snapshot
+        """
+        self._players = dict(players)
+        self._seats = {username: seat for seat, username in self._players.items()}
+        self.seq = seq  # Sequence number of the last applied update
+
+    def add(self, seat, username, seq):
+        """
+        Applies a player joined delta, the player is added at the end
+        :param seat: Seat of the player that joined
+        :param username: Username of the player that joined
+        :param seq: Sequence number of the delta
+        :return: False if updates were missed and a snapshot is needed, True otherwise
+        """
+        if seq == self.seq + 1:
+            self._players[seat] = username
+            self._seats[username] = seat
+            self.seq = seq
+        # Deltas older than the last snapshot are already part of it, newer ones mean updates were missed
+        return seq <= self.seq
+
+    def remove(self, seat, seq):
+        """
+        Applies a player left delta
+        :param seat: Seat of the player that left
+        :param seq: Sequence number of the delta
+        :return: False if updates were missed and a snapshot is needed, True otherwise
+        """
+        if seq == self.seq + 1:
+            username = self._players.pop(seat, None)
+            self._seats.pop(username, None)
+            self.seq = seq
+        return seq <= self.seq
+
+    def name(self, seat, default=None):
+        """
+        Returns the username of a seat
+        :param seat: Seat of the player
+        :param default: Returned if no player sits in the seat, for example after they left
+        """
+        return self._players.get(seat, default)
+
+    def seat(self, username):
+        """
+        Returns the seat of a username, None if there's no such player
+        """
+        return self._seats.get(username)
+
+    def items(self):
+        """
+        Returns the (seat, username) pairs, in order
+        """
+        return self._players.items()
+
+    def copy(self):
+        """
+        Returns the usernames as a list
+        """
+        return list(self._players.values())
+
+    def __iter__(self):
+        return iter(self._players.values())
+
+    def __len__(self):
+        return len(self._players)
+
+    def __contains__(self, username):
+        return username in self._seats
@@ -2,10 +2,13 @@ import pygame as pyg
 from abc import ABC, abstractmethod
 from TextInputBox import TextInputBox
 from Button import Button
-import queue
-
-pyg.init()
+from TextCache import render_text, render_wrapped
+from Assets import assets
+from Roster import PlayerRoster
+import threading
+import os
 
+# Importing this module has no side effects, pygame and the fonts are initialized by init_scenes
 # == Scene globals ==
 
 # Colors
@@ -17,74 +20,70 @@ darker_beige = (184, 157, 127)
 check_green = (64, 255, 115)
 
 # Screen variables
+# Scenes lay themselves out once in this logical resolution, the display scales it to the actual window size
 screenWidth: int = 0
 screenHeight: int = 0
+window_events = (pyg.VIDEORESIZE, pyg.WINDOWSIZECHANGED, pyg.WINDOWEXPOSED)  # Events after which a full redraw is needed
 
 # General scene variables
-screen: pyg.Surface = pyg.Surface((0, 0))
-clock = pyg.time.Clock()   # Pygame clock
-to_send_q = queue.Queue()  # Queue of messages to send, shared with main client program
+screen: pyg.Surface = None
+clock = pyg.time.Clock()   # Pygame clock, limits the frame rate while a scene is animating
+send_msg = None            # Function that queues a message for sending to the server, set by init_scenes
 server_ip = ""             # IP of server for display purposes
 
 
-def init_scenes(server_ip_par, screen_res):
+def init_scenes(server_ip_par, screen_res, send_func=None):
     """
     Initializes all the scene variables
     :param server_ip_par: Server ip for displaying purposes
-    :param screen_res: Tuple of screen resolution
+    :param screen_res: Tuple of the logical screen resolution the scenes are laid out in
+    :param send_func: Function that queues a message for sending to the server (ClientComm.send), doesn't send if None
     """
+    # Only initializing the modules the client uses, pyg.init would also start the audio and joystick subsystems
+    pyg.display.init()
+    pyg.font.init()
     pyg.display.set_caption("Fakin' It")
-    # Loading icon for window
-    icon = pyg.image.load('img\\Icon.png')
+    # Loading icon for window, before setting the display mode so it can't be converted
+    icon = assets.image("Icon.png", convert=False)
     pyg.display.set_icon(icon)
 
     # Getting parameters from main program and synchronizing with it
     global screenWidth, screenHeight
     global screen
     global server_ip
+    global send_msg
     screenWidth, screenHeight = screen_res
-    screen = pyg.display.set_mode((screenWidth, screenHeight))
+    # SCALED renders the logical resolution into a texture that the GPU scales to the window. The window opens at the
+    # largest integer scale that fits the desktop (so it isn't tiny on high-DPI displays) and can be resized freely
+    # without the scenes having to lay themselves out again. Smoothing the scaling since most of the screen is text
+    os.environ.setdefault("SDL_RENDER_SCALE_QUALITY", "linear")
+    screen = pyg.display.set_mode((screenWidth, screenHeight), pyg.SCALED | pyg.RESIZABLE)
     server_ip = server_ip_par
+    send_msg = send_func if send_func is not None else (lambda msg: None)
 
 
 # === Fonts ===
-def_font = pyg.font.SysFont(None, 45)           # Default font
-input_font = pyg.font.SysFont(None, 100)        # Font for input box
-lobby_title_font = pyg.font.SysFont(None, 85)   # Font for lobby title
-lobby_title_font.set_underline(True)
-task_font = pyg.font.SysFont(None, 55)          # Font for tasks
-small_task_font = pyg.font.SysFont(None, 40)    # Secondary smaller font for tasks
-send_button_font = pyg.font.SysFont(None, 75)   # Font for the send button text
-player_name_font = pyg.font.SysFont(None, 65)   # Font for player names
-final_titles_font = pyg.font.SysFont(None, 65)  # Font for titles in final results
-final_titles_font.set_underline(True)
-overall_winner_font = pyg.font.SysFont(None, 125)  # Font for the overall winner title in the final results
-overall_winner_font.set_underline(True)
-result_font = pyg.font.SysFont(None, 80)        # Font for results
-drumroll_font = pyg.font.SysFont(None, 115)     # Font for "drumroll" dots
-winner_font = pyg.font.SysFont(None, 165)       # Font for winner name
-icon_font = pyg.font.SysFont("segoe-ui-symbol", 65)  # Font for icons
-
-
-active_players = []  # A list of the active player, get updated when a player joins or leaves
+# Loaded through the asset manager the first time they're used, None is pygame's bundled default font
+def_font = assets.lazy_font(None, 45)                              # Default font
+input_font = assets.lazy_font(None, 100)                           # Font for input box
+lobby_title_font = assets.lazy_font(None, 85, underline=True)      # Font for lobby title
+task_font = assets.lazy_font(None, 55)                             # Font for tasks
+small_task_font = assets.lazy_font(None, 40)                       # Secondary smaller font for tasks
+send_button_font = assets.lazy_font(None, 75)                      # Font for the send button text
+player_name_font = assets.lazy_font(None, 65)                      # Font for player names
+final_titles_font = assets.lazy_font(None, 65, underline=True)     # Font for titles in final results
+overall_winner_font = assets.lazy_font(None, 125, underline=True)  # Font for the overall winner title
+result_font = assets.lazy_font(None, 80)                           # Font for results
+drumroll_font = assets.lazy_font(None, 115)                        # Font for "drumroll" dots
+winner_font = assets.lazy_font(None, 165)                          # Font for winner name
+icon_font = assets.lazy_font("DejaVuSans", 65)                     # Font for icons, bundled in Img/Fonts
+
+
+active_players = PlayerRoster()  # Ordered set of the active players, gets updated when a player joins or leaves
 
 # == Utility methods ==
 
 
-def update_players(p_list):
-    """
-    Method that receives a player list from server and updates the local player list
-    :param p_list: List of players from server
-    """
-    p_list = p_list.split("&")
-    for player in p_list:
-        if player not in active_players:
-            active_players.append(player)
-    for player in active_players:
-        if player not in p_list:
-            active_players.remove(player)
-
-
 def center_text_x(text):
     """
     Returns x position of text so it'll be on the center of the screen
@@ -98,6 +97,48 @@ class Scene(ABC):
     """
     Abstract class that represents the scene template
     """
+    def __init__(self):
+        self._full_redraw = True  # Does the whole screen need to be redrawn
+        self._dirty_rects = []    # Screen areas that changed since the last render
+
+    def invalidate(self, rect=None):
+        """
+        Marks part of the scene as changed so it gets drawn on the next render
+        :param rect: Changed screen area, None when the whole scene changed
+        """
+        if rect is None:
+            self._full_redraw = True
+        else:
+            self._dirty_rects.append(pyg.Rect(rect))
+
+    def render(self):
+        """
+        Draws the scene only if something changed since the last render, use instead of calling draw directly
+        :return: List of screen rects that changed (for pyg.display.update), empty if nothing did
+        """
+        if self._full_redraw:
+            rects = [screen.get_rect()]
+        elif self._dirty_rects:
+            rects = self._dirty_rects
+        else:
+            return []  # Nothing changed, skipping the frame
+        self.draw()
+        self._full_redraw = False
+        self._dirty_rects = []
+        return rects
+
+    def _update_sprites(self, group, events):
+        """
+        Updates a sprite group with the events and invalidates the area of every sprite whose image changed
+        :param group: Sprite group to update
+        :param events: pygame event list
+        """
+        before = [(sprite, sprite.image, sprite.rect.copy()) for sprite in group]
+        group.update(events)
+        for sprite, image, rect in before:
+            if sprite.image is not image or sprite.rect != rect:
+                self.invalidate(rect.union(sprite.rect))
+
     def process_input(self, events):
         """
         Method that gets pygame events and processes the input, gets called once per frame
@@ -113,14 +154,21 @@ class Scene(ABC):
     @abstractmethod
     def update(self):
         """
-        Method for updating scene variables, gets called once per frame (use clock.tick() in this)
+        Method for updating scene variables, gets called once per frame.
+        Frames only run when there's input or a server message, or constantly while is_animating returns True
         """
         pass
 
+    def is_animating(self):
+        """
+        Returns True while the scene has a running animation and needs frames without waiting for events
+        """
+        return False
+
     @abstractmethod
     def draw(self):
         """
-        Method for drawing graphics onto screen, gets called once per frame right before pyg.display.flip()
+        Method for drawing graphics onto screen, gets called by render only when the scene changed
         """
         pass
 
@@ -132,16 +180,24 @@ class LoadingScene(Scene):
     def __init__(self):
         Scene.__init__(self)
         self.dot = 0  # Variable for showing loading dots
+        self.last_tick = pyg.time.get_ticks()  # Last time a dot was added
         # Loading text and it's permanent position
-        self.loading_text = def_font.render(f"Connecting to {server_ip} . . .", True, dark_beige)
+        self.loading_text = render_text(def_font, f"Connecting to {server_ip} . . .", True, dark_beige)
         self.loading_text_pos = (center_text_x(self.loading_text), (screenHeight - self.loading_text.get_height()) / 2)
 
     def update(self):
-        pyg.time.wait(450)  # Waiting for the loading "animation"
-        self.dot += 1  # Incrementing the dot count
-        # Updating the text
-        self.loading_text = def_font.render(f"Connecting to {server_ip}" + (" ." * (self.dot % 4)), True, dark_beige)
-        clock.tick(60)  # Limiting frame rate
+        now = pyg.time.get_ticks()
+        if now - self.last_tick >= 450:  # Waiting for the loading "animation"
+            self.last_tick = now
+            self.dot += 1  # Incrementing the dot count
+            # Updating the text
+            old_rect = self.loading_text.get_rect(topleft=self.loading_text_pos)
+            self.loading_text = render_text(def_font, f"Connecting to {server_ip}" + (" ." * (self.dot % 4)), True,
+                                            dark_beige)
+            self.invalidate(old_rect.union(self.loading_text.get_rect(topleft=self.loading_text_pos)))
+
+    def is_animating(self):
+        return True
 
     def draw(self):
         screen.fill(beige)
@@ -158,12 +214,12 @@ class FailedConnectionScene(Scene):
         self.failed_text = None
 
     def update(self):
-        clock.tick(20)
+        pass
 
     def draw(self):
         # This draw is only called once since the scene is static
         screen.fill(beige)
-        self.failed_text = def_font.render(f"Couldn't reach server,  please close the game and try again later", True, dark_beige)
+        self.failed_text = render_text(def_font, f"Couldn't reach server,  please close the game and try again later", True, dark_beige)
         screen.blit(self.failed_text, ((screenWidth-self.failed_text.get_width())/2, (screenHeight-self.failed_text.get_height())/2))
 
 
@@ -173,10 +229,10 @@ class ConnectionScreen(Scene):
     """
     def __init__(self):
         Scene.__init__(self)
-        self.logo_img = pyg.image.load("img\\Fakin It.png")  # Loading title image
-        self.server_ip_text = def_font.render("Connected to " + server_ip, True, dark_beige)  # "Connected to" text
+        self.logo_img = assets.image("Fakin It.png")  # Loading title image
+        self.server_ip_text = render_text(def_font, "Connected to " + server_ip, True, dark_beige)  # "Connected to" text
         # In case the server sends an invalid username msg
-        self.invalid_username = def_font.render("", True, dark_beige)
+        self.invalid_username = render_text(def_font, "", True, dark_beige)
         self.invalid_pos = (0, 0)
         text_width = 600
         # Text input box for username
@@ -190,7 +246,7 @@ class ConnectionScreen(Scene):
         Method to call when server disapproves username.
         Displays the invalid username message onto screen
         """
-        self.invalid_username = def_font.render(invalid_msg, True, dark_beige)
+        self.invalid_username = render_text(def_font, invalid_msg, True, dark_beige)
         # Calculating text position on screen
         self.invalid_pos = (center_text_x(self.invalid_username), screenHeight * (5/6))
         self.text_input_box.clear()
@@ -207,11 +263,11 @@ class ConnectionScreen(Scene):
                     username = self.text_input_box.get_text()  # Getting the username from the text box
                     self.text_input_box.clear()  # Clearing the text box
                     if not username == "":  # If the textbox is not empty
-                        to_send_q.put("U" + username)  # Sending the chosen username to the server for approval
-        self.group.update(events)  # Updating the text box with input
+                        send_msg("U" + username)  # Sending the chosen username to the server for approval
+        self._update_sprites(self.group, events)  # Updating the text box with input
 
     def update(self):
-        clock.tick(60)
+        pass
 
     def draw(self):
         screen.fill(beige)
@@ -230,7 +286,7 @@ class LobbyScene(Scene):
         Scene.__init__(self)
 
         # Lobby tittle text
-        self.lobby_title = lobby_title_font.render("Lobby", True, black)
+        self.lobby_title = render_text(lobby_title_font, "Lobby", True, black)
         self.lobby_title_pos = (center_text_x(self.lobby_title), screenHeight * 0.03)
 
         # Ready button
@@ -241,7 +297,7 @@ class LobbyScene(Scene):
         self.is_ready = False  # Is ready boolean
 
         # Checkmark text
-        self.check_text = icon_font.render("✔", True, dark_beige)
+        self.check_text = render_text(icon_font, "✔", True, dark_beige)
         self.check_pos = ((screenWidth+self.check_text.get_width() + self.ready_button.width)/2, screenHeight*0.9 - self.check_text.get_height()*0.15)
 
     def process_input(self, events):
@@ -250,20 +306,20 @@ class LobbyScene(Scene):
             if event.type == pyg.QUIT:
                 pyg.quit()
                 exit()
-        self.group.update(events)  # Updating the ready button with the events
+        self._update_sprites(self.group, events)  # Updating the ready button with the events
 
     def update(self):
-        clock.tick(60)
         if self.ready_button.pressed:  # If the ready button was pressed
             self.is_ready = not self.is_ready  # Flipping the is ready boolean
             if self.is_ready:  # If we are now ready
                 # Updating the checkmark text to be green and updating server on our state
-                self.check_text = icon_font.render("✔", True, check_green)
-                to_send_q.put("RY")  # Sending new state to server
+                self.check_text = render_text(icon_font, "✔", True, check_green)
+                send_msg("RY")  # Sending new state to server
             else:
                 # Updating the checkmark text to be greyed out and updating server on our state
-                self.check_text = icon_font.render("✔", True, dark_beige)
-                to_send_q.put("RN")  # Sending new state to server
+                self.check_text = render_text(icon_font, "✔", True, dark_beige)
+                send_msg("RN")  # Sending new state to server
+            self.invalidate(self.check_text.get_rect(topleft=self.check_pos))
             # Clearing the button's state
             self.ready_button.clear_active()
 
@@ -282,7 +338,7 @@ class LobbyScene(Scene):
             # Drawing rect for current player at the current position
             pyg.draw.rect(screen, dark_beige, pyg.Rect(cur_width, cur_height, rect_width, height_space*2))
             # Drawing the text onto the rect
-            p_name = player_name_font.render(f"{player}", True, black)
+            p_name = render_text(player_name_font, f"{player}", True, black)
             screen.blit(p_name, (cur_width + rect_width/2 - p_name.get_width() / 2, cur_height + height_space/2 +
                         (p_name.get_height() / 4)))
             # Updating the position for the next draw
@@ -316,11 +372,11 @@ class ChooseCategory(Scene):
         self.choosing = False  # Is the player the one choosing the category
         self.choosing_player = ""  # The choosing players name for the waiting text
         # Text to show when player is not choosing category
-        self.waiting_text = def_font.render("Please wait while ... is choosing a category", True, dark_beige)
+        self.waiting_text = render_text(def_font, "Please wait while ... is choosing a category", True, dark_beige)
         self.waiting_text_pos = (center_text_x(self.waiting_text), screenHeight / 2)
 
         # Instruction text when player is choosing a category
-        self.choose_text = def_font.render("Choose a category!", True, black)
+        self.choose_text = render_text(def_font, "Choose a category!", True, black)
         self.choose_text_pos = (center_text_x(self.choose_text),
                                 screenHeight / 10 - self.choose_text.get_height() / 2)
 
@@ -347,7 +403,7 @@ class ChooseCategory(Scene):
         """
         Updates the text when the player isn't choosing
         """
-        self.waiting_text = def_font.render(f"Please wait while {self.choosing_player} is choosing a category",
+        self.waiting_text = render_text(def_font, f"Please wait while {self.choosing_player} is choosing a category",
                                             True, dark_beige)
         self.waiting_text_pos = (center_text_x(self.waiting_text), screenHeight / 2)
         self.choosing = False
@@ -359,20 +415,19 @@ class ChooseCategory(Scene):
                 pyg.quit()
                 exit()
         if self.choosing:  # Updating the button list only if the player is choosing
-            self.button_group.update(events)
+            self._update_sprites(self.button_group, events)
 
     def update(self):
-        clock.tick(60)
         # Updating the server if we choose a category
         if self.point_category.pressed:     # Point was chosen
             self.point_category.clear_active()
-            to_send_q.put("CPOINT")
+            send_msg("CPOINT")
         elif self.number_category.pressed:  # Number was chosen
             self.number_category.clear_active()
-            to_send_q.put("CNUMBER")
+            send_msg("CNUMBER")
         elif self.raise_category.pressed:    # Raise was chosen
             self.raise_category.clear_active()
-            to_send_q.put("CRAISE")
+            send_msg("CRAISE")
 
     def draw(self):
         screen.fill(beige)
@@ -388,13 +443,11 @@ class GameRound(Scene):
         Scene.__init__(self)
         # Text for displaying task
         self.cur_task = ""
-        self.task_text = task_font.render("TASK", True, black)
-        self.task_text_bot = None  # In case the text is too long to show in one line
+        self.task_text = render_text(task_font, "TASK", True, black)
         self.task_text_pos = (0, 0)
-        self.task_text_bot_pos = (0, 0)
 
         # Confirm text
-        self.confirm_text = def_font.render("Answer successfully sent!", True, dark_beige)
+        self.confirm_text = render_text(def_font, "Answer successfully sent!", True, dark_beige)
         self.confirm_text_pos = (center_text_x(self.confirm_text), (screenHeight * 0.9))
         self.show_confirm = False
 
@@ -402,7 +455,7 @@ class GameRound(Scene):
         self.options = []  # Dynamic list of valid answers, changes for each category
         self.current_choice = 0  # Index of current choice in options
         # Choice text
-        self.choice_text = task_font.render("", True, black)
+        self.choice_text = render_text(task_font, "", True, black)
         self.choice_text_pos = (0, 0)
 
         # Option box
@@ -412,10 +465,10 @@ class GameRound(Scene):
         # Left and right buttons
         self.left_button = Button(dark_beige, darker_beige, self.option_box.left - 75,
                                   self.option_box.top, 75, 110, font=icon_font,
-                                  text="⮜", text_color=black)
+                                  text="◀", text_color=black)
         self.right_button = Button(dark_beige, darker_beige, self.option_box.left + box_width,
                                    self.option_box.top, 75, 110, font=icon_font,
-                                   text="⮞", text_color=black)
+                                   text="▶", text_color=black)
 
         # Send button
         send_button_width = 225
@@ -433,25 +486,9 @@ class GameRound(Scene):
         """
         self.show_confirm = False  # Resetting the confirmation message boolean
         # == Task text ==
-        self.task_text = task_font.render(task, True, black)
-        if self.task_text.get_width() > screenWidth - 80:
-            # === Text is too long to fit on the screen ===
-            # Splitting text in to
-            split_text = task.split(" ")
-            half = int(len(split_text) / 2)
-            first_text = " ".join(split_text[0:half])
-            sec_text = " ".join(split_text[half:])
-
-            # Updating text objects accordingly
-            self.task_text = task_font.render(first_text, True, black)
-            self.task_text_pos = (center_text_x(self.task_text), screenHeight * 0.2)
-            self.task_text_bot = task_font.render(sec_text, True, black)
-            self.task_text_bot_pos = (center_text_x(self.task_text_bot),
-                                      self.task_text_pos[1] + self.task_text_bot.get_height())
-        else:
-            # No need to split text
-            self.task_text_bot = None
-            self.task_text_pos = (center_text_x(self.task_text), screenHeight * 0.2)
+        # Wrapping the task into as many lines as needed to fit on the screen
+        self.task_text = render_wrapped(task_font, task, True, black, screenWidth - 80)
+        self.task_text_pos = (center_text_x(self.task_text), screenHeight * 0.2)
 
     # === Methods to update the options according to the category of the round ===
     def point_round(self):
@@ -473,7 +510,7 @@ class GameRound(Scene):
         """
         Updates the choice text object and position according to new text
         """
-        self.choice_text = task_font.render(self.options[self.current_choice], True, black)
+        self.choice_text = render_text(task_font, self.options[self.current_choice], True, black)
         self.choice_text_pos = (self.option_box.left + (self.option_box.width / 2) - (self.choice_text.get_width() / 2),
                                 self.option_box.top + (self.option_box.height / 2) - (self.choice_text.get_height() / 2))
 
@@ -484,10 +521,9 @@ class GameRound(Scene):
                 pyg.quit()
                 exit()
         # Updating the button group with events
-        self.button_group.update(events)
+        self._update_sprites(self.button_group, events)
 
     def update(self):
-        clock.tick(60)
         # Moving current choice index according to button presses
         if self.left_button.pressed:
             # == Left button logic ==
@@ -497,6 +533,7 @@ class GameRound(Scene):
                 self.current_choice = len(self.options) - 1
             # Updating the text
             self._update_choice_text()
+            self.invalidate()
             self.left_button.clear_active()
         elif self.right_button.pressed:
             # == Right button logic ==
@@ -506,23 +543,21 @@ class GameRound(Scene):
                 self.current_choice = 0
             # Updating the text
             self._update_choice_text()
+            self.invalidate()
             self.right_button.clear_active()
         elif self.send_button.pressed:
             # == Send button logic ==
             # Sending answer to server
-            to_send_q.put("A" + self.options[self.current_choice])
+            send_msg("A" + self.options[self.current_choice])
             self.send_button.clear_active()
             # Showing confirm text
             self.show_confirm = True
+            self.invalidate(self.confirm_text.get_rect(topleft=self.confirm_text_pos))
 
     def draw(self):
         screen.fill(beige)
         # Showing task text
         screen.blit(self.task_text, self.task_text_pos)
-        # Is there continuation text
-        if self.task_text_bot is not None:
-            # Showing continuation text
-            screen.blit(self.task_text_bot, self.task_text_bot_pos)
         # Drawing option box
         pyg.draw.rect(screen, dark_beige, self.option_box)
 
@@ -543,33 +578,34 @@ class VotingRound(Scene):
     """
     def __init__(self):
         Scene.__init__(self)
-        self.answers = {}  # Dictionary of each player's name and their answers to the task
+        self.answers = {}  # Dictionary of each player's seat and their answers to the task
+        self.seats = []    # Seats of the players that answered, in the order they are shown
         # Text objects for showing voting
         # Instruction text
-        self.instruction_text = task_font.render("Vote for who you think the faker is", True, black)
+        self.instruction_text = render_text(task_font, "Vote for who you think the faker is", True, black)
         self.instruction_text_pos = (center_text_x(self.instruction_text), screenHeight * 0.2)
 
         # Showing player name and answer
-        self.player_name = task_font.render("PLAYER's answer is:", True, black)
-        self.player_answer = task_font.render("", True, black)
+        self.player_name = render_text(task_font, "PLAYER's answer is:", True, black)
+        self.player_answer = render_text(task_font, "", True, black)
         self.player_name_pos = (0, 0)
         self.player_answer_pos = (0, 0)
 
         # Task text
         self.task = ""
-        self.task_title = def_font.render("The task was:", True, black)
+        self.task_title = render_text(def_font, "The task was:", True, black)
         self.task_title_pos = (center_text_x(self.task_title), screenHeight * 0.05)
-        self.task_text = small_task_font.render("", True, black)
+        self.task_text = render_text(small_task_font, "", True, black)
         self.task_text_pos = (0, 0)
 
         # Confirm text
-        self.confirm_text = def_font.render("Vote successfully counted!", True, dark_beige)
+        self.confirm_text = render_text(def_font, "Vote successfully counted!", True, dark_beige)
         self.confirm_text_pos = (center_text_x(self.confirm_text), (screenHeight * 0.9))
         self.show_confirm = False
 
         # Keeping track and showing currently chosen player
         self.current_player = 0
-        self.choice_text = task_font.render("", True, black)
+        self.choice_text = render_text(task_font, "", True, black)
         self.choice_text_pos = (0, 0)
 
         # Option box
@@ -579,10 +615,10 @@ class VotingRound(Scene):
         # Left and right buttons
         self.left_button = Button(dark_beige, darker_beige, self.option_box.left - 75,
                                   self.option_box.top, 75, 110, font=icon_font,
-                                  text="⮜", text_color=black)
+                                  text="◀", text_color=black)
         self.right_button = Button(dark_beige, darker_beige, self.option_box.left + box_width,
                                    self.option_box.top, 75, 110, font=icon_font,
-                                   text="⮞", text_color=black)
+                                   text="▶", text_color=black)
 
         # Vote button
         Vote_button_width = 225
@@ -600,10 +636,9 @@ class VotingRound(Scene):
                 pyg.quit()
                 exit()
         # Updating buttons with events
-        self.button_group.update(events)
+        self._update_sprites(self.button_group, events)
 
     def update(self):
-        clock.tick(60)
         # Moving current player choice index according to button presses
         if self.left_button.pressed:
             # == Left button logic ==
@@ -613,6 +648,7 @@ class VotingRound(Scene):
                 self.current_player = len(self.answers) - 1
             # Updating the text
             self._update_text()
+            self.invalidate()
             self.left_button.clear_active()
         elif self.right_button.pressed:
             # == Right button logic ==
@@ -622,14 +658,16 @@ class VotingRound(Scene):
                 self.current_player = 0
             # Updating the text
             self._update_text()
+            self.invalidate()
             self.right_button.clear_active()
         elif self.vote_button.pressed:
             # == Vote button logic ==
-            # Sending vote to server
-            to_send_q.put("V" + list(self.answers.keys())[self.current_player])
+            # Sending the seat of the voted player to server
+            send_msg("V" + str(self.seats[self.current_player]))
             self.vote_button.clear_active()
             # Showing confirm text
             self.show_confirm = True
+            self.invalidate(self.confirm_text.get_rect(topleft=self.confirm_text_pos))
 
     def draw(self):
         screen.fill(beige)
@@ -660,38 +698,38 @@ class VotingRound(Scene):
         """
         Updates all the texts, called when a choice has changed
         """
-        # Getting the player name from the dictionary
-        cur_player_name = list(self.answers.keys())[self.current_player]
+        # Getting the player name of the current seat
+        cur_seat = self.seats[self.current_player]
+        cur_player_name = active_players.name(cur_seat, "")
         # Updating the choice text
-        self.choice_text = task_font.render(cur_player_name, True, black)
+        self.choice_text = render_text(task_font, cur_player_name, True, black)
         self.choice_text_pos = (self.option_box.left + (self.option_box.width / 2) - (self.choice_text.get_width() / 2),
                                 self.option_box.top + (self.option_box.height / 2) - (self.choice_text.get_height() / 2))
 
         # Updating task text
-        self.task_text = small_task_font.render(f"{self.task}", True, black)
+        self.task_text = render_wrapped(small_task_font, self.task, True, black, screenWidth - 80)
         self.task_text_pos = (center_text_x(self.task_text), screenHeight * 0.1)
 
         # Updating player name text
-        self.player_name = task_font.render(f"{cur_player_name}'s answer is:", True, black)
+        self.player_name = render_text(task_font, f"{cur_player_name}'s answer is:", True, black)
         self.player_name_pos = (center_text_x(self.player_name), screenHeight * 0.3)
 
         # Updating player answer text
-        self.player_answer = input_font.render(self.answers[cur_player_name], True, black)
+        self.player_answer = render_wrapped(input_font, self.answers[cur_seat], True, black, screenWidth - 80)
         self.player_answer_pos = (center_text_x(self.player_answer),
                                   self.player_name_pos[1] + self.player_answer.get_height())
 
-    def set_answers(self, answers):
+    def set_answers(self, answers, task):
         """
         Updates the local variable according to each players answer
-        :param answers: answers sent by server
+        :param answers: Dictionary of seat --> answer sent by server
+        :param task: The task that was answered
         """
-        # Making answers into a dictionary with the username and player's answer
         self.current_player = 0  # Resetting the current player choice index
         self.show_confirm = False
-        ans_list = answers.split("&")  # Splitting by &
-        self.task = ans_list[-1]  # Getting task from answer list
-        ans_list = ans_list[:-1]  # Removing the task from the answer list
-        self.answers = dict(zip(active_players, ans_list))  # Converting to dictionary using stored active player list
+        self.task = task
+        self.answers = answers
+        self.seats = list(answers)  # Seats in the order they are shown
         # Updating the text
         self._update_text()
 
@@ -703,30 +741,30 @@ class VoteResults(Scene):
     def __init__(self):
         Scene.__init__(self)
         # === Text in case of no majority ===
-        self.no_majorirty_text = result_font.render("There was no majority vote!", True, black)
+        self.no_majorirty_text = render_text(result_font, "There was no majority vote!", True, black)
         self.no_majorirty_text_pos = (center_text_x(self.no_majorirty_text), screenHeight * 0.4)
-        self.hint_text = def_font.render("Next time try to work together to get more information!", True, black)
+        self.hint_text = render_text(def_font, "Next time try to work together to get more information!", True, black)
         self.hint_text_pos = (center_text_x(self.hint_text), screenHeight * 0.55)
 
         # === Text in case of a majority ===
         self.is_majority = True
         # Majority text
-        self.majority_text = result_font.render("The majority voted for:", True, black)
+        self.majority_text = render_text(result_font, "The majority voted for:", True, black)
         self.majority_text_pos = (center_text_x(self.majority_text), screenHeight * 0.15)
         # Drumroll variables
         self.drumroll = 0  # Drumroll dot counter
         self.last_tick = pyg.time.get_ticks()  # Last time a drumroll happened
         self.drumroll_finished = False  # Has the drumroll finished
         # Drumroll text
-        self.drumroll_text = drumroll_font.render(".  .  .", True, black)
+        self.drumroll_text = render_text(drumroll_font, ".  .  .", True, black)
         self.drumroll_text_pos = (center_text_x(self.drumroll_text), screenHeight * 0.25)
         # Majority vote text (username of player that got the majority)
-        self.majority_vote_text = drumroll_font.render("PLAYER", True, black)
+        self.majority_vote_text = render_text(drumroll_font, "PLAYER", True, black)
         self.majority_vote_text_pos = (center_text_x(self.majority_vote_text), screenHeight * 0.45)
         # Final result of vote
         self.show_result = False
         # Final result text
-        self.result_text = result_font.render("Was NOT the faker!", True, black)
+        self.result_text = render_text(result_font, "Was NOT the faker!", True, black)
         self.result_text_pos = (center_text_x(self.result_text), screenHeight * 0.65)
 
     def start_scene_majority(self, majority_player, was_faker):
@@ -737,23 +775,23 @@ class VoteResults(Scene):
         """
 
         # Resetting variables accordingly
-        self.drumroll_text = drumroll_font.render("", True, black)
+        self.drumroll_text = render_text(drumroll_font, "", True, black)
         self.is_majority = True
         self.drumroll = 0
         self.drumroll_finished = False
 
         # Resetting the text
-        self.majority_vote_text = drumroll_font.render(f"{majority_player}", True, black)
+        self.majority_vote_text = render_text(drumroll_font, f"{majority_player}", True, black)
         self.majority_vote_text_pos = (center_text_x(self.majority_vote_text), screenHeight * 0.45)
 
         # Resetting result text
         self.show_result = False
         if was_faker:
-            self.result_text = result_font.render("Was the faker!", True, black)
+            self.result_text = render_text(result_font, "Was the faker!", True, black)
             self.result_text_pos = (center_text_x(self.result_text), screenHeight * 0.65)
 
         else:
-            self.result_text = result_font.render("Was NOT the faker!", True, black)
+            self.result_text = render_text(result_font, "Was NOT the faker!", True, black)
             self.result_text_pos = (center_text_x(self.result_text), screenHeight * 0.65)
 
         # Resetting the time to the current time
@@ -766,7 +804,6 @@ class VoteResults(Scene):
         self.is_majority = False
 
     def update(self):
-        clock.tick(60)
         if self.is_majority:  # If there was a majority vote we need to animate the drumroll
             if not self.drumroll_finished:  # If the drumroll isn't finished
                 # Checking if enough time has passed by comparing the current time to the last drum roll time
@@ -775,7 +812,8 @@ class VoteResults(Scene):
                     self.last_tick = now  # Updating the last tick
                     self.drumroll += 1    # Incrementing drum roll
                     # Updating drumroll text
-                    self.drumroll_text = drumroll_font.render(".  " * min(self.drumroll, 3), True, black)
+                    self.drumroll_text = render_text(drumroll_font, ".  " * min(self.drumroll, 3), True, black)
+                    self.invalidate()
                     # If we are done with the animation
                     if self.drumroll == 4:
                         self.drumroll_finished = True
@@ -784,6 +822,10 @@ class VoteResults(Scene):
                 now = pyg.time.get_ticks()
                 if now - self.last_tick >= 1250:
                     self.show_result = True
+                    self.invalidate(self.result_text.get_rect(topleft=self.result_text_pos))
+
+    def is_animating(self):
+        return self.is_majority and not self.show_result
 
     def draw(self):
         screen.fill(beige)
@@ -809,13 +851,14 @@ class RoundResults(Scene):
     Shows results for a game round
     """
     def __init__(self):
+        Scene.__init__(self)
         self.player_points = {}  # Dictionary of each player and their points
         # Point title text
-        self.points_text = result_font.render("Points each player earned this round:", True, black)
+        self.points_text = render_text(result_font, "Points each player earned this round:", True, black)
         self.points_text_pos = (center_text_x(self.points_text), screenHeight * 0.1)
 
     def update(self):
-        clock.tick(20)
+        pass
 
     def draw(self):
         screen.fill(beige)
@@ -831,7 +874,7 @@ class RoundResults(Scene):
             # Drawing rect for current player at the current position
             pyg.draw.rect(screen, dark_beige, pyg.Rect(cur_width, cur_height, rect_width, height_space*2))
             # Drawing the text onto the rect
-            p_name = player_name_font.render(f"{player} - {self.player_points[player]}", True, black)
+            p_name = render_text(player_name_font, f"{player} - {self.player_points[player]}", True, black)
             screen.blit(p_name, (cur_width + rect_width/2 - p_name.get_width() / 2, cur_height + height_space/2 +
                                  (p_name.get_height() / 4)))
             # Updating the position for the next draw
@@ -854,12 +897,10 @@ class RoundResults(Scene):
     def set_player_points(self, point_list):
         """
         Updates the local variable according to each players points
-        :param point_list: points sent by server
+        :param point_list: Dictionary of seat --> points sent by server
         """
-        # Making answers into a dictionary with the username and player's answer
-        ans_list = point_list.split("&")  # Splitting by &
-        # Converting to dictionary using stored active player list
-        self.player_points = dict(zip(active_players, ans_list))
+        # Converting to a dictionary of username --> points
+        self.player_points = {active_players.name(seat, ""): points for seat, points in point_list.items()}
 
 
 class FinalResults(Scene):
@@ -867,6 +908,7 @@ class FinalResults(Scene):
     Scene of final game results
     """
     def __init__(self):
+        Scene.__init__(self)
         # Variables of minor winner and the winner
         self.best_faker = ""
         self.best_detective = ""
@@ -881,48 +923,47 @@ class FinalResults(Scene):
         self.displayed_winner_name = False     # Displayed winner
 
         # Faker text
-        self.faker_title_text = final_titles_font.render("Best Faker:", True, black)
+        self.faker_title_text = render_text(final_titles_font, "Best Faker:", True, black)
         self.faker_title_pos = (center_text_x(self.faker_title_text), screenHeight * 0.07)
         # Faker name
-        self.faker_name = player_name_font.render(".  .  .", True, black)
+        self.faker_name = render_text(player_name_font, ".  .  .", True, black)
         self.faker_name_pos = (center_text_x(self.faker_name),
                                self.faker_title_pos[1] + self.faker_name.get_height() + 30)
         self.cached_faker_name_pos = self.faker_name_pos  # Caching position for later
 
         # Detective text
-        self.detective_title_text = final_titles_font.render("Best Detective:", True, black)
+        self.detective_title_text = render_text(final_titles_font, "Best Detective:", True, black)
         self.detective_title_pos = (center_text_x(self.detective_title_text), screenHeight * 0.27)
 
         # Detective name
-        self.detective_name = player_name_font.render(".  .  .", True, black)
+        self.detective_name = render_text(player_name_font, ".  .  .", True, black)
         self.detective_name_pos = (center_text_x(self.detective_name),
                                    self.detective_title_pos[1] + self.detective_name.get_height() + 30)
         self.cached_detective_name_pos = self.detective_name_pos  # Caching position for later
 
         # Overall winner text
-        self.winner_title_text = overall_winner_font.render("Overall Winner:", True, black)
+        self.winner_title_text = render_text(overall_winner_font, "Overall Winner:", True, black)
         self.winner_title_pos = ((screenWidth - self.winner_title_text.get_width()) / 2,
                                  screenHeight * 0.57 - self.winner_title_text.get_height() / 2)
         # Overall winner name
-        self.winner_name = winner_font.render(".  .  .", True, black)
+        self.winner_name = render_text(winner_font, ".  .  .", True, black)
         self.winner_name_pos = (center_text_x(self.winner_name), screenHeight * 0.63)
         # Overall winner points text
-        self.winner_points_text = winner_font.render("0000", True, black)
+        self.winner_points_text = render_text(winner_font, "0000", True, black)
         self.winner_points_pos = (0, 0)
 
-    def set_winners(self, winners):
+    def set_winners(self, best_faker, best_detective, overall_winner):
         """
-        Resets the scenes parameters and sets the winner variables according to the winner list the server sent
-        :param winners: Winner list the server sent
+        Resets the scenes parameters and sets the winner variables according to the winners the server sent
+        :param best_faker: Score (seat, points) of the best faker
+        :param best_detective: Score (seat, points) of the best detective
+        :param overall_winner: Score (seat, points) of the overall winner, the seat is None if no one won
         """
-        # The winners are formatted this way: 4 digit number representing the point followed by the name and separated by &
-        # Example: 0950Player1&1125Player2&1125Player2
-        winners = winners.split("&")  # Splitting into list by &
-        self.best_faker = winners[0][4:] + " - " + winners[0][:4]      # Getting faker name and points from win list
-        self.best_detective = winners[1][4:] + " - " + winners[1][:4]  # Getting detective name and points from win list
-        self.overall_winner_name = winners[2][4:]  # Getting winner name
+        self.best_faker = f"{active_players.name(best_faker.seat, '')} - {best_faker.points:04}"
+        self.best_detective = f"{active_players.name(best_detective.seat, '')} - {best_detective.points:04}"
+        self.overall_winner_name = active_players.name(overall_winner.seat, "NOONE")
         # Updating the winner point text
-        self.winner_points_text = winner_font.render(f"{winners[2][:4]}", True, black)
+        self.winner_points_text = render_text(winner_font, f"{overall_winner.points:04}", True, black)
         self.winner_points_pos = (center_text_x(self.winner_points_text),
                                   screenHeight * 0.67 + self.winner_name.get_height())
 
@@ -932,22 +973,21 @@ class FinalResults(Scene):
         self.winner_anim_counter = 0
         self.displayed_winner_name = False
         # Faker text
-        self.faker_name = final_titles_font.render("", True, black)
+        self.faker_name = render_text(final_titles_font, "", True, black)
         self.faker_name_pos = self.cached_faker_name_pos
 
         # Detective text
-        self.detective_name = final_titles_font.render("", True, black)
+        self.detective_name = render_text(final_titles_font, "", True, black)
         self.detective_name_pos = self.cached_detective_name_pos
 
         # Overall winner text
-        self.winner_name = winner_font.render("", True, black)
-        self.winner_title_text = overall_winner_font.render("", True, black)
+        self.winner_name = render_text(winner_font, "", True, black)
+        self.winner_title_text = render_text(overall_winner_font, "", True, black)
 
         # Resetting the time to the current time
         self.last_tick = pyg.time.get_ticks()
 
     def update(self):
-        clock.tick(60)
         if not self.displayed_minor_winners:  # If we haven't finished the minor winner animation
             # Checking if enough time has passed by comparing the current time to the animation
             now = pyg.time.get_ticks()
@@ -955,17 +995,18 @@ class FinalResults(Scene):
                 self.last_tick = now  # Updating the last tic
                 self.minor_winners_anim_counter += 1  # Incrementing the animation
                 # Updating the faker and detective text for the animation
-                self.faker_name = player_name_font.render(".  " * min(self.minor_winners_anim_counter, 3), True, black)
-                self.detective_name = player_name_font.render(".  " * min(self.minor_winners_anim_counter, 3), True, black)
+                self.faker_name = render_text(player_name_font, ".  " * min(self.minor_winners_anim_counter, 3), True, black)
+                self.detective_name = render_text(player_name_font, ".  " * min(self.minor_winners_anim_counter, 3), True, black)
+                self.invalidate()
                 # If the animation is done
                 if self.minor_winners_anim_counter == 4:
                     self.displayed_minor_winners = True
                     # Updating faker name text
-                    self.faker_name = player_name_font.render(self.best_faker, True, black)
+                    self.faker_name = render_text(player_name_font, self.best_faker, True, black)
                     self.faker_name_pos = (center_text_x(self.faker_name),
                                            self.faker_title_pos[1] + self.faker_name.get_height() + 30)
                     # Updating detective name text
-                    self.detective_name = player_name_font.render(self.best_detective, True, black)
+                    self.detective_name = render_text(player_name_font, self.best_detective, True, black)
                     self.detective_name_pos = (center_text_x(self.detective_name),
                                                self.detective_title_pos[1] + self.detective_name.get_height() + 30)
 
@@ -976,16 +1017,20 @@ class FinalResults(Scene):
                 self.last_tick = now
                 self.winner_anim_counter += 1
                 # Updating winner name for the animation
-                self.winner_name = winner_font.render(".  " * min(self.winner_anim_counter, 3), True, black)
-                self.winner_title_text = overall_winner_font.render("Overall Winner:", True, black)
+                self.winner_name = render_text(winner_font, ".  " * min(self.winner_anim_counter, 3), True, black)
+                self.winner_title_text = render_text(overall_winner_font, "Overall Winner:", True, black)
+                self.invalidate()
 
                 # If the animation is done we display the winner's name
                 if self.winner_anim_counter == 4:
                     self.displayed_winner_name = True
                     # Updating the winner's name
-                    self.winner_name = winner_font.render(self.overall_winner_name, True, black)
+                    self.winner_name = render_text(winner_font, self.overall_winner_name, True, black)
                     self.winner_name_pos = (center_text_x(self.winner_name), screenHeight * 0.63)
 
+    def is_animating(self):
+        return not self.displayed_winner_name
+
     def draw(self):
         screen.fill(beige)
         # Drawing minor titles and name
@@ -1001,3 +1046,41 @@ class FinalResults(Scene):
         if self.displayed_winner_name:
             # Drawing the point text
             screen.blit(self.winner_points_text, self.winner_points_pos)
+
+
+class SceneRegistry:
+    """
+    Holds the client's scenes and constructs each scene the first time it's needed instead of all of them at startup
+    """
+    def __init__(self):
+        self._scenes = {}  # Scene class --> scene object
+        self._lock = threading.Lock()  # Makes sure a scene is only constructed once when prewarming in the background
+
+    def get(self, scene_class):
+        """
+        Returns the scene of a class, constructing it if this is the first time it's used
+        :param scene_class: Scene class
+        :return: Scene object
+        """
+        scene = self._scenes.get(scene_class)
+        if scene is None:
+            with self._lock:
+                scene = self._scenes.get(scene_class)
+                if scene is None:  # Checking again, the prewarm thread might have constructed it while we waited
+                    scene = scene_class()
+                    self._scenes[scene_class] = scene
+        return scene
+
+    def prewarm(self, *scene_classes):
+        """
+        Constructs scenes on a background thread, so they are ready by the time they are needed
+        :param scene_classes: Scene classes to construct, in order
+        :return: The prewarm thread
+        """
+        thread = threading.Thread(target=self._prewarm, args=scene_classes, daemon=True)
+        thread.start()
+        return thread
+
+    def _prewarm(self, *scene_classes):
+        for scene_class in scene_classes:
+            self.get(scene_class)
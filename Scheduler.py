@@ -0,0 +1,48 @@
+import threading
+import pygame as pyg
+
+NETWORK_EVENT = pyg.USEREVENT + 1  # Posted by the network thread to wake the main loop up
+
+
+class Scheduler:
+    """
+    Decides when the client main loop runs a frame. While nothing is animating the loop sleeps in pyg.event.wait until
+    there's input or the network thread posts a NETWORK_EVENT, instead of running 60 frames a second doing nothing
+    """
+    def __init__(self, clock, fps=60, idle_timeout=1000):
+        """
+        :param clock: Pygame clock used to limit the frame rate while animating
+        :param fps: Max frame rate while animating
+        :param idle_timeout: Max milliseconds to sleep while idle, just in case a wake up is missed
+        """
+        self.clock = clock
+        self.fps = fps
+        self.idle_timeout = idle_timeout
+        self._wake_pending = threading.Event()  # Set while a NETWORK_EVENT is waiting in the event queue
+
+    def notify(self):
+        """
+        Wakes the main loop up, safe to call from any thread. Only one wake up event is queued at a time
+        """
+        if not self._wake_pending.is_set():
+            self._wake_pending.set()
+            pyg.event.post(pyg.event.Event(NETWORK_EVENT))
+
+    def wait(self, animating):
+        """
+        Waits until the next frame should run
+        :param animating: Is the current scene animating, if so frames run at the max frame rate
+        :return: Event list for the frame (without the NETWORK_EVENTs)
+        """
+        # The pending flag is cleared before reading the events and before the caller reads the message queue, so a
+        # message that arrives after this point always posts a new wake up event
+        if animating:
+            self.clock.tick(self.fps)
+            self._wake_pending.clear()
+            events = pyg.event.get()
+        else:
+            first = pyg.event.wait(self.idle_timeout)  # Sleeping until there's an event
+            self._wake_pending.clear()
+            events = [first] + pyg.event.get() if first.type != pyg.NOEVENT else []
+            self.clock.tick()  # Keeping the clock up to date for when animating starts
+        return [event for event in events if event.type != NETWORK_EVENT]
@@ -0,0 +1,26 @@
+from collections import namedtuple
+from enum import Enum
+
+"""
+=== Game flow ===
+States of a room and the events the phases send to move it between them. The transitions themselves are in Room.py
+"""
+
+
+class State(Enum):
+    """
+    State of a room, each state has a phase that processes the messages while the room is in it
+    """
+    LOBBY = 1              # Players connect and ready up
+    CHOOSING_CATEGORY = 2  # A player picks the category of the next round
+    ROUND = 3              # Tasks, voting and round results
+    FINAL_RESULTS = 4      # Final results of the game
+
+
+# === Events ===
+AllReady = namedtuple("AllReady", ())                          # All players are ready, start the game
+CategoryChosen = namedtuple("CategoryChosen", ("category",))   # Category (P/N/R) of the next round was chosen
+RoundOver = namedtuple("RoundOver", ())                        # Round ended and its points were shown
+GameOver = namedtuple("GameOver", ())                          # All the game's rounds were played
+ResultsShown = namedtuple("ResultsShown", ())                  # Final results were shown, back to lobby
+NotEnoughPlayers = namedtuple("NotEnoughPlayers", ())          # Too many players left to continue the game
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+"""
+=== Server metrics ===
+Counters, sampled timers and gauges for the server, exposed in the Prometheus text format over a local http endpoint
+"""
+
+
+class Metrics:
+    """
+    Class for collecting server metrics. The receiving thread and the main server thread both record metrics, so
+    counters and timers are updated under a lock (an uncontended lock costs far less than a send). Timers only measure
+    one out of every sample_rate calls
+    """
+    def __init__(self, sample_rate=8):
+        """
+        :param sample_rate: Only one out of every sample_rate calls to a timer is actually measured
+        """
+        self.sample_rate = sample_rate
+        self.counters = defaultdict(int)     # (metric name, label) --> count
+        self.timers = {}                     # (metric name, label) --> [sample count, total seconds, max seconds]
+        self._timer_calls = defaultdict(int)  # (metric name, label) --> amount of calls, used for sampling
+        self.gauges = {}                     # (metric name, label) --> function returning the current value
+        self._lock = threading.Lock()        # Guards the counters and timers, += isn't atomic between threads
+        self._http_server = None
+
+    def inc(self, name, label="", amount=1):
+        """
+        Increments a counter
+        :param name: Name of the counter
+        :param label: Label of the counter (for example the message code)
+        :param amount: Amount to increment by
+        """
+        with self._lock:
+            self.counters[(name, label)] += amount
+
+    def start_timer(self, name, label=""):
+        """
+        Starts a sampled timer, pass the result to stop_timer
+        :param name: Name of the timer
+        :param label: Label of the timer
+        :return: Start time or None if this call isn't sampled
+        """
+        key = (name, label)
+        with self._lock:
+            self._timer_calls[key] += 1
+            calls = self._timer_calls[key]
+        if (calls - 1) % self.sample_rate:
+            return None  # Not sampling this call
+        return time.perf_counter()
+
+    def stop_timer(self, name, start, label=""):
+        """
+        Stops a timer started with start_timer
+        :param name: Name of the timer
+        :param start: Value returned by start_timer
+        :param label: Label of the timer
+        """
+        if start is not None:
+            self.observe(name, time.perf_counter() - start, label)
+
+    def observe(self, name, seconds, label=""):
+        """
+        Records a single duration, not sampled (use for rare events like handshakes and phase transitions)
+        :param name: Name of the timer
+        :param seconds: Measured duration in seconds
+        :param label: Label of the timer
+        """
+        with self._lock:
+            timer = self.timers.get((name, label))
+            if timer is None:
+                self.timers[(name, label)] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                if seconds > timer[2]:
+                    timer[2] = seconds
+
+    def set_gauge(self, name, func, label=""):
+        """
+        Registers a gauge, the function is only called when the metrics are read
+        :param name: Name of the gauge
+        :param func: Function with no parameters that returns the current value
+        :param label: Label of the gauge
+        """
+        self.gauges[(name, label)] = func
+
+    def render(self):
+        """
+        Returns all the metrics formatted in the Prometheus text format
+        """
+        lines = []
+        # Copying under the lock since the server threads keep recording while we format
+        with self._lock:
+            counters = dict(self.counters)
+            timers = {key: list(timer) for key, timer in self.timers.items()}
+        for (name, label), value in sorted(counters.items()):
+            lines.append(f"fakinit_{name}_total{_format_label(label)} {value}")
+        for (name, label), (count, total, maximum) in sorted(timers.items()):
+            lines.append(f"fakinit_{name}_seconds_count{_format_label(label)} {count}")
+            lines.append(f"fakinit_{name}_seconds_sum{_format_label(label)} {total:.6f}")
+            lines.append(f"fakinit_{name}_seconds_max{_format_label(label)} {maximum:.6f}")
+        for (name, label), func in sorted(dict(self.gauges).items()):
+            lines.append(f"fakinit_{name}{_format_label(label)} {func()}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port, host="127.0.0.1"):
+        """
+        Starts serving the metrics over http on a daemon thread
+        :param port: Port to serve on
+        :param host: Address to bind to, local only by default
+        """
+        metrics = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Not printing every scrape
+
+        self._http_server = ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=self._http_server.serve_forever, daemon=True).start()
+
+
+def _format_label(label):
+    """
+    Formats a label for the Prometheus text format
+    :param label: Label to format, empty string for no label
+    """
+    if label == "":
+        return ""
+    # Escaping the characters the format gives a meaning to
+    label = label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'{{label="{label}"}}'
+
+
+metrics = Metrics()  # Shared metrics object used by the whole server
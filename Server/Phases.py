@@ -1,22 +1,34 @@
 import time
 from abc import ABC, abstractmethod
 import random
+from GameFlow import AllReady, CategoryChosen, RoundOver, ResultsShown, NotEnoughPlayers
+from ResultsStore import RoundResult
+from Standings import FAKER, DETECTIVE, TOTAL
 
 """
 === Server phases ===
 """
 
-num_game_rounds = 0  # Game rounds that have passed
 min_players = 4  # Minimum amount of players for a game
+answer_separators = ("&", ":")  # Separators of the answers broadcast, removed from answers
 
 
 class Phase(ABC):
     """
         Abstract class to represent server phases
     """
-    def __init__(self, server_comm, instruct_q):
+    def __init__(self, server_comm, events, rng=random, wait=time.sleep):
+        """
+        :param server_comm: Access to the server communication
+        :param events: Queue of game flow events for the room
+        :param rng: Random generator used for every random choice, the room passes its own seeded one
+        :param wait: Function used to wait for clientside animations, replaying passes one that doesn't wait
+        """
         self.server_comm = server_comm  # Access to the server communication
-        self.instruct_q = instruct_q  # Instruction queue for main server program
+        self.events = events  # Queue of game flow events for the room
+        self.rng = rng
+        self.wait = wait
+        self.taken = 0  # Amount of messages the phase took from the queue, counted for the session recorder
 
     @abstractmethod
     def process_queue(self):
@@ -40,9 +52,7 @@ class Phase(ABC):
         flag = True
         if len(self.server_comm.open_clients) < min_players:  # Are there enough to continue
             flag = False
-            self.instruct_q.put("BACK TO LOBBY")  # Sending the server and all clients back to lobby
-            global num_game_rounds
-            num_game_rounds = 0  # Resetting the game rounds
+            self.events.put(NotEnoughPlayers())  # Sending the server and all clients back to lobby
         return flag
 
     def _get_next_msg(self):
@@ -51,6 +61,7 @@ class Phase(ABC):
             tuple is built this way: (sender sock, message code, message body -(can be None if the message is empty) )
         """
         msg = self.server_comm.msg_q.get()
+        self.taken += 1
         sender_sock = msg[0]
         # Getting the message code
         msg = msg[1]
@@ -67,8 +78,8 @@ class ConnectingAndLobby(Phase):
     """
     Connecting and lobby phase, default starting phase
     """
-    def __init__(self, server_comm, instruct_q):
-        Phase.__init__(self, server_comm, instruct_q)
+    def __init__(self, server_comm, events, rng=random, wait=time.sleep):
+        Phase.__init__(self, server_comm, events, rng, wait)
 
     def process_queue(self):
         # Iterating through all messages sent from clients
@@ -101,15 +112,25 @@ class ConnectingAndLobby(Phase):
 
         if cur_ready:
             # If all are ready we start the first round
-            self.instruct_q.put("START NEW ROUND")
+            self.events.put(AllReady())
+
+    def reset_players(self):
+        """
+        Resets the ready status and points of each player for the next game
+        """
+        for player in self.server_comm.open_clients.values():
+            player.ready = False
+            player.chose_category = False
+            player.detective_points = 0
+            player.faker_points = 0
 
 
 class ChooseCategory(Phase):
     """
     Choosing category phase, chooses a random player that hasn't chosen a category and receives category from them
     """
-    def __init__(self, server_comm, instruct_q):
-        Phase.__init__(self, server_comm, instruct_q)
+    def __init__(self, server_comm, events, rng=random, wait=time.sleep):
+        Phase.__init__(self, server_comm, events, rng, wait)
         self.chosen_sock = None  # Socket chosen to pick category
 
     def process_queue(self):
@@ -118,8 +139,8 @@ class ChooseCategory(Phase):
             (sender_sock, msg_code, msg) = self._get_next_msg()
             if msg_code == "C" and sender_sock is self.chosen_sock:  # If the chosen user picked a category
                 if msg == "POINT" or msg == "NUMBER" or msg == "RAISE":  # If the chosen category is valid
-                    # Instructing the main program to switch to according game round
-                    self.instruct_q.put("ROUND " + msg[0])
+                    # Telling the room to start a round of the category, P/N/R
+                    self.events.put(CategoryChosen(msg[0]))
 
     def on_disconnect(self):
         # Checking if there are enough players to continue
@@ -145,10 +166,10 @@ class ChooseCategory(Phase):
         if not len(available) == 0:  # Making sure there are available players in the case of a disconnect
 
             # Choosing a random player to pick category
-            chosen = random.choice(available)
+            chosen = self.rng.choice(available)
         else:
-            # Just picking a random socket to be the faker
-            chosen = random.choice(list(self.server_comm.open_clients.keys()))
+            # Just picking a random player to pick category
+            chosen = self.rng.choice(list(self.server_comm.open_clients.values()))
 
         # Updating the chosen player's variables
         chosen.chose_category = True
@@ -160,10 +181,12 @@ class ChooseCategory(Phase):
         """
         Method to call when starting the category phase, initializes the phase variables
         """
+        if not self._enough_to_continue():
+            return  # Players left while the last round's results were shown, going back to lobby
         self._choose_player_for_category()
-        chosen_username = self.server_comm.open_clients[self.chosen_sock].username
+        chosen_seat = self.server_comm.open_clients[self.chosen_sock].seat
         # Sending a message to all players telling them who is the chosen player
-        self.server_comm.send_all_exl("C&" + chosen_username, self.chosen_sock)
+        self.server_comm.send_all_exl(f"C&{chosen_seat}", self.chosen_sock)
         # Telling the chosen socket he is the category chooser
         self.server_comm.send_one("CY", self.chosen_sock)
 
@@ -172,28 +195,46 @@ class Round(Phase):
     """
     Class for game rounds - task setting and voting
     """
-    def __init__(self, server_comm, instruct_q, task_db):
-        Phase.__init__(self, server_comm, instruct_q)
+    def __init__(self, server_comm, events, task_db, standings, rng=random, wait=time.sleep):
+        Phase.__init__(self, server_comm, events, rng, wait)
+        self.standings = standings  # Standings of the game, updated with every point awarded
         # === Task variables ===
-        self.task_db = task_db  # Access to the task database
+        self.task_db = task_db      # Tasks the current round draws from
+        self.task_source = task_db  # Tasks the next round draws from, the room replaces them between games
         # Ids of tasks that were already chosen
         self.picked_id_point = []
         self.picked_id_number = []
         self.picked_id_raise = []
 
         self.faker = (None, None)  # Socket and username of faker
+        self.faker_seat = None     # Seat of the faker, for the round history even if the faker leaves
         self.task_counter = 0      # Task counter
         self.is_in_voting = False  # is in voting
         self.cur_category = ""     # Keeps track of current category
         self.cur_task = ""         # Current task
+        self.votes = []            # Votes of the current round, (task number, voter seat, voted seat) tuples
+        self.history = []          # RoundResult of each round played in the current game
+
+    def start_round(self, category):
+        """
+        Starts a round of a category, chooses the faker and sends the first task
+        :param category: Category of the round, P --> Point round, R --> Raise round, N --> Number round
+        """
+        self.task_db = self.task_source  # Keeping the same tasks for the whole round even if they're reloaded
+        self.choose_faker()    # Choosing random player to be the faker
+        self.task_counter = 0  # Counts the number of tasks that were played
+        self.cur_category = category
+        self.votes = []
+        self.reset_round_points()
+        self._next_task()
 
     # === Methods to start round by category ====
     def start_round_point(self):
         # Choosing random task until getting one we haven't picket yet
         self.is_in_voting = False
-        task = self.task_db.task_point()  # Getting random task from database
+        task = self.task_db.task_point(self.rng)  # Getting random task from database
         while task[0] in self.picked_id_point:  # Until we get a task we haven't picked yet
-            task = self.task_db.task_point()
+            task = self.task_db.task_point(self.rng)
         self.picked_id_point.append(task[0])  # Adding the chosen id to the picked id list
         self.cur_task = task[1]
         # Sending the first task
@@ -203,9 +244,9 @@ class Round(Phase):
     def start_round_number(self):
         # Choosing random task until getting one we haven't picket yet
         self.is_in_voting = False
-        task = self.task_db.task_number()  # Getting random task from database
+        task = self.task_db.task_number(self.rng)  # Getting random task from database
         while task[0] in self.picked_id_number:  # Until we get a task we haven't picked yet
-            task = self.task_db.task_number()
+            task = self.task_db.task_number(self.rng)
         self.picked_id_number.append(task[0])  # Adding the chosen id to the picked id list
         self.cur_task = task[1]
         # Sending the first task
@@ -215,9 +256,9 @@ class Round(Phase):
     def start_round_raise(self):
         # Choosing random task until getting one we haven't picket yet
         self.is_in_voting = False
-        task = self.task_db.task_raise()  # Getting random task from database
+        task = self.task_db.task_raise(self.rng)  # Getting random task from database
         while task[0] in self.picked_id_raise:  # Until we get a task we haven't picked yet
-            task = self.task_db.task_raise()
+            task = self.task_db.task_raise(self.rng)
         self.picked_id_raise.append(task[0])  # Adding the chosen id to the picked id list
         self.cur_task = task[1]
         # Sending the first task
@@ -229,10 +270,11 @@ class Round(Phase):
         Chooses random socket to be the faker
         """
         # Choosing a random socket to be the faker
-        faker_sock = random.choice(list(self.server_comm.open_clients.keys()))
+        faker_sock = self.rng.choice(list(self.server_comm.open_clients.keys()))
         # Getting the socket's associated username for voting purposes
         faker_user = self.server_comm.open_clients[faker_sock].username
         self.faker = (faker_sock, faker_user)
+        self.faker_seat = self.server_comm.open_clients[faker_sock].seat
 
     def _send_task(self, prefix):
         """
@@ -249,7 +291,11 @@ class Round(Phase):
         while not self.server_comm.msg_q.empty():
             (sender_sock, msg_code, msg) = self._get_next_msg()
             if msg_code == "A" and not self.is_in_voting:  # Answer to a task
-                self.server_comm.open_clients[sender_sock].current_ans = msg  # Updating answer stored for player
+                # Removing the separators, an answer with them would break every client's parsing of the broadcast
+                answer = "".join(char for char in msg or "" if char not in answer_separators)
+                if not answer:
+                    continue  # Ignoring empty answers, an empty answer means the player didn't answer yet
+                self.server_comm.open_clients[sender_sock].current_ans = answer  # Updating answer stored for player
 
                 # Checking if all players have answered
                 all_ans = True
@@ -262,7 +308,9 @@ class Round(Phase):
                     self._goto_voting()
                     self._reset_player_answers()
 
-            elif msg_code == "V" and self.is_in_voting:  # Vote from voting round:
+            elif msg_code == "V" and self.is_in_voting:  # Vote from voting round, the seat of the voted player
+                if msg is None or not msg.isdigit() or self.server_comm.seat_to_socket(msg) is None:
+                    continue  # Ignoring empty votes, votes that aren't seats and votes for players not in the game
                 self.server_comm.open_clients[sender_sock].current_ans = msg  # Updating vote stored for player
                 # Checking if all players have voted
                 all_vote = True
@@ -293,9 +341,9 @@ class Round(Phase):
         self.is_in_voting = True
         # Formatting broadcast message
         answer_broadcast = "V"
-        # Adding each players answer to the broadcast
+        # Adding each players seat and answer to the broadcast
         for player in self.server_comm.open_clients.values():
-            answer_broadcast += player.current_ans + "&"
+            answer_broadcast += f"{player.seat}:{player.current_ans}&"
         answer_broadcast += self.cur_task  # Adding the task as the final part for displaying on each player screen
         # Broadcasting the message
         self.server_comm.send_all(answer_broadcast)
@@ -318,66 +366,80 @@ class Round(Phase):
         majority_sock = None  # The socket with the current majority vote
         # Iterating through each player's vote
         for player in self.server_comm.open_clients.values():
-            cur_vote = player.current_ans
+            voted_sock = self.server_comm.seat_to_socket(player.current_ans)  # Votes are seats
+            if voted_sock not in self.server_comm.open_clients:
+                continue  # Voted player has left the game
+            self.votes.append((self.task_counter, player.seat, self.server_comm.open_clients[voted_sock].seat))
             # If the player voted for the faker and is not the faker himself
-            if not player.username == self.faker[1] and cur_vote == self.faker[1]:
+            if not player.username == self.faker[1] and voted_sock is self.faker[0]:
                 # Adding detective points according to which round it is
                 awarded_points = 200 - (self.task_counter * 50)
                 player.detective_points += awarded_points
                 player.cur_round_points += awarded_points
+                self.standings.award(player.seat, DETECTIVE, awarded_points)
             # Adding vote to player
-            voted_sock = self.server_comm.username_to_socket(cur_vote)
             self.server_comm.open_clients[voted_sock].vote_counter += 1
             # Checking if the voted socket is now the majority voted socket
             if majority_sock is None or self.server_comm.open_clients[voted_sock].vote_counter > self.server_comm.open_clients[majority_sock].vote_counter:
                 majority_sock = voted_sock
         caught = False  # If the faker was caught
         # Checking if the socket that got the majority vote actually got a majority
-        if self.server_comm.open_clients[majority_sock].vote_counter > round(len(self.server_comm.open_clients) / 2):
+        if majority_sock is not None and self.server_comm.open_clients[majority_sock].vote_counter > round(len(self.server_comm.open_clients) / 2):
             # Checking if the majority voted for the faker
             if majority_sock is self.faker[0]:
                 caught = True
-                # G - Game round result, 1st T - Majority vote, 2nd T - Was the faker.
-                self.server_comm.send_all(f"GT{self.faker[1]}T")
-                time.sleep(7.5)  # Waiting for clientside animation
+                # G - Game round result, 1st T - Majority vote, seat of the voted player, 2nd T - Was the faker.
+                self.server_comm.send_all(f"GT{self.server_comm.open_clients[majority_sock].seat}T")
+                self.wait(7.5)  # Waiting for clientside animation
             else:
-                # G - Game round result, 1st T - Majority vote, 2nd T - Was not the faker.
-                self.server_comm.send_all(f"GT{self.server_comm.open_clients[majority_sock].username}F")
-                time.sleep(7.5)  # Waiting for clientside animation
+                # G - Game round result, 1st T - Majority vote, seat of the voted player, F - Was not the faker.
+                self.server_comm.send_all(f"GT{self.server_comm.open_clients[majority_sock].seat}F")
+                self.wait(7.5)  # Waiting for clientside animation
         else:
             # No majority vote
             self.server_comm.send_all(f"GF")
-            time.sleep(5.5)  # Waiting for clientside reading time
+            self.wait(5.5)  # Waiting for clientside reading time
             pass
 
         self._reset_player_answers()
         if not caught:
-            # Giving the faker points for not being caught
+            # Giving the faker points for not being caught, unless the faker left while the results were shown
             awarded_points = 125 + (self.task_counter * 50)
-            self.server_comm.open_clients[self.faker[0]].faker_points += awarded_points
-            self.server_comm.open_clients[self.faker[0]].cur_round_points += awarded_points
+            faker = self.server_comm.open_clients.get(self.faker[0])
+            if faker is not None:
+                faker.faker_points += awarded_points
+                faker.cur_round_points += awarded_points
+                self.standings.award(faker.seat, FAKER, awarded_points)
             if self.task_counter == 3:
                 # Rounds run out, faker won
+                self._save_round(caught)
                 self._broadcast_player_points()  # Broadcasting points earned this round to all players
-                self.instruct_q.put("START NEW ROUND")
+                self.events.put(RoundOver())
             else:
                 # Continue to next task
                 self._next_task()
         else:  # The faker was caught
+            self._save_round(caught)
             self._broadcast_player_points()  # Broadcasting points earned this round to all players
-            self.instruct_q.put("START NEW ROUND")
+            self.events.put(RoundOver())
+
+    def _save_round(self, caught):
+        """
+        Adds the result of the round that just ended to the game's history
+        :param caught: Was the faker caught
+        """
+        self.history.append(RoundResult(self.cur_category, self.faker_seat, self.faker[1], caught,
+                                        self.task_counter, self.votes))
 
     def _broadcast_player_points(self):
         """
         Broadcasts the point of each player to all players and waits for reading time, get called at the end of each round
         """
-        # Formatting the point list msg
-        formatted_point_list = "P"
-        for player in self.server_comm.open_clients.values():
-            formatted_point_list += str(player.cur_round_points) + "&"
-        formatted_point_list = formatted_point_list[:-1]  # Removing the last &
+        # Formatting the point list msg, seat:points of each player
+        formatted_point_list = "P" + "&".join(f"{player.seat}:{player.cur_round_points}"
+                                              for player in self.server_comm.open_clients.values())
         self.server_comm.send_all(formatted_point_list)   # Sending to all clients
-        time.sleep(6.5)  # Waiting for clientside reading time
+        self.wait(6.5)  # Waiting for clientside reading time
 
     def _reset_player_answers(self):
         """
@@ -396,6 +458,12 @@ class Round(Phase):
         self.picked_id_number = []
         self.picked_id_raise = []
 
+    def reset_history(self):
+        """
+        Resets the history of the game's rounds
+        """
+        self.history = []
+
     def reset_round_points(self):
         """
         Resets each player's round points
@@ -409,8 +477,9 @@ class FinalScreen(Phase):
     """
     Final phase of the game, send final point results and goes back to lobby at the end
     """
-    def __init__(self, server_comm, instruct_q):
-        Phase.__init__(self, server_comm, instruct_q)
+    def __init__(self, server_comm, events, standings, rng=random, wait=time.sleep):
+        Phase.__init__(self, server_comm, events, rng, wait)
+        self.standings = standings  # Standings of the game, kept by the round phase
 
     def process_queue(self):
         pass
@@ -420,46 +489,21 @@ class FinalScreen(Phase):
         Broadcasts the final results of the game
         :return:
         """
-        max_faker = (None, 0)       # Tuple of socket with current max faker points and it's points
-        max_detective = (None, 0)   # Tuple of socket with current max detective points and it's points
-        max_winner = (None, 0)      # Tuple of socket with current max points and it's points
-
-        # Iterating through all player's points
-        for sock in self.server_comm.open_clients.keys():
-            player = self.server_comm.open_clients[sock]
-            # Setting the max if a new maximum is found
-            # Faker
-            if player.faker_points > max_faker[1]:
-                max_faker = (sock, player.faker_points)
-            # Detective
-            if player.detective_points > max_detective[1]:
-                max_detective = (sock, player.detective_points)
-            # Overall
-            if player.get_points() > max_winner[1]:
-                max_winner = (sock, player.get_points())
-
-            # In the rare case that no one got detective or faker point we randomly pick a socket to prevent errors
-        if max_faker[0] is None:
-            max_faker = (random.choice(list(self.server_comm.open_clients.keys())), 0)
-
-        if max_detective[0] is None:
-            max_detective = (random.choice(list(self.server_comm.open_clients.keys())), 0)
-
-        # Formatting winner message to send to players
-        formatted_winners_msg = "W"
-        # Adding faker
-        formatted_winners_msg += f"{str(max_faker[1]).zfill(4) + self.server_comm.open_clients[max_faker[0]].username}&"
-        # Adding detective
-        formatted_winners_msg += f"{str(max_detective[1]).zfill(4) + self.server_comm.open_clients[max_detective[0]].username}&"
-        # Adding overall winner
-        if max_winner[0] in self.server_comm.open_clients:
-            formatted_winners_msg += f"{str(max_winner[1]).zfill(4) + self.server_comm.open_clients[max_winner[0]].username}"
-        else:
-            formatted_winners_msg += f"0000NOONE"
+        # Players that left the game can't win
+        def is_playing(seat):
+            return self.server_comm.seat_to_socket(seat) is not None
+
+        # Formatting winner message to send to players, seat:points of the best faker, the best detective and the
+        # overall winner. The seat is empty if no one got such points
+        winners = []
+        for kind in (FAKER, DETECTIVE, TOTAL):
+            best = self.standings.top(kind, 1, is_playing)
+            winners.append(f"{best[0][0]}:{best[0][1]}" if best else ":0")
+        formatted_winners_msg = "W" + "&".join(winners)
 
         # Broadcasting the formatted message
         self.server_comm.send_all(formatted_winners_msg)
 
         # Waiting for clientside animation
-        time.sleep(14)
-        self.instruct_q.put("BACK TO LOBBY")
+        self.wait(14)
+        self.events.put(ResultsShown())
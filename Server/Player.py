@@ -1,14 +1,16 @@
 class Player:
-    def __init__(self, ip, key, username):
+    def __init__(self, ip, key, username, seat=0):
         """
         Data storing class for server
         :param ip: IP of player
         :param key: AES encryption and decryption key
         :param username: Username of player
+        :param seat: Numeric id of player, assigned when joining
         """
         self.ip = ip                 # Associated ip of player
         self.key = key               # AES key for encrypted communication
         self.username = username     # Username of player
+        self.seat = seat             # Numeric id of player
         self.detective_points = 0    # Points earned from voting to the faker
         self.faker_points = 0        # Points earned from being a faker
         self.cur_round_point = 0     # Points earned from current round (For round results)
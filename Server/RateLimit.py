@@ -0,0 +1,119 @@
+import queue
+import time
+from collections import defaultdict
+
+"""
+=== Flood protection ===
+Token buckets limiting how fast each connection can send, and the bounded message queue between the receiving thread
+and the room, which also keeps a single connection from taking all of it
+"""
+
+
+class TokenBucket:
+    """
+    Token bucket, refills at a steady rate up to its burst size and every action takes tokens from it
+    """
+    def __init__(self, rate, burst):
+        """
+        :param rate: Tokens added per second
+        :param burst: Max amount of tokens, the bucket starts full
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+
+    def take(self, amount=1, now=None):
+        """
+        Takes tokens if there are enough
+        :param amount: Amount of tokens to take
+        :param now: Current monotonic time, looked up if not given
+        :return: True if the tokens were taken, False if there weren't enough
+        """
+        if now is None:
+            now = time.monotonic()
+        # Refilling for the time that passed since the last take
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+
+class ConnectionLimiter:
+    """
+    Rate limits of a single connection, on frames and on bytes. Every frame over the limits is a strike and a
+    connection that keeps getting strikes is abusive
+    """
+    def __init__(self, frames_per_second=10, frame_burst=20, bytes_per_second=1000, byte_burst=2000,
+                 strikes_per_second=0.2, strike_burst=10):
+        """
+        :param frames_per_second: Frames the connection can keep sending per second
+        :param frame_burst: Frames the connection can send at once
+        :param bytes_per_second: Bytes the connection can keep sending per second
+        :param byte_burst: Bytes the connection can send at once
+        :param strikes_per_second: Strikes forgiven per second
+        :param strike_burst: Strikes the connection can get before it's abusive
+        """
+        self.frames = TokenBucket(frames_per_second, frame_burst)
+        self.bytes = TokenBucket(bytes_per_second, byte_burst)
+        self.strikes = TokenBucket(strikes_per_second, strike_burst)
+
+    def allow(self, frame_len):
+        """
+        Checks a frame against the limits, must be called before the frame is decoded
+        :param frame_len: Length of the frame in bytes
+        :return: True if the frame is within the limits
+        """
+        now = time.monotonic()
+        # Checking the bytes first so a frame that doesn't fit doesn't use up a frame token
+        return self.bytes.take(frame_len, now) and self.frames.take(1, now)
+
+    def strike(self):
+        """
+        Gives the connection a strike
+        :return: False if the connection ran out of strikes and should be disconnected
+        """
+        return self.strikes.take()
+
+
+class FairQueue(queue.Queue):
+    """
+    Bounded queue of (sender, message) tuples where a single sender can only have a share of the queue, so a flooding
+    connection fills its own share instead of the whole queue. Consumers use it like a regular queue
+    """
+    def __init__(self, maxsize=1024, per_sender=32):
+        """
+        :param maxsize: Max amount of messages in the queue
+        :param per_sender: Max amount of messages a single sender can have in the queue
+        """
+        super().__init__(maxsize)
+        self.per_sender = per_sender
+        self._sender_counts = defaultdict(int)  # Sender --> amount of its messages in the queue
+
+    def try_put(self, item):
+        """
+        Puts an item into the queue without blocking
+        :param item: (sender, message) tuple
+        :return: False if the queue or the sender's share of it is full and the item wasn't put
+        """
+        with self.not_full:
+            if self._qsize() >= self.maxsize or self._sender_counts[item[0]] >= self.per_sender:
+                return False
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+            return True
+
+    # === Keeping the sender counts, called by Queue while holding its lock ===
+    def _put(self, item):
+        super()._put(item)
+        self._sender_counts[item[0]] += 1
+
+    def _get(self):
+        item = super()._get()
+        self._sender_counts[item[0]] -= 1
+        if not self._sender_counts[item[0]]:
+            del self._sender_counts[item[0]]
+        return item
@@ -0,0 +1,100 @@
+import struct
+import threading
+import time
+
+"""
+=== Session recorder ===
+Append-only binary log of every inbound frame and of the room's steps and task reloads, used by Replay.py to reproduce
+a session offline.
+The file starts with a header - magic (4 bytes), format version (unsigned short). Each record is a header - timestamp
+(double), kind (1 byte), seat (unsigned int), payload length (unsigned int) - followed by the utf-8 payload
+"""
+
+# Record kinds
+SEED = b"S"        # Seed of a room's random generator, payload is the seed
+JOIN = b"J"        # Player got approved, payload is the username
+MESSAGE = b"M"     # Message from an approved player, payload is the message
+DISCONNECT = b"D"  # Approved player disconnected, payload is empty
+STEP = b"T"        # A step of the room took messages or handled a disconnect, payload is the amount of messages taken
+RELOAD = b"R"      # Reloaded tasks were swapped in, payload is the tasks as TaskSnapshot.to_json returns them
+
+version = 1  # Version of the recording format, recordings of other versions can't be replayed
+_magic = b"FKRC"
+_file_header = struct.Struct("<4sH")
+_header = struct.Struct("<dcII")  # Seats only grow over a session and reloads hold every task, so both get 4 bytes
+
+
+class Recorder:
+    """
+    Class for recording a session into a binary log file
+    """
+    def __init__(self, path):
+        """
+        :param path: Path of the log file, records are appended to it
+        """
+        self.path = path
+        self.file = open(path, "ab")
+        # Held while writing a record. The server also holds it while queuing a message and recording it, so the step
+        # of the room that takes the message is always recorded after the message
+        self.lock = threading.RLock()
+        if self.file.tell() == 0:
+            self.file.write(_file_header.pack(_magic, version))
+
+    def record(self, kind, seat, payload=""):
+        """
+        Appends a record to the log, flushed right away so a crash doesn't lose it
+        :param kind: Kind of record
+        :param seat: Seat of the player the record is about
+        :param payload: Payload string
+        """
+        data = payload.encode()
+        with self.lock:
+            self.file.write(_header.pack(time.time(), kind, seat, len(data)) + data)
+            self.file.flush()
+
+    def record_seed(self, seed):
+        """
+        Records the seed of a room's random generator
+        :param seed: Seed to record
+        """
+        self.record(SEED, 0, str(seed))
+
+    def record_step(self, taken):
+        """
+        Records the end of a step of the room
+        :param taken: Amount of messages the step took from the message queue
+        """
+        self.record(STEP, 0, str(taken))
+
+    def record_reload(self, tasks):
+        """
+        Records reloaded tasks being swapped in
+        :param tasks: TaskSnapshot that was swapped in
+        """
+        self.record(RELOAD, 0, tasks.to_json())
+
+    def close(self):
+        self.file.close()
+
+
+def read_records(path):
+    """
+    Reads all the records of a log file
+    :param path: Path of the log file
+    :return: Generator of (timestamp, kind, seat, payload) tuples
+    :raises ValueError: If the file isn't a recording or was recorded in another version of the format
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < _file_header.size or data[:len(_magic)] != _magic:
+        raise ValueError(f"{path} isn't a session recording, or was recorded before recordings had a version")
+    _, file_version = _file_header.unpack_from(data)
+    if file_version != version:
+        raise ValueError(f"{path} was recorded in format version {file_version}, only version {version} can be read")
+    offset = _file_header.size
+    while offset + _header.size <= len(data):
+        timestamp, kind, seat, length = _header.unpack_from(data, offset)
+        offset += _header.size
+        payload = data[offset:offset + length].decode()
+        offset += length
+        yield timestamp, kind, seat, payload
@@ -0,0 +1,150 @@
+import argparse
+import queue
+import time
+from collections import deque
+from Player import Player
+from Recorder import read_records, SEED, JOIN, MESSAGE, DISCONNECT, STEP, RELOAD
+from Room import Room
+from TaskDatabase import TaskDatabase, TaskSnapshot
+
+"""
+Replays a session recorded by the server offline, without sockets and without waiting for clientside animations.
+Also works as a throughput benchmark of the phase logic on its own.
+Example: python Replay.py recordings/session_20240101_120000.rec --repeat 100
+"""
+
+
+class ReplaySeat:
+    """
+    Stands in for a client socket while replaying
+    """
+    def __init__(self, seat):
+        self.seat = seat
+
+    def __repr__(self):
+        return f"Seat{self.seat}"
+
+
+class ReplayComm:
+    """
+    Replacement of ServerComm with the same interface used by the phases, sent messages are only counted (and logged if
+    asked to)
+    """
+    def __init__(self, log_sent=False):
+        """
+        :param log_sent: Should sent messages be printed
+        """
+        self.msg_q = queue.Queue()    # Received messages queue
+        self.is_in_progress = False   # Is the game in progress
+        self.has_disconnect = False   # Updates when approved client disconnects
+        self.open_clients = {}        # Replay seats --> player object relating to them
+        self.seats = {}               # Seat number --> replay seat
+        self.log_sent = log_sent
+        self.frames_sent = 0          # Amount of frames that would have been sent
+
+    # === Applying recorded events ===
+    def join(self, seat, username):
+        sock = ReplaySeat(seat)
+        self.seats[seat] = sock
+        self.open_clients[sock] = Player("replay", b"", username, seat)
+
+    def receive(self, seat, msg):
+        self.msg_q.put((self.seats[seat], msg))
+
+    def disconnect(self, seat):
+        sock = self.seats.pop(seat)
+        if sock in self.open_clients:
+            del self.open_clients[sock]
+            self.has_disconnect = True
+
+    # === Same interface as ServerComm ===
+    def _sent(self, data, targets):
+        if type(data) == bytes:
+            data = data.decode()
+        self.frames_sent += len(targets)
+        if self.log_sent:
+            print(f"-> {targets}: {data}")
+
+    def send_all(self, data):
+        self._sent(data, list(self.open_clients.keys()))
+
+    def send_all_exl(self, data, exclude):
+        self._sent(data, [sock for sock in self.open_clients.keys() if sock is not exclude])
+
+    def send_one(self, data, target):
+        if target in self.open_clients:
+            self._sent(data, [target])
+
+    def send_one_encrypted(self, data, target):
+        self.send_one(data, target)
+
+    def send_all_exl_encrypted(self, data, exclude):
+        self.send_all_exl(data, exclude)
+
+    def report_if_empty(self):
+        pass  # There's no router in a replay
+
+    def seat_to_socket(self, seat):
+        try:
+            return self.seats.get(int(seat))
+        except (TypeError, ValueError):
+            return None
+
+
+def replay(records, task_db, log_sent=False):
+    """
+    Drives the phase logic through the recorded events as fast as possible, the room takes the recorded messages in
+    the same steps as when the session was recorded
+    :param records: List of records from read_records
+    :param task_db: Task database, must have the same tasks as when the session was recorded (until the first reload)
+    :param log_sent: Should sent messages be printed
+    :return: The ReplayComm used, for inspecting the results
+    """
+    seed = next((int(payload) for (_, kind, _, payload) in records if kind == SEED), None)
+    comm = ReplayComm(log_sent)
+    room = Room(comm, task_db, seed=seed, wait=lambda seconds: None)
+
+    pending = deque()  # Recorded messages no step took yet, (replay seat, message) tuples
+    for (_, kind, seat, payload) in records:
+        if kind == JOIN:
+            comm.join(seat, payload)
+        elif kind == MESSAGE:
+            pending.append((comm.seats[seat], payload))  # The sender may leave before a step takes the message
+        elif kind == DISCONNECT:
+            comm.disconnect(seat)
+        elif kind == STEP:
+            # Queuing the messages the recorded step took and nothing more
+            for _ in range(int(payload)):
+                comm.msg_q.put(pending.popleft())
+            room.step()
+        elif kind == RELOAD:
+            room.reload_tasks(TaskSnapshot.from_json(payload))  # Swapped in by the next step, the room is in the lobby
+    return comm
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replays a recorded server session offline")
+    parser.add_argument("path", help="Path of the recorded session")
+    parser.add_argument("--task-db", default="task_database", help="Name of the task database the session used")
+    parser.add_argument("--repeat", type=int, default=1, help="Times to replay, for benchmarking")
+    parser.add_argument("--verbose", action="store_true", help="Print every message the server would have sent")
+    args = parser.parse_args()
+
+    try:
+        records = list(read_records(args.path))
+    except ValueError as e:
+        parser.error(str(e))
+    task_db = TaskDatabase(args.task_db).snapshot()
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        comm = replay(records, task_db, args.verbose)
+    elapsed = time.perf_counter() - start
+
+    events = len(records) * args.repeat
+    print(f"Replayed {len(records)} records {args.repeat} times in {elapsed:.3f}s "
+          f"({events / elapsed:.0f} records/s), {comm.frames_sent} frames sent per replay")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import argparse
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import closing
+from Metrics import metrics
+
+"""
+=== Game results store ===
+Persistent history of finished games in SQLite - the rounds of every game with their faker and votes, and the final
+scores of every player. Games are written by a background thread that batches them into transactions so the game loop
+never waits for the disk. Every player's totals are kept up to date in their own table, so the leaderboard is an index
+read however many games were played.
+Several shards can share the same file, the database runs in WAL mode and writers wait for each other.
+Example: python ResultsStore.py --top 10
+"""
+
+# Result of a single round, votes is a list of (task number, voter seat, voted seat) tuples
+RoundResult = namedtuple("RoundResult", ("category", "faker_seat", "faker_name", "caught", "tasks", "votes"))
+# Final score of a player in a game
+PlayerResult = namedtuple("PlayerResult", ("seat", "username", "faker_points", "detective_points"))
+
+_schema = (
+    """CREATE TABLE IF NOT EXISTS games (id INTEGER PRIMARY KEY, started REAL NOT NULL, ended REAL NOT NULL,
+    seed INTEGER, rounds INTEGER NOT NULL, players INTEGER NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS rounds (game_id INTEGER NOT NULL, round INTEGER NOT NULL, category TEXT NOT NULL,
+    faker_seat INTEGER NOT NULL, faker_name TEXT NOT NULL, caught INTEGER NOT NULL, tasks INTEGER NOT NULL,
+    PRIMARY KEY (game_id, round)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS votes (game_id INTEGER NOT NULL, round INTEGER NOT NULL, task INTEGER NOT NULL,
+    voter_seat INTEGER NOT NULL, voted_seat INTEGER NOT NULL,
+    PRIMARY KEY (game_id, round, task, voter_seat)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS game_players (game_id INTEGER NOT NULL, seat INTEGER NOT NULL,
+    username TEXT NOT NULL, faker_points INTEGER NOT NULL, detective_points INTEGER NOT NULL,
+    points INTEGER NOT NULL, PRIMARY KEY (game_id, seat)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS player_totals (username TEXT PRIMARY KEY, games INTEGER NOT NULL,
+    faker_points INTEGER NOT NULL, detective_points INTEGER NOT NULL, points INTEGER NOT NULL)""",
+    # Leaderboard, read in order straight from the index
+    "CREATE INDEX IF NOT EXISTS player_totals_points ON player_totals (points DESC, username)",
+    # History of a player, newest games first
+    "CREATE INDEX IF NOT EXISTS game_players_username ON game_players (username, game_id)",
+)
+
+# Adds a finished game to the totals of a player
+_add_to_totals = """INSERT INTO player_totals (username, games, faker_points, detective_points, points)
+VALUES (?, 1, ?, ?, ?) ON CONFLICT (username) DO UPDATE SET games = games + 1,
+faker_points = faker_points + excluded.faker_points, detective_points = detective_points + excluded.detective_points,
+points = points + excluded.points"""
+
+
+def _connect(path):
+    """
+    Opens a connection to the results database
+    :param path: Path of the database file
+    """
+    conn = sqlite3.connect(path, timeout=30)  # Waiting for other shards writing to the same file
+    conn.execute("PRAGMA journal_mode=WAL")   # Readers don't block the writer and the other way around
+    conn.execute("PRAGMA synchronous=NORMAL")  # Syncing on checkpoints instead of every transaction
+    return conn
+
+
+class ResultsStore:
+    """
+    Writes finished games to the results database on a background thread
+    """
+    def __init__(self, path, batch_size=64):
+        """
+        :param path: Path of the database file, created if it doesn't exist
+        :param batch_size: Max amount of games written in a single transaction
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._queue = queue.Queue()  # Games waiting to be written, None stops the writer
+
+        # Creating the tables once on startup, the writer thread opens its own connection
+        with closing(_connect(path)) as conn, conn:
+            for sql in _schema:
+                conn.execute(sql)
+
+        metrics.set_gauge("results_queue_depth", self._queue.qsize)
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def record_game(self, started, rounds, players, seed=None):
+        """
+        Queues a finished game for writing, doesn't block
+        :param started: Time the game started (time.time())
+        :param rounds: List of RoundResult, in the order they were played
+        :param players: List of PlayerResult of the players that finished the game
+        :param seed: Seed of the room's random generator
+        """
+        self._queue.put((started, time.time(), seed, rounds, players))
+
+    def close(self):
+        """
+        Writes the games that are still queued and stops the writer thread
+        """
+        self._queue.put(None)
+        self._thread.join()
+
+    def _write_loop(self):
+        """
+        Main loop of the writer thread, writes every game queued while the previous batch was written in one transaction
+        """
+        conn = _connect(self.path)
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [game for game in batch if game is not None]
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                with conn:  # A single transaction, committed at the end or rolled back on errors
+                    for game in batch:
+                        self._insert_game(conn, *game)
+            except sqlite3.Error as e:
+                print("Results store", str(e))
+                metrics.inc("results_write_errors")
+            else:
+                metrics.inc("games_recorded", amount=len(batch))
+                metrics.observe("results_write", time.perf_counter() - start)
+        conn.close()
+
+    @staticmethod
+    def _insert_game(conn, started, ended, seed, rounds, players):
+        """
+        Internal method, inserts a game and updates the totals of its players, must run inside a transaction
+        """
+        game_id = conn.execute("INSERT INTO games (started, ended, seed, rounds, players) VALUES (?, ?, ?, ?, ?)",
+                               (started, ended, seed, len(rounds), len(players))).lastrowid
+        conn.executemany("INSERT INTO rounds VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         ((game_id, number, r.category, r.faker_seat, r.faker_name, r.caught, r.tasks)
+                          for number, r in enumerate(rounds, 1)))
+        conn.executemany("INSERT OR REPLACE INTO votes VALUES (?, ?, ?, ?, ?)",
+                         ((game_id, number, task, voter, voted)
+                          for number, r in enumerate(rounds, 1) for task, voter, voted in r.votes))
+        conn.executemany("INSERT INTO game_players VALUES (?, ?, ?, ?, ?, ?)",
+                         ((game_id, p.seat, p.username, p.faker_points, p.detective_points,
+                           p.faker_points + p.detective_points) for p in players))
+        conn.executemany(_add_to_totals,
+                         ((p.username, p.faker_points, p.detective_points, p.faker_points + p.detective_points)
+                          for p in players))
+
+
+# === Queries, they open their own connection so they can run from anywhere ===
+def leaderboard(path, limit=10):
+    """
+    Players with the most points over all their games
+    :param path: Path of the database file
+    :param limit: Amount of players
+    :return: List of (username, points, games, faker points, detective points) tuples, best first
+    """
+    with closing(_connect(path)) as conn:
+        return conn.execute("SELECT username, points, games, faker_points, detective_points FROM player_totals "
+                            "ORDER BY points DESC, username LIMIT ?", (limit,)).fetchall()
+
+
+def player_history(path, username, limit=20):
+    """
+    Last games of a player
+    :param path: Path of the database file
+    :param username: Username of the player
+    :param limit: Amount of games
+    :return: List of (game id, ended, seat, faker points, detective points, points) tuples, newest first
+    """
+    with closing(_connect(path)) as conn:
+        return conn.execute("SELECT g.id, g.ended, p.seat, p.faker_points, p.detective_points, p.points "
+                            "FROM game_players p JOIN games g ON g.id = p.game_id "
+                            "WHERE p.username = ? ORDER BY p.game_id DESC LIMIT ?", (username, limit)).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shows the leaderboard and player histories of the results database")
+    parser.add_argument("--db", default="game_results.db", help="Path of the results database")
+    parser.add_argument("--top", type=int, default=10, help="Amount of players on the leaderboard")
+    parser.add_argument("--player", default=None, help="Show the last games of this player instead")
+    args = parser.parse_args()
+
+    if args.player is not None:
+        for game_id, ended, seat, faker_points, detective_points, points in player_history(args.db, args.player):
+            print(f"Game {game_id} ({time.strftime('%Y-%m-%d %H:%M', time.localtime(ended))}) - seat {seat}, "
+                  f"{points} points ({faker_points} faker, {detective_points} detective)")
+    else:
+        for place, (username, points, games, faker_points, detective_points) in enumerate(leaderboard(args.db, args.top), 1):
+            print(f"{place}. {username} - {points} points in {games} games "
+                  f"({faker_points} faker, {detective_points} detective)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import queue
+import random
+import time
+import Phases
+from GameFlow import State, AllReady, CategoryChosen, RoundOver, GameOver, ResultsShown, NotEnoughPlayers
+from Metrics import metrics
+from ResultsStore import PlayerResult
+from Standings import Standings
+
+
+class Room:
+    """
+    A single game room, owns the phases and the random generator of the game and runs the main server loop step
+    """
+    def __init__(self, server_comm, task_db, max_rounds=5, seed=None, wait=time.sleep, results_store=None,
+                 recorder=None):
+        """
+        :param server_comm: Server communication object (or any object with the same interface)
+        :param task_db: Task database to draw tasks from
+        :param max_rounds: Max amount of round in each game
+        :param seed: Seed for the room's random generator, a random one is picked if None
+        :param wait: Function used by the phases to wait for clientside animations
+        :param results_store: ResultsStore finished games are saved to, games aren't saved if None
+        :param recorder: Recorder the steps and task reloads get recorded into, for replaying the session. None to not
+                         record them
+        """
+        self.server_comm = server_comm
+        self.max_rounds = max_rounds
+        # Every random choice in the room comes from this generator so a recorded session can be replayed
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.events = queue.Queue()  # Queue of game flow events sent by the phases
+        self.rounds_played = 0       # Rounds played in the current game
+        self.draining = False        # Set when the server is shutting down, no new games are started
+        self.results_store = results_store
+        self.recorder = recorder
+        self.game_started = None     # Time the current game started
+        self.standings = Standings()  # Best players of the current game, shared by the round and final phases
+        self.tasks = task_db  # Latest tasks, swapped into the round phase between games
+
+        # Creating phases
+        # Connecting and lobby phase
+        self.connecting_and_lobby = Phases.ConnectingAndLobby(server_comm, self.events, self.rng, wait)
+        # Choosing category phase
+        self.choose_category = Phases.ChooseCategory(server_comm, self.events, self.rng, wait)
+        # Main phase - Tasks, Voting, and round results
+        self.game_round = Phases.Round(server_comm, self.events, task_db, self.standings, self.rng, wait)
+        # Final phase, final game results
+        self.final_screen = Phases.FinalScreen(server_comm, self.events, self.standings, self.rng, wait)
+        # State --> phase processing the messages in it
+        self.phases = {
+            State.LOBBY: self.connecting_and_lobby,
+            State.CHOOSING_CATEGORY: self.choose_category,
+            State.ROUND: self.game_round,
+            State.FINAL_RESULTS: self.final_screen,
+        }
+
+        # Starting in the connecting and lobby phase, cur_phase points at the phase of the current state
+        self.state = State.LOBBY
+        self.cur_phase = self.phases[self.state]
+
+    def step(self):
+        """
+        Runs one iteration of the main server loop, processes messages, disconnects and game flow events
+        """
+        # Swapping in reloaded tasks while no game runs, so a game never mixes tasks of two reloads
+        tasks = self.tasks
+        if tasks is not self.game_round.task_source and self.state == State.LOBBY:
+            self.game_round.task_source = tasks
+            if self.recorder is not None:
+                self.recorder.record_reload(tasks)
+
+        phase = self.cur_phase
+        taken = phase.taken
+        phase.process_queue()  # Processing the waiting messages queue
+        taken = phase.taken - taken
+
+        # If a socket has disconnected
+        disconnected = self.server_comm.has_disconnect
+        if disconnected:
+            self.server_comm.has_disconnect = False
+            # Calling the current phases' on disconnect method
+            self.cur_phase.on_disconnect()
+
+        # Looping through events sent by phases
+        while not self.events.empty():
+            event = self.events.get()
+            transition_start = time.perf_counter()  # Measuring how long the phase transition takes
+            self.handle_event(event)
+            metrics.observe("phase_transition", time.perf_counter() - transition_start, type(event).__name__)
+
+        # Steps that took nothing change nothing, only the others are recorded so a replay takes the same batches
+        if self.recorder is not None and (taken or disconnected):
+            self.recorder.record_step(taken)
+
+    def drain(self):
+        """
+        Lets the running game finish but doesn't start another one, for shutting the server down
+        """
+        self.draining = True
+
+    def is_idle(self):
+        """
+        Returns True if the room is in the lobby, so the server can shut down without cutting a game off
+        """
+        return self.state == State.LOBBY
+
+    def reload_tasks(self, tasks):
+        """
+        Sets new tasks to draw from, they're swapped in once the running game is over. Can be called from any thread
+        :param tasks: TaskSnapshot to draw from
+        :raises ValueError: If a category has no tasks, the room keeps its tasks
+        """
+        empty = tasks.empty_categories()
+        if empty:
+            raise ValueError(f"No tasks in {', '.join(empty)}")
+        self.tasks = tasks  # A single assignment, the main loop never sees a half swapped pool
+
+    def handle_event(self, event):
+        """
+        Moves the room to the next state according to the transition table and runs the transition's action. Events
+        without a transition from the current state are stale (for example a category chosen right as a player left)
+        and are ignored
+        :param event: Game flow event sent by a phase
+        """
+        transition = transitions.get((self.state, type(event)))
+        if self.draining and self.state == State.LOBBY:
+            transition = None  # Server is shutting down, not starting another game
+        if transition is None:
+            metrics.inc("ignored_events", type(event).__name__)
+            return
+        self.state, action = transition
+        self.cur_phase = self.phases[self.state]
+        action(self, event)
+
+    # === Transition actions ===
+    def _back_to_lobby(self, event):
+        self.server_comm.send_all("Q")           # Telling all player to quit to lobby
+        self.server_comm.is_in_progress = False  # Updating the server comm to allow new player for approval
+        self.server_comm.report_if_empty()       # Everyone may have left during the game
+        self.game_round.reset_chosen_ids()       # Resetting chosen ids of tasks
+        self.rounds_played = 0
+        self.game_round.reset_history()
+        self.standings.reset()
+        self.connecting_and_lobby.reset_players()
+
+    def _start_game(self, event):
+        self.server_comm.is_in_progress = True  # Blocking new players from joining
+        self.game_started = time.time()
+        self._next_round(event)
+
+    def _next_round(self, event):
+        # Checking if game has ended, a game has a round per player up to max rounds
+        if self.rounds_played == min(len(self.server_comm.open_clients), self.max_rounds):
+            self.events.put(GameOver())
+        else:
+            self.choose_category.start_phase()
+            self.rounds_played += 1
+
+    def _start_round(self, event):
+        self.game_round.start_round(event.category)
+
+    def _show_final_results(self, event):
+        self._save_game()  # Before the results are shown, players leaving while they're shown still count
+        self.final_screen.broadcast_final_results()
+
+    def _save_game(self):
+        """
+        Queues the finished game for the results store, writing it happens on the store's thread
+        """
+        if self.results_store is None:
+            return
+        players = [PlayerResult(player.seat, player.username, player.faker_points, player.detective_points)
+                   for player in self.server_comm.open_clients.values()]
+        self.results_store.record_game(self.game_started, self.game_round.history, players, self.seed)
+
+
+# (State, event type) --> (next state, action running on the transition)
+transitions = {
+    (State.LOBBY, AllReady): (State.CHOOSING_CATEGORY, Room._start_game),
+    (State.CHOOSING_CATEGORY, CategoryChosen): (State.ROUND, Room._start_round),
+    (State.CHOOSING_CATEGORY, GameOver): (State.FINAL_RESULTS, Room._show_final_results),
+    (State.ROUND, RoundOver): (State.CHOOSING_CATEGORY, Room._next_round),
+    (State.FINAL_RESULTS, ResultsShown): (State.LOBBY, Room._back_to_lobby),
+    (State.CHOOSING_CATEGORY, NotEnoughPlayers): (State.LOBBY, Room._back_to_lobby),
+    (State.ROUND, NotEnoughPlayers): (State.LOBBY, Room._back_to_lobby),
+}
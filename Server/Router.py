@@ -0,0 +1,284 @@
+import argparse
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+from Metrics import metrics
+from KeyComm import RSA_encrypt, gen_AES_key
+from Timeouts import TimingWheel
+
+"""
+=== Connection router ===
+Front door of the sharded server. A single Server.py runs the communication, encryption and phase logic of its game on
+one core, so the router starts one Server.py shard process per core and gives each room a shard of its own.
+The router trades keys with each client like ServerComm does, reads the room code from the client's first message and
+hands the socket over to the shard hosting that room by passing its file descriptor over a unix socket (Linux only).
+After that the client talks to the shard directly and the router is out of the way.
+Each shard hosts a single room, clients opening a new room while every shard is taken are turned away. A shard tells
+the router when everyone left its room and the shard is free for the next room.
+Example: python Router.py --shards 4
+"""
+
+handshake_timeout = 10  # For trading keys and sending the room code after connecting, same as ServerComm
+public_key_len = 271    # Length of the client's RSA public key
+rooms_taken = b"NAll rooms are taken, please try again later"  # Shown to clients opening a room while shards are full
+
+
+class Router:
+    """
+    Accepts connections, trades keys and hands each connection over to the shard of its room. Reads are non-blocking
+    and buffered so a slow client never holds up the others, and clients that don't finish in time are dropped
+    """
+    def __init__(self, port, shard_socks):
+        """
+        :param port: Port to accept connections on
+        :param shard_socks: List of unix sockets connected to the shards, one per shard
+        """
+        self.port = port
+        self.shard_socks = shard_socks
+        self.rooms = {}                               # Room code --> index of the shard hosting it
+        self.shard_rooms = [None] * len(shard_socks)  # Shard --> room code it hosts, None if it's free
+        self.handed_over = [0] * len(shard_socks)     # Shard --> amount of connections handed over to it
+        self.dead_shards = set()                      # Shards whose process is gone
+        self.waiting_for_key = {}   # Sockets waiting for key trading --> ip and the bytes of the public key so far
+        self.waiting_for_room = {}  # Sockets waiting for their first message --> ip, AES key and the frame so far
+        self.timeouts = TimingWheel()  # Handshake timer of each connection
+        self.socket = None
+
+        metrics.set_gauge("routed_rooms", lambda: len(self.rooms))
+        metrics.set_gauge("handshaking_connections", lambda: len(self.waiting_for_key) + len(self.waiting_for_room))
+
+    def run(self):
+        """
+        Runs the routing loop forever
+        """
+        self.socket = socket.socket()
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind(("0.0.0.0", self.port))
+        self.socket.listen(128)
+
+        while True:
+            shards = [sock for shard, sock in enumerate(self.shard_socks) if shard not in self.dead_shards]
+            rlist, _, _ = select.select([self.socket] + shards + list(self.waiting_for_key) +
+                                        list(self.waiting_for_room), [], [],
+                                        self.timeouts.tick if len(self.timeouts) else None)
+            for current_socket in rlist:
+                if current_socket is self.socket:
+                    new_client, addr = self.socket.accept()
+                    new_client.setblocking(False)  # Reading whatever arrived, never waiting for the rest
+                    self.waiting_for_key[new_client] = (addr[0], bytearray())
+                    self.timeouts.schedule(new_client, "handshake", handshake_timeout)
+                    metrics.inc("connections_accepted")
+
+                elif current_socket in self.waiting_for_key:
+                    self._read_key(current_socket)
+
+                elif current_socket in self.waiting_for_room:
+                    self._read_room(current_socket)
+
+                else:
+                    self._read_shard(self.shard_socks.index(current_socket))
+
+            for sock, _ in self.timeouts.advance():
+                print("Router - handshake timed out")
+                metrics.inc("timeouts", "handshake")
+                self._drop(sock)
+
+    def _recv_some(self, sock, buffer, size):
+        """
+        Reads into a buffer until it has size bytes, never reading past them since the rest belongs to the shard
+        :param sock: Non-blocking socket to read from
+        :param buffer: Bytearray of what was read so far
+        :param size: Amount of bytes wanted in the buffer
+        :return: True if the buffer has size bytes, False if they didn't all arrive yet
+        :raises OSError: If the client disconnected or receiving failed
+        """
+        try:
+            data = sock.recv(size - len(buffer))
+        except BlockingIOError:
+            return False
+        if not data:
+            raise ConnectionResetError("Client disconnected")
+        buffer += data
+        return len(buffer) == size
+
+    def _read_key(self, sock):
+        """
+        Reads the client's public key and trades keys once it's all there, same as ServerComm
+        """
+        ip, public_key = self.waiting_for_key[sock]
+        try:
+            if not self._recv_some(sock, public_key, public_key_len):
+                return
+            AES_key = gen_AES_key()
+            sock.send(RSA_encrypt(AES_key, bytes(public_key)))  # Small enough for an empty socket buffer
+        except Exception as e:
+            print("Router - key trading", str(e))
+            self._drop(sock)
+        else:
+            del self.waiting_for_key[sock]
+            self.waiting_for_room[sock] = (ip, AES_key, bytearray())
+
+    def _read_room(self, sock):
+        """
+        Reads the client's first frame, 2 digits of length followed by the message, and routes the client once it's
+        all there
+        """
+        ip, AES_key, buffer = self.waiting_for_room[sock]
+        try:
+            if len(buffer) < 2 and not self._recv_some(sock, buffer, 2):
+                return
+            if not buffer[:2].isdigit():
+                raise ValueError(f"Invalid frame length {bytes(buffer[:2])!r}")
+            size = 2 + int(buffer[:2])
+            if len(buffer) < size and not self._recv_some(sock, buffer, size):
+                return
+            msg = buffer[2:].decode()
+        except (OSError, ValueError):
+            self._drop(sock)
+            return
+        del self.waiting_for_room[sock]
+        self.timeouts.cancel(sock)
+        self._route(sock, ip, AES_key, msg)
+
+    def _route(self, sock, ip, AES_key, msg):
+        """
+        Hands a client over to the shard of its room, or turns it away if its room is new and every shard is taken
+        :param sock: Socket of the client, after key trading
+        :param ip: Ip of the client
+        :param AES_key: AES key traded with the client
+        :param msg: First message of the client
+        """
+        if msg[:1] == "M":
+            room, msg = msg[1:], ""  # Room code, the shard doesn't need it
+        else:
+            room = ""  # Clients that don't send a room code play in the default room, the message goes to the shard
+
+        sock.setblocking(True)  # For turning the client away below, the shard sets the socket's flags it needs itself
+        shard = self.rooms.get(room)
+        if shard is None:
+            # New room, giving it a free shard
+            free = [index for index, hosted in enumerate(self.shard_rooms)
+                    if hosted is None and index not in self.dead_shards]
+            if not free:
+                print("Router - every shard is taken, turning a new room away")
+                metrics.inc("rooms_refused")
+                try:
+                    sock.sendall(str(len(rooms_taken)).zfill(2).encode() + rooms_taken)
+                except OSError:
+                    pass
+                sock.close()
+                return
+            shard = free[0]
+            self.rooms[room] = shard
+            self.shard_rooms[shard] = room
+            metrics.inc("rooms_opened")
+
+        try:
+            # The shard gets the client's ip, the AES key we traded and the message read past the room code
+            socket.send_fds(self.shard_socks[shard], [f"{ip}&{AES_key.hex()}&{msg}".encode()], [sock.fileno()])
+        except OSError as e:
+            print(f"Router - handing over to shard {shard}", str(e))
+        else:
+            self.handed_over[shard] += 1
+            metrics.inc("connections_routed", str(shard))
+        sock.close()  # The shard has its own copy of the socket now
+
+    def _read_shard(self, shard):
+        """
+        Reads a report from a shard. "E<count>" - The shard's room is empty after count connections were handed over
+        to it. The room is only closed if no connection was handed over since, otherwise it isn't empty anymore
+        :param shard: Index of the shard
+        """
+        try:
+            data = self.shard_socks[shard].recv(64).decode()
+        except OSError:
+            data = ""
+        if not data:
+            print(f"Router - shard {shard} is gone")
+            self.dead_shards.add(shard)
+            self._close_room(shard)
+        elif data[:1] == "E" and int(data[1:]) == self.handed_over[shard]:
+            self._close_room(shard)
+
+    def _close_room(self, shard):
+        """
+        Frees a shard for the next new room
+        """
+        room = self.shard_rooms[shard]
+        if room is not None:
+            del self.rooms[room]
+            self.shard_rooms[shard] = None
+            metrics.inc("rooms_closed")
+
+    def _drop(self, sock):
+        """
+        Closes a connection that didn't finish its handshake
+        """
+        self.waiting_for_key.pop(sock, None)
+        self.waiting_for_room.pop(sock, None)
+        self.timeouts.cancel(sock)
+        sock.close()
+
+
+def start_shards(count, metrics_port):
+    """
+    Starts the shard processes
+    :param count: Amount of shards
+    :param metrics_port: Metrics port of the router, shard i serves its metrics on metrics_port + 1 + i
+    :return: List of (process, unix socket connected to it) tuples
+    """
+    shards = []
+    server_dir = os.path.dirname(os.path.abspath(__file__))
+    for i in range(count):
+        # Sequenced packets keep every handed over connection in a message of its own
+        router_sock, shard_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        process = subprocess.Popen([sys.executable, "Server.py", "--shard", str(i),
+                                    "--handoff-fd", str(shard_sock.fileno()),
+                                    "--metrics-port", str(metrics_port + 1 + i)],
+                                   cwd=server_dir, pass_fds=[shard_sock.fileno()],
+                                   start_new_session=True)  # Ctrl+C in the terminal only reaches the router
+        shard_sock.close()  # Only the shard uses its end
+        shards.append((process, router_sock))
+    return shards
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Front door router of the sharded Fakin' It server")
+    parser.add_argument("--port", type=int, default=7878, help="Port to accept connections on")
+    parser.add_argument("--shards", type=int, default=os.cpu_count(), help="Amount of shard processes, one per core")
+    parser.add_argument("--metrics-port", type=int, default=9178, help="Local port to serve the router's metrics on")
+    args = parser.parse_args()
+
+    shards = start_shards(args.shards, args.metrics_port)
+    metrics.start_http_server(args.metrics_port)
+    print(f"Routing port {args.port} to {args.shards} shards")
+    router = Router(args.port, [sock for _, sock in shards])
+    signal.signal(signal.SIGTERM, _raise_interrupt)  # Shutting down the same way on SIGTERM as on Ctrl+C
+    try:
+        router.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if router.socket is not None:
+            router.socket.close()  # Not accepting anymore
+        # Each shard finishes its running game and shuts down, stopping again stops them right away
+        print("Waiting for the shards to finish their games, stop again to stop them right away")
+        for process, _ in shards:
+            process.terminate()
+        try:
+            for process, _ in shards:
+                process.wait()
+        except KeyboardInterrupt:
+            for process, _ in shards:
+                process.kill()
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+if __name__ == "__main__":
+    main()
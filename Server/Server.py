@@ -1,84 +1,104 @@
 from Servercom import ServerComm
 from TaskDatabase import TaskDatabase
-import queue
-import Phases
+from Metrics import metrics
+from Recorder import Recorder
+from Room import Room
+from RateLimit import FairQueue
+from ResultsStore import ResultsStore
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
 
+record_sessions = True  # Should inbound frames be recorded for replaying with Replay.py
+store_results = True    # Should finished games be saved to the results database
+max_rounds = 5  # Max amount of round in each game
 
-msg_q = queue.Queue()  # Message queue of message sent from client. Format: Tuple - (socket sent from, msg)
-server_comm = ServerComm(7878, msg_q)  # Server communication object
+# Running on its own by default, Router.py starts shards with the socket it hands connections over through
+parser = argparse.ArgumentParser(description="Fakin' It game server")
+parser.add_argument("--port", type=int, default=7878, help="Port to listen on when not running as a shard")
+parser.add_argument("--metrics-port", type=int, default=9178, help="Local port to serve metrics on")
+parser.add_argument("--shard", type=int, default=None, help="Index of this shard, given by Router.py")
+parser.add_argument("--handoff-fd", type=int, default=None, help="File descriptor of the router's handoff socket")
+args = parser.parse_args()
 
-instruct_q = queue.Queue()  # Queue of instruction sent by phases to main server program
+# Recording the session into the recordings folder
+recorder = None
+if record_sessions:
+    os.makedirs("recordings", exist_ok=True)
+    shard_suffix = f"_shard{args.shard}" if args.shard is not None else ""
+    recorder = Recorder(os.path.join("recordings", time.strftime("session_%Y%m%d_%H%M%S") + shard_suffix + ".rec"))
 
-# Connecting to the task database
-task_db = TaskDatabase("task_database")
+handoff = socket.socket(fileno=args.handoff_fd) if args.handoff_fd is not None else None
+msg_q = FairQueue()  # Bounded message queue of message sent from client. Format: Tuple - (socket sent from, msg)
+server_comm = ServerComm(args.port, msg_q, recorder, handoff)  # Server communication object
+metrics.start_http_server(args.metrics_port)  # Serving metrics locally at http://127.0.0.1:<metrics port>/metrics
 
-max_rounds = 5  # Max amount of round in each game
+# Loading the tasks from the task database
+task_db_name = "task_database"
+tasks = TaskDatabase(task_db_name).snapshot()
+
+# Saving finished games into the results database, shards share the same file
+results_store = ResultsStore("game_results.db") if store_results else None
+
+# The game room, holds the phases
+room = Room(server_comm, tasks, max_rounds, results_store=results_store, recorder=recorder)
+if recorder is not None:
+    recorder.record_seed(room.seed)
+
+
+# === Signals ===
+def on_stop(signum, frame):
+    """
+    SIGINT / SIGTERM - Stops accepting connections and lets the running game finish before shutting down, a second
+    signal shuts down right away
+    """
+    if room.draining:
+        raise KeyboardInterrupt
+    print("Shutting down after the running game, stop again to shut down right away")
+    room.drain()
+    server_comm.stop_accepting()
+
+
+def reload_tasks():
+    """
+    Loads the tasks into a new snapshot and swaps it in, on its own thread so the game doesn't wait for the database
+    """
+    start = time.perf_counter()
+    new_tasks = TaskDatabase(task_db_name).snapshot()  # Own connection, sqlite connections can't be shared by threads
+    try:
+        room.reload_tasks(new_tasks)
+    except ValueError as e:
+        print(f"Not reloading the tasks - {e}")
+        return
+    metrics.observe("task_reload", time.perf_counter() - start)
+    print(f"Reloaded {new_tasks.count()} tasks, used from the next game on")
+
+
+def on_reload(signum, frame):
+    """
+    SIGHUP - Reloads the tasks, a running game keeps its tasks
+    """
+    threading.Thread(target=reload_tasks, daemon=True).start()
+
+
+signal.signal(signal.SIGINT, on_stop)
+signal.signal(signal.SIGTERM, on_stop)
+if hasattr(signal, "SIGHUP"):  # There's no SIGHUP on Windows
+    signal.signal(signal.SIGHUP, on_reload)
 
-# Creating phases
-ConnectingAndLobby = Phases.ConnectingAndLobby(server_comm, instruct_q)  # Connecting and lobby phase
-ChooseCategory = Phases.ChooseCategory(server_comm, instruct_q)          # Choosing category phase
-GameRound = Phases.Round(server_comm, instruct_q, task_db)               # Main phase - Tasks, Voting, and round results
-FinalScreen = Phases.FinalScreen(server_comm, instruct_q)                # Final phase, final game results
-
-# cur_phase will point at the current active phase
-# Setting the initial phase to the connecting and lobby phase
-cur_phase = ConnectingAndLobby
-
-# Main server loop
-running = True
-while running:
-    cur_phase.process_queue()  # Processing the waiting messages queue
-
-    # If a socket has disconnected
-    if server_comm.has_disconnect:
-        server_comm.has_disconnect = False
-        # Calling the current phases' on disconnect method
-        cur_phase.on_disconnect()
-
-    # Looping through instructions sent by phases
-    while not instruct_q.empty():
-        instruction = instruct_q.get()
-
-        if instruction == "BACK TO LOBBY":  # Back to lobby instruction
-            server_comm.send_all("Q")           # Telling all player to quit to lobby
-            server_comm.is_in_progress = False  # Updating the server comm to allow new player for approval
-            cur_phase = ConnectingAndLobby      # Changing phase to lobby phase
-            GameRound.reset_chosen_ids()        # Resetting chosen ids of tasks
-            Phases.num_game_rounds = 0
-            # Resetting each player parameters
-            for player in server_comm.open_clients.values():
-                player.ready = False
-                player.chose_category = False
-                player.detective_points = 0
-                player.faker_points = 0
-
-        elif instruction == "START NEW ROUND":  # Start new game round instruction --> means choose category
-            server_comm.is_in_progress = True  # Blocking new players from joining
-            # Checking if game has ended (max rounds for a game is 5)
-            if Phases.num_game_rounds == min(len(server_comm.open_clients), max_rounds):
-                # Game ended
-                cur_phase = FinalScreen  # Setting the phase to be the final results
-                cur_phase.broadcast_final_results()  # Broadcasting final results to all players
-
-            else:
-                # Setting up choose category phase
-                cur_phase = ChooseCategory
-                cur_phase.start_phase()
-                Phases.num_game_rounds += 1  # Incrementing game rounds counter
-
-        elif instruction.startswith("ROUND"):  # Category was chosen, start a game round
-            round_type = instruction[-1]  # Type of round
-            cur_phase = GameRound
-            cur_phase.choose_faker()    # Choosing random player to be the faker
-            cur_phase.task_counter = 0  # Counts the number of tasks that were played
-            # Category type is first letter of round Type
-            # P --> Point round, R --> Raise round, N --> Number round
-            cur_phase.cur_category = round_type
-            cur_phase.reset_round_points()  # Resetting round points
-
-            if round_type == "P":
-                cur_phase.start_round_point()   # Starting the round
-            elif round_type == "R":
-                cur_phase.start_round_raise()   # Starting the round
-            elif round_type == "N":
-                cur_phase.start_round_number()  # Starting the round
+# Main server loop, runs until shutting down and no game is running
+try:
+    running = True
+    while running:
+        room.step()
+        running = not (room.draining and room.is_idle())
+except KeyboardInterrupt:
+    print("Shutting down right away")
+finally:
+    server_comm.close()
+    if results_store is not None:
+        results_store.close()  # Writing the games that are still queued
+print("Server stopped")
@@ -1,22 +1,60 @@
 import select
 import socket
 import threading
+import time
 from Player import Player
+from Metrics import metrics
+from Spectators import SpectatorHub
+from RateLimit import ConnectionLimiter
+from Timeouts import TimingWheel
+from Recorder import JOIN, MESSAGE, DISCONNECT
 from KeyComm import RSA_encrypt, gen_AES_key, AESCipher
 
 
+# === Timeouts, in seconds ===
+handshake_timeout = 10  # For trading keys after connecting
+username_timeout = 300  # For getting a username approved after trading keys, a person is typing it
+idle_timeout = 15       # Of not hearing from a player before pinging it
+ping_timeout = 10       # For answering a ping
+
+public_key_len = 271  # Length of the client's RSA public key
+recv_size = 4096      # Max amount of bytes read from a client at once
+
+PING = "H"  # Heartbeat, sent to idle players and answered with the same message
+_ping_bytes = PING.encode()
+room_codes = frozenset("RCAV")  # Codes of the messages players send to the room, others are counted as "other"
+username_separators = ("&", ":")  # Separators of the player list protocol, not allowed in usernames
+
+
+def frame(data: bytes):
+    """
+    Frames a message for sending to a client, 2 digits of length followed by the message. Messages too long for 2
+    digits get a long message heads up followed by 4 digits of length instead
+    :param data: Message to frame (Bytes)
+    :return: Framed message (Bytes)
+    """
+    if len(data) < 100:
+        return str(len(data)).zfill(2).encode() + data
+    return b"04!LNG" + str(len(data)).zfill(4).encode() + data
+
+
 class ServerComm:
     """
     class to represent server communication
     """
-    def __init__(self, server_port, msg_q):
+    def __init__(self, server_port, msg_q, recorder=None, handoff=None):
         """
         Initializes the client communication object
         :param server_port: port that server will run on
-        :param msg_q: Queue that server will put all received messages into
+        :param msg_q: FairQueue that server will put all received messages into
+        :param recorder: Optional Recorder that every inbound frame of approved players gets recorded into
+        :param handoff: Unix socket the router hands over connections through, for running as a shard of Router.py.
+                        If given the server doesn't listen on a port of its own
         """
         self.socket = None              # Server socket
         self.port = server_port         # Server port
+        self.handoff = handoff          # Socket of connections handed over by the router, None if not sharded
+        self._handoffs = 0              # Connections the router handed over, sent back when the room is empty
         self.msg_q = msg_q              # Received messages queue
         self.is_in_progress = False     # Is the game in progress
         self.has_disconnect = False     # Updates when approved client disconnects
@@ -24,24 +62,55 @@ class ServerComm:
         self.waiting_for_key = {}       # Sockets waiting for key trading --> ip
         self.waiting_for_name = {}      # sockets waiting for name verification --> ip and AES key
         self.AES_cipher = AESCipher(0)  # AES Cipher object
-        threading.Thread(target=self._main_loop).start()  # Starting the main receiving thread
+        self._connect_times = {}        # Sockets in the handshake --> time they connected, for metrics
+        self._limiters = {}             # Client sockets --> ConnectionLimiter of their inbound frames
+        self.timeouts = TimingWheel()   # Handshake, username and idle timers of the client sockets
+        self._last_seen = {}            # Client sockets --> monotonic time their last frame arrived
+        self._buffers = {}              # Client sockets --> bytearray of received bytes that aren't a whole frame yet
+        self.recorder = recorder        # Session recorder
+        # Held while queuing and recording a message, the recorder's own lock when recording
+        self._record_lock = recorder.lock if recorder is not None else threading.Lock()
+        self._next_seat = 0             # Seat to give the next approved player
+        self.seats = {}                 # Seat --> socket of the approved player sitting in it
+        self.roster_seq = 0             # Sequence number of the player list, goes up on every join and leave
+        self.spectators = SpectatorHub()  # Read only connections watching the game, get every public broadcast
+        # Lock for sending, sends happen from more than one thread. Reentrant so a player list update can hold it while
+        # sending, which keeps the updates in sequence number order on the wire
+        self._send_lock = threading.RLock()
+        self.accepting = True  # Cleared when shutting down, the receiving thread then closes the listening sockets
+        # Socket pair for waking the receiving thread up from select
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+
+        # Registering gauges, they are only read when the metrics are scraped
+        metrics.set_gauge("msg_q_depth", self.msg_q.qsize)
+        metrics.set_gauge("room_players", lambda: len(self.open_clients))
+        metrics.set_gauge("handshaking_connections", lambda: len(self.waiting_for_key) + len(self.waiting_for_name))
+        metrics.set_gauge("connection_timers", lambda: len(self.timeouts))
+        threading.Thread(target=self._main_loop, daemon=True).start()  # Starting the main receiving thread
 
     def _main_loop(self):
         """
         Initializes the server and runs a receiving loop also responsible for key trading and username approval
         """
 
-        self.socket = socket.socket()  # Creating server socket
-        self.socket.bind(("0.0.0.0", self.port))  # Binding to port
-        self.socket.listen(3)
+        if self.handoff is None:
+            self.socket = socket.socket()  # Creating server socket
+            self.socket.bind(("0.0.0.0", self.port))  # Binding to port
+            self.socket.listen(3)
 
         # === Main loop ===
         while True:
+            if not self.accepting:
+                self._close_listening()
             # Using select to know when clients send a message
-            rlist, wlist, xlist = select.select([self.socket] + list(self.open_clients.keys()) +
+            # Only waiting for reads, sends are blocking so waiting for writable sockets would just spin the loop.
+            # Waking up every tick of the timing wheel while there are timers
+            listening = [sock for sock in (self.socket, self.handoff, self._wake_recv) if sock is not None]
+            rlist, wlist, xlist = select.select(listening + list(self.open_clients.keys()) +
                                                 list(self.waiting_for_name.keys()) + list(self.waiting_for_key.keys()),
-                                                list(self.open_clients.keys()) + list(self.waiting_for_name.keys()) +
-                                                list(self.waiting_for_key.keys()), [])
+                                                [], [], self.timeouts.tick if len(self.timeouts) else None)
 
             # Iterating though the rlist - list of sockets that have sent the server a message
             for current_socket in rlist:
@@ -50,80 +119,262 @@ class ServerComm:
                     # Accepting new client
                     (new_client, addr) = self.socket.accept()
                     print(f"{addr[0]} - connected")
+                    new_client.setblocking(False)  # Reading whatever arrived, never waiting for the rest
+                    self._buffers[new_client] = bytearray()
                     # Adding the new client into the waiting for key dictionary
                     self.waiting_for_key[new_client] = addr[0]
+                    self._connect_times[new_client] = time.perf_counter()
+                    self._limiters[new_client] = ConnectionLimiter()
+                    self.timeouts.schedule(new_client, "handshake", handshake_timeout)
+                    metrics.inc("connections_accepted")
 
                 # If the socket that sent a message is in the key trading process
                 elif current_socket in self.waiting_for_key.keys():
-                    # == Trading keys with client ==
-                    # Getting RSA public key from client (length is always 271 bytes)
+                    self._trade_keys(current_socket)
+
+                # If it's the router handing over a connection, only in sharded mode
+                elif current_socket is self.handoff:
+                    self._receive_handoff()
+
+                # Woken up to stop accepting, handled at the top of the loop
+                elif current_socket is self._wake_recv:
                     try:
-                        client_public_key = current_socket.recv(271)
-                    except Exception as e:
-                        self._handle_disconnect_client(current_socket)
-                    else:
-                        AES_key = gen_AES_key()
-                        # Encrypting the key using the client's public key
-                        enc_key = RSA_encrypt(AES_key, client_public_key)
-                        # Sending encrypted key to client (length is always 172 bytes)
-                        try:
-                            current_socket.send(enc_key)
-                        except Exception as e:
-                            self._handle_disconnect_client(current_socket)
-                        else:
-                            # Moving client to next dictionary - waiting for username approval
-                            self.waiting_for_name[current_socket] = (self.waiting_for_key[current_socket], AES_key)
-                            del self.waiting_for_key[current_socket]
-
-                # If the socket is waiting for username approval
-                elif current_socket in self.waiting_for_name.keys():
-                    # === Username approval process ===
-                    msg = self._receive_msg(current_socket)
-                    if msg is not None and msg[0] == 'U':  # If msg is not None (meaning client has disconnected)
-                        msg = msg[1:]
-                        if not self.is_in_progress:
-                            # Checking if username is taken
-                            taken = False
-                            for player in list(self.open_clients.values()):
-                                if player.username == msg:
-                                    taken = True
-                                    break
-                            if taken:
-                                self.send_one("NUsername is already taken, please choose another", current_socket)
-                            else:
-                                # Username is valid
-                                self.send_one("Y", current_socket)  # Approving username
-                                # Moving client to open clients dictionary and creating player object for them
-                                self.open_clients[current_socket] = Player(self.waiting_for_name[current_socket][0],
-                                                                           self.waiting_for_name[current_socket][1], msg)
-                                # Erasing from waiting for name dictionary
-                                del self.waiting_for_name[current_socket]
-
-                                # Updating everyone on the new player
-                                player_list = self._format_player_list()
-                                self.send_all(player_list)
-                        else:
-                            # Game is already in progress
-                            self.send_one("NGame is already in progress", current_socket)
-
-                    else:
-                        self._handle_disconnect_client(current_socket)
-
-                # Client is in open clients
+                        self._wake_recv.recv(4096)
+                    except BlockingIOError:
+                        pass
+
+                # Client is waiting for username approval or is in open clients
                 else:
-                    try:
-                        data_len = int(current_socket.recv(2).decode())  # Receiving two bytes of length
-                        data = current_socket.recv(data_len).decode()    # Receiving data
-                    except Exception as e:
-                        print("ServerComm - main_loop", str(e))
-                        self._handle_disconnect_client(current_socket)
-                    else:
-                        # If the client has disconnected
-                        if data == "":
-                            self._handle_disconnect_client(current_socket)
-                        else:
-                            # Putting the message into the message queue
-                            self.msg_q.put((current_socket, data))
+                    self._handle_frames(current_socket)
+
+            self._reap_expired()
+
+    def _trade_keys(self, sock):
+        """
+        Reads the client's RSA public key and sends it the encrypted AES key once the whole public key arrived
+        :param sock: Socket waiting for key trading
+        """
+        buffer = self._buffers[sock]
+        try:
+            self._receive_some(sock)
+            if len(buffer) < public_key_len:
+                return  # Rest of the key didn't arrive yet
+            client_public_key = bytes(buffer[:public_key_len])
+            del buffer[:public_key_len]
+            AES_key = gen_AES_key()
+            # Encrypting the key using the client's public key
+            enc_key = RSA_encrypt(AES_key, client_public_key)
+            # Sending encrypted key to client (length is always 172 bytes, always fits into the empty socket buffer)
+            sock.send(enc_key)
+        except Exception as e:
+            self._handle_disconnect_client(sock)
+        else:
+            # Moving client to next dictionary - waiting for username approval
+            self.waiting_for_name[sock] = (self.waiting_for_key[sock], AES_key)
+            del self.waiting_for_key[sock]
+            self.timeouts.schedule(sock, "username", username_timeout)
+
+    def _handle_frames(self, sock):
+        """
+        Receives from a client and handles every whole frame that arrived, as join messages while the client is waiting
+        for username approval and as player messages once it's approved
+        :param sock: Socket of the client
+        """
+        try:
+            messages = self._receive_frames(sock)
+        except ValueError as e:
+            print("ServerComm - invalid frame", str(e))
+            self._handle_disconnect_client(sock)
+            return
+        except OSError:
+            self._handle_disconnect_client(sock)
+            return
+        for msg in messages:
+            if sock in self.waiting_for_name:
+                self._handle_join_msg(sock, msg)
+            elif sock in self.open_clients:
+                self._handle_player_msg(sock, msg)
+            else:
+                break  # Disconnected or became a spectator, the rest of its frames don't matter
+
+    def _handle_player_msg(self, sock, data):
+        """
+        Handles a message from an approved player
+        :param sock: Socket of the player
+        :param data: Message from the player
+        """
+        # Empty frame, the client is disconnecting
+        if data == "":
+            self._handle_disconnect_client(sock)
+        elif data == PING:
+            # Answer to a ping, replacing the ping timer
+            self.timeouts.schedule(sock, "idle", idle_timeout)
+        elif data == "S":
+            # Client missed a player list update, sending it the whole list
+            metrics.inc("frames_received", "S")
+            with self._send_lock:
+                self.send_one(self._format_player_list(), sock)
+        else:
+            # Putting the message into the message queue, unless the client already filled its share of it.
+            # The code is the client's, only known codes get a label of their own
+            metrics.inc("frames_received", data[0] if data[0] in room_codes else "other")
+            with self._record_lock:  # The step of the room taking the message can't be recorded before it
+                queued = self.msg_q.try_put((sock, data))
+                if queued and self.recorder is not None:
+                    self.recorder.record(MESSAGE, self.open_clients[sock].seat, data)
+            if not queued:
+                self._drop_frame(sock, "queue_full")
+
+    def stop_accepting(self):
+        """
+        Stops accepting new connections, for shutting down. Safe to call from a signal handler
+        """
+        self.accepting = False
+        try:
+            self._wake_send.send(b"\0")
+        except BlockingIOError:
+            pass  # The receiving thread is already going to wake up
+
+    def _close_listening(self):
+        """
+        Closes the listening socket and the router's handoff socket, called on the receiving thread
+        """
+        for sock in (self.socket, self.handoff):
+            if sock is not None:
+                sock.close()
+        self.socket = None
+        self.handoff = None
+
+    def close(self):
+        """
+        Shuts down every client and spectator connection, for shutting down once no round is running
+        """
+        self.stop_accepting()
+        with self._send_lock:  # Not cutting a frame off in the middle
+            for sock in list(self.open_clients) + list(self.waiting_for_name) + list(self.waiting_for_key):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self.spectators.close()
+
+    def _reap_expired(self):
+        """
+        Handles the timers that came due, disconnecting clients stuck in the handshake and clients that stopped answering
+        """
+        now = time.monotonic()
+        for sock, kind in self.timeouts.advance(now):
+            silent_for = now - self._last_seen.get(sock, 0)
+            if kind == "idle" and silent_for < idle_timeout:
+                # Heard from the player since the timer was scheduled, waiting for the rest of the idle time
+                self.timeouts.schedule(sock, "idle", idle_timeout - silent_for)
+            elif kind == "idle":
+                # Player has been quiet, making sure it's still there
+                metrics.inc("pings_sent")
+                self.timeouts.schedule(sock, "ping", ping_timeout)
+                self.send_one(PING, sock)  # Disconnects the player if sending fails, cancelling the timer
+            else:
+                # Handshake or username took too long or a ping went unanswered
+                print("ServerComm - timed out", kind)
+                metrics.inc("timeouts", kind)
+                self._handle_disconnect_client(sock)
+
+    def _handle_join_msg(self, sock, msg):
+        """
+        Handles a message from a socket waiting for username approval
+        :param sock: Socket that sent the message
+        :param msg: Message from the socket
+        """
+        if msg[:1] == 'U':
+            metrics.inc("frames_received", "U")
+            msg = msg[1:]
+            if not self.is_in_progress:
+                # Checking if username is taken
+                taken = False
+                for player in list(self.open_clients.values()):
+                    if player.username == msg:
+                        taken = True
+                        break
+                if taken:
+                    self.send_one("NUsername is already taken, please choose another", sock)
+                elif any(separator in msg for separator in username_separators):
+                    # Player lists and answers are split on these, a name with them would break every client's parsing
+                    self.send_one("NUsername can't contain " + " or ".join(username_separators), sock)
+                else:
+                    # Username is valid
+                    self.send_one("Y", sock)  # Approving username
+                    # Recording before the room can see the player, so the steps that see them come after the join
+                    if self.recorder is not None:
+                        self.recorder.record(JOIN, self._next_seat, msg)
+                    # Moving client to open clients dictionary and creating player object for them
+                    self.open_clients[sock] = Player(self.waiting_for_name[sock][0], self.waiting_for_name[sock][1],
+                                                     msg, self._next_seat)
+                    self.seats[self._next_seat] = sock
+                    self._next_seat += 1
+                    # Erasing from waiting for name dictionary
+                    del self.waiting_for_name[sock]
+                    # Handshake is done, measuring from connection to username approval
+                    metrics.observe("handshake", time.perf_counter() - self._connect_times.pop(sock))
+
+                    self.timeouts.schedule(sock, "idle", idle_timeout)  # Replacing the username timer
+                    # Updating everyone on the new player
+                    self._announce_join(sock)
+            else:
+                # Game is already in progress
+                self.send_one("NGame is already in progress", sock)
+
+        elif msg[:1] == 'O':
+            # Client wants to spectate, allowed even while a game is in progress
+            metrics.inc("frames_received", "O")
+            print(f"{self.waiting_for_name[sock][0]} - spectating")
+            del self.waiting_for_name[sock]
+            self._connect_times.pop(sock, None)
+            self._limiters.pop(sock, None)
+            self._buffers.pop(sock, None)
+            self._last_seen.pop(sock, None)
+            self.timeouts.cancel(sock)
+            # Handing the socket over to the spectator hub, approving it and sending the player list.
+            # Holding the send lock so no player list update is published in between
+            with self._send_lock:
+                self.spectators.add(sock, frame(b"O") + frame(self._format_player_list().encode()))
+
+        elif msg[:1] == 'M':
+            # Room code, only the router needs it. This server hosts a single room so everyone ends up in it
+            metrics.inc("frames_received", "M")
+
+        else:
+            self._handle_disconnect_client(sock)
+
+    def _receive_handoff(self):
+        """
+        Receives a connection handed over by the router. The router already traded keys with the client and read its
+        room code, so the socket goes straight to waiting for username approval
+        """
+        try:
+            data, fds, _, _ = socket.recv_fds(self.handoff, 1024, 1)
+        except OSError as e:
+            print("ServerComm - handoff", str(e))
+            data, fds = b"", []
+        if not data:
+            # Router is gone, no new connections will come
+            print("ServerComm - router closed the handoff socket")
+            self.handoff = None
+            return
+
+        sock = socket.socket(fileno=fds[0])
+        sock.setblocking(False)  # Same as the connections accepted here
+        self._buffers[sock] = bytearray()
+        self._handoffs += 1
+        # Client's ip, the AES key the router traded and a message the router read past the room code, if any
+        ip, key, msg = data.decode().split("&", 2)
+        print(f"{ip} - handed over")
+        self.waiting_for_name[sock] = (ip, bytes.fromhex(key))
+        self._connect_times[sock] = time.perf_counter()
+        self._limiters[sock] = ConnectionLimiter()
+        self.timeouts.schedule(sock, "username", username_timeout)
+        metrics.inc("connections_handed_over")
+        if msg:
+            self._handle_join_msg(sock, msg)
 
     def _handle_disconnect_client(self, socket_to_disconnect: socket.socket):
         """
@@ -132,11 +383,15 @@ class ServerComm:
         if socket_to_disconnect in self.open_clients.keys():
             ip = self.open_clients[socket_to_disconnect].ip
             print(f"{ip} - disconnected")
-            del self.open_clients[socket_to_disconnect]
+            if self.recorder is not None:
+                self.recorder.record(DISCONNECT, self.open_clients[socket_to_disconnect].seat)
+            seat = self.open_clients.pop(socket_to_disconnect).seat
+            del self.seats[seat]
 
-            # Updating all clients on updated player list
-            player_list = self._format_player_list()
-            self.send_all_exl(player_list, socket_to_disconnect)
+            # Updating all clients on the player that left
+            with self._send_lock:
+                self.roster_seq += 1
+                self.send_all(f"X{self.roster_seq}&{seat}")
 
             self.has_disconnect = True
 
@@ -150,42 +405,89 @@ class ServerComm:
             print(f"{ip} - disconnected")
             del self.waiting_for_key[socket_to_disconnect]
 
+        self._connect_times.pop(socket_to_disconnect, None)
+        self._limiters.pop(socket_to_disconnect, None)
+        self._last_seen.pop(socket_to_disconnect, None)
+        self._buffers.pop(socket_to_disconnect, None)
+        self.timeouts.cancel(socket_to_disconnect)
+        metrics.inc("disconnects")
         socket_to_disconnect.close()
+        self.report_if_empty()
+
+    def report_if_empty(self):
+        """
+        Tells the router once everyone left the room and no game is running, so it can give this shard to the next new
+        room, in sharded mode. The router only frees the shard if no connection was handed over since, so the amount
+        handed over is sent along
+        """
+        handoff = self.handoff  # Can be closed by the receiving thread while a send on the main thread fails
+        if handoff is None or self.is_in_progress or self.open_clients or self.waiting_for_name:
+            return
+        try:
+            handoff.send(f"E{self._handoffs}".encode())
+        except OSError:
+            pass  # Router is gone
+
+    def _announce_join(self, sock):
+        """
+        Sends the whole player list to a player that just joined and tells everyone else that the player joined
+        :param sock: Socket of the player that joined
+        """
+        with self._send_lock:
+            self.roster_seq += 1
+            self.send_one(self._format_player_list(), sock)
+            player = self.open_clients[sock]
+            self.send_all_exl(f"J{self.roster_seq}&{player.seat}:{player.username}", sock)
+
+    def _send_frame(self, sock, frame):
+        """
+        Sends a whole frame at once, both the receiving thread and the main server thread send messages so a frame
+        must never be split into separate sends or the frames could interleave on the client side.
+        Client sockets are non-blocking, sending to a client that stopped reading until its socket buffer filled up
+        fails and the client is disconnected instead of the server waiting for it
+        :param sock: Socket to send to
+        :param frame: Frame to send (Bytes)
+        """
+        with self._send_lock:
+            sock.sendall(frame)
 
     def send_all_exl(self, data, exclude):
         """
-        sends message to all approved sockets but one
+        sends message to all approved sockets but one, and to the spectators. Only for public messages
         :param data: message to send
         :param exclude: Socket to not send to
         """
         if type(data) == str:
             data = data.encode()
-        len_msg = str(len(data)).zfill(2).encode()
+        framed = frame(data)
+        code = chr(data[0])  # Message code for metrics
+        self.spectators.publish(framed)  # Spectators aren't players so they get it too
 
-        # Iterating over all approved sockets
-        for sock in self.open_clients.keys():
+        # Iterating over all approved sockets, over a copy since a failed send removes the socket
+        for sock in list(self.open_clients):
             if sock is not exclude:  # If the socket is not the excluded one
+                metrics.inc("frames_sent", code)
                 try:
                     # Sending the message length and the message itself
-                    sock.send(len_msg)
-                    sock.send(data)
+                    self._send_frame(sock, framed)
                 except socket.error:
                     self._handle_disconnect_client(sock)
 
     def send_all(self, data):
         """
-        Sends message to all
+        Sends message to all, spectators included. Only for public messages
         :param data:  message to send
         """
         if type(data) == str:
             data = data.encode()
-        len_msg = str(len(data)).zfill(2).encode()
-        # Iterating though all open sockets
-        for sock in self.open_clients.keys():
+        framed = frame(data)
+        metrics.inc("frames_sent", chr(data[0]), len(self.open_clients))
+        self.spectators.publish(framed)
+        # Iterating though all open sockets, over a copy since a failed send removes the socket
+        for sock in list(self.open_clients):
             try:
                 # Sending the message length and the message itself
-                sock.send(len_msg)
-                sock.send(data)
+                self._send_frame(sock, framed)
             except socket.error:
                 self._handle_disconnect_client(sock)
 
@@ -197,13 +499,13 @@ class ServerComm:
         """
         if type(data) == str:
             data = data.encode()
-        len_msg = str(len(data)).zfill(2).encode()
+        framed = frame(data)
         # Making sure target is connected to server
         if target in self.open_clients.keys() or target in self.waiting_for_name.keys():
+            metrics.inc("frames_sent", chr(data[0]))
             try:
                 # Sending the message length and the message itself
-                target.send(len_msg)
-                target.send(data)
+                self._send_frame(target, framed)
             except socket.error:
                 self._handle_disconnect_client(target)
 
@@ -216,13 +518,14 @@ class ServerComm:
         """
         if target in self.open_clients.keys():
             self.AES_cipher.key = self.open_clients[target].key  # Setting the encryption to be the client's key
+            timer = metrics.start_timer("encrypt")
             enc_data = self.AES_cipher.encrypt(data)
+            metrics.stop_timer("encrypt", timer)
+            metrics.inc("frames_sent", data[0])
             len_msg = str(len(enc_data)).zfill(3).encode()
             try:
-                target.send("04!ENC".encode())  # Sending encryption heads up
-                # Sending the message length and the encrypted message itself
-                target.send(len_msg)
-                target.send(enc_data)
+                # Sending encryption heads up followed by the message length and the encrypted message itself
+                self._send_frame(target, b"04!ENC" + len_msg + enc_data)
             except socket.error:
                 self._handle_disconnect_client(target)
 
@@ -233,54 +536,95 @@ class ServerComm:
         :param exclude: Ip to not send to
         """
 
-        for sock in self.open_clients.keys():
+        for sock in list(self.open_clients):  # Iterating over a copy since a failed send removes the socket
             if sock is not exclude:
                 self.AES_cipher.key = self.open_clients[sock].key  # Setting the encryption to be the client's key
+                timer = metrics.start_timer("encrypt")
                 enc_data = self.AES_cipher.encrypt(data)  # Encrypting the data
+                metrics.stop_timer("encrypt", timer)
+                metrics.inc("frames_sent", data[0])
                 len_msg = str(len(enc_data)).zfill(3).encode()  # Calculating the encrypted message's length
                 try:
-                    sock.send("04!ENC".encode())  # Sending encryption heads up
-                    # Sending the message length and the encrypted message itself
-                    sock.send(len_msg)
-                    sock.send(enc_data)
+                    # Sending encryption heads up followed by the message length and the encrypted message itself
+                    self._send_frame(sock, b"04!ENC" + len_msg + enc_data)
                 except socket.error:
                     self._handle_disconnect_client(sock)
 
-    def username_to_socket(self, username):
+    def seat_to_socket(self, seat):
         """
-        Gets username and returns matching socket, returns None if there isn't such a socket
-        :param username: Username to search for
-        :return: Socket with according username
+        Returns the socket of the player sitting in a seat, None if there isn't such a player
+        :param seat: Seat number, as an int or a string from a message
         """
-        rtr = None
-        for sock in self.open_clients.keys():
-            if self.open_clients[sock].username == username:
-                rtr = sock
-                break
-        return rtr
+        try:
+            return self.seats.get(int(seat))
+        except (TypeError, ValueError):  # Not a number, or None for an empty message
+            return None
 
     def _format_player_list(self):
         """
-        Returns formatted player list to send to all clients
+        Returns formatted player list snapshot, sequence number of the list followed by seat:username entries
         """
         # Making player list
-        player_list = "L"
-        for connected_player in list(self.open_clients.values()):
-            player_list += connected_player.username + "&"
-        player_list = player_list[:-1]  # Removing last &
-        return player_list
+        return f"L{self.roster_seq}&" + "&".join(f"{player.seat}:{player.username}"
+                                                 for player in list(self.open_clients.values()))
 
-    def _receive_msg(self, client_sock):
+    def _receive_some(self, client_sock):
         """
-        Receives message with 2 digits of length, Returns None if receiving failed
-        :param client_sock: socket to receive from
-        :return: Message from given socket or None if receiving failed
+        Reads whatever the client sent into its buffer, never waiting for more
+        :param client_sock: Non-blocking socket to receive from
+        :raises OSError: If the client disconnected or receiving failed
         """
         try:
-            # Receiving length then message by length
-            msg_len = client_sock.recv(2).decode()
-            msg = client_sock.recv(int(msg_len)).decode()
-        except socket.error or ValueError:
+            data = client_sock.recv(recv_size)
+        except BlockingIOError:
+            return  # Nothing arrived after all
+        if not data:
+            raise ConnectionResetError("Client disconnected")
+        self._buffers[client_sock] += data
+        self._last_seen[client_sock] = time.monotonic()
+
+    def _receive_frames(self, client_sock):
+        """
+        Receives from a client and returns the whole frames in its buffer, frames have 2 digits of length. The bytes of
+        a frame that didn't all arrive yet wait in the buffer, so a client that stops in the middle of a frame never
+        holds up the receiving loop. Frames over the connection's rate limits are thrown away before being decoded,
+        except for the answer to a ping, throwing it away would time the player out
+        :param client_sock: Socket to receive from
+        :return: List of messages (Strings), in the order they arrived
+        :raises OSError, ValueError: If receiving failed or a frame is invalid
+        """
+        self._receive_some(client_sock)
+        buffer = self._buffers[client_sock]
+        messages = []
+        while len(buffer) >= 2:
+            if not buffer[:2].isdigit():
+                raise ValueError(f"Invalid frame length {bytes(buffer[:2])!r}")
+            frame_len = 2 + int(buffer[:2])
+            if len(buffer) < frame_len:
+                break  # Rest of the frame didn't arrive yet
+            data = bytes(buffer[2:frame_len])
+            del buffer[:frame_len]
+            if data == _ping_bytes and self.timeouts.kind(client_sock) == "ping":
+                messages.append(PING)
+                continue
+            limiter = self._limiters.get(client_sock)
+            if limiter is not None and not limiter.allow(frame_len):
+                self._drop_frame(client_sock, "rate_limited")
+                if client_sock not in self._limiters:
+                    break  # Disconnected for flooding
+                continue
+            messages.append(data.decode())
+        return messages
+
+    def _drop_frame(self, client_sock, reason):
+        """
+        Counts a thrown away frame against the client, disconnecting it once it keeps flooding
+        :param client_sock: Socket that sent the frame
+        :param reason: Why the frame was thrown away, for metrics
+        """
+        metrics.inc("frames_dropped", reason)
+        limiter = self._limiters.get(client_sock)
+        if limiter is not None and not limiter.strike():
+            print("ServerComm - disconnecting flooding client")
+            metrics.inc("abusers_disconnected")
             self._handle_disconnect_client(client_sock)
-            msg = None
-        return msg
@@ -0,0 +1,158 @@
+import select
+import socket
+import threading
+from collections import deque
+from Metrics import metrics
+
+"""
+=== Spectators ===
+Read only connections that watch the game. Spectators get the public broadcasts (player list, answers, votes, points and
+winners) but never tasks. They are served by their own thread so a slow or huge audience never blocks the players
+"""
+
+
+class SpectatorHub:
+    """
+    Fan-out of public frames to spectator sockets. A frame is framed once by the server and the same buffer is written to
+    every spectator. Sockets are non-blocking, whatever a spectator can't take right away waits in its backlog and a
+    spectator whose backlog grows too large is dropped instead of slowing everyone down
+    """
+    def __init__(self, max_backlog=256 * 1024):
+        """
+        :param max_backlog: Max amount of unsent bytes a spectator can have before it's dropped
+        """
+        self.max_backlog = max_backlog
+        self._backlogs = {}  # Spectator socket --> bytearray of bytes that didn't fit into the socket yet
+        self._queue = deque()  # Pending (socket, frame) pairs, a socket of None means the frame goes to every spectator
+        # Spectators added and dropped so far, each only written by one thread so publish can check for spectators
+        # without a lock
+        self._added = 0
+        self._dropped = 0
+        # Socket pair for waking the hub thread up from select when something is queued
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+
+        metrics.set_gauge("spectators", lambda: len(self._backlogs))
+        threading.Thread(target=self._main_loop, daemon=True).start()
+
+    def add(self, sock, first_frame):
+        """
+        Adds a spectator. The socket is handed over to the hub, nothing else should use it after this
+        :param sock: Socket of the spectator
+        :param first_frame: Frame the spectator gets before any public frame published after this call, like the
+                            current player list (Bytes)
+        """
+        self._added += 1
+        self._queue.append((sock, first_frame))
+        self._wake()
+
+    def publish(self, framed):
+        """
+        Queues a framed public message for every spectator, doesn't block
+        :param framed: Frame to send (Bytes)
+        """
+        if self._added != self._dropped:  # Nothing to do without spectators
+            self._queue.append((None, framed))
+            self._wake()
+
+    def close(self):
+        """
+        Shuts every spectator connection down, for shutting the server down
+        """
+        for sock in list(self._backlogs):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._backlogs)
+
+    def _wake(self):
+        try:
+            self._wake_send.send(b"\0")
+        except BlockingIOError:
+            pass  # The hub is already going to wake up
+
+    def _main_loop(self):
+        """
+        Sends queued frames to the spectators, flushes backlogs as sockets become writable and drops spectators that
+        disconnect. Spectators are read only, anything they send is thrown away
+        """
+        while True:
+            writable = [sock for sock, backlog in self._backlogs.items() if backlog]
+            rlist, wlist, _ = select.select([self._wake_recv] + list(self._backlogs), writable, [])
+
+            for sock in rlist:
+                if sock is self._wake_recv:
+                    try:
+                        while self._wake_recv.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                else:
+                    try:
+                        data = sock.recv(4096)
+                    except BlockingIOError:
+                        continue
+                    except OSError:
+                        data = b""
+                    if not data:
+                        self._drop(sock)
+
+            # Flushing backlogs first so frames keep their order
+            for sock in wlist:
+                if sock in self._backlogs:
+                    self._flush(sock, b"")
+
+            while self._queue:
+                target, framed = self._queue.popleft()
+                if target is not None:
+                    # New spectator
+                    target.setblocking(False)
+                    self._backlogs[target] = bytearray()
+                    metrics.inc("spectators_joined")
+                    self._flush(target, framed)
+                else:
+                    metrics.inc("spectator_frames_sent", amount=len(self._backlogs))
+                    for sock in list(self._backlogs):
+                        self._flush(sock, framed)
+
+    def _flush(self, sock, framed):
+        """
+        Sends as much of a spectator's backlog followed by a frame as the socket takes without blocking
+        :param sock: Spectator socket
+        :param framed: Frame to send after the backlog (Bytes)
+        """
+        backlog = self._backlogs[sock]
+        if backlog:
+            backlog += framed
+            data = backlog
+        else:
+            data = framed  # Usual case, sending the shared buffer as is
+        try:
+            sent = sock.send(data)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._drop(sock)
+            return
+
+        if data is backlog:
+            del backlog[:sent]
+        else:
+            backlog += framed[sent:]
+        if len(backlog) > self.max_backlog:
+            # Too slow to keep up with the game
+            metrics.inc("spectators_dropped")
+            self._drop(sock)
+
+    def _drop(self, sock):
+        """
+        Removes a spectator and closes its socket
+        """
+        if self._backlogs.pop(sock, None) is not None:
+            self._dropped += 1
+            metrics.inc("spectators_left")
+        sock.close()
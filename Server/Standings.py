@@ -0,0 +1,81 @@
+import heapq
+
+"""
+=== Standings ===
+Running standings of the current game, updated whenever points are awarded so the best players can be read without
+going over every player
+"""
+
+# Kinds of points
+FAKER = "faker"
+DETECTIVE = "detective"
+TOTAL = "total"  # Faker and detective points together
+
+
+class Standings:
+    """
+    Top players of the current game in each kind of points, only players with points are ranked and ties go to the lower
+    seat. Each kind has a heap of (-points, seat) entries, an award pushes a new entry for the player and leaves the old
+    one in the heap. Points only go up so an old entry always sorts after the player's current one, and reads skip it
+    """
+    def __init__(self, compact_factor=4):
+        """
+        :param compact_factor: A heap is rebuilt from the current points once it has this many entries per player
+        """
+        self.compact_factor = compact_factor
+        self._points = {kind: {} for kind in (FAKER, DETECTIVE, TOTAL)}  # Kind --> seat --> current points
+        self._heaps = {kind: [] for kind in (FAKER, DETECTIVE, TOTAL)}   # Kind --> heap of (-points, seat) entries
+
+    def award(self, seat, kind, points):
+        """
+        Adds points to a player
+        :param seat: Seat of the player
+        :param kind: FAKER or DETECTIVE, the player's total points go up too
+        :param points: Amount of points, must be positive
+        """
+        self._add(seat, kind, points)
+        self._add(seat, TOTAL, points)
+
+    def _add(self, seat, kind, points):
+        """
+        Internal method, adds points to a player in a single kind
+        """
+        seat_points = self._points[kind]
+        heap = self._heaps[kind]
+        seat_points[seat] = seat_points.get(seat, 0) + points
+        heapq.heappush(heap, (-seat_points[seat], seat))
+        if len(heap) > self.compact_factor * len(seat_points):
+            # Mostly old entries, rebuilding the heap with only the current ones
+            heap[:] = [(-player_points, player_seat) for player_seat, player_points in seat_points.items()]
+            heapq.heapify(heap)
+
+    def top(self, kind, k=1, include=None):
+        """
+        Returns the best players in a kind of points. The heap is walked from its root taking the best entry seen so
+        far each time, so only the entries ranked above the k-th player are looked at
+        :param kind: FAKER, DETECTIVE or TOTAL
+        :param k: Amount of players
+        :param include: Function returning if a seat should be ranked, for leaving out players that left
+        :return: List of (seat, points) tuples, best first
+        """
+        heap = self._heaps[kind]
+        seat_points = self._points[kind]
+        best = []
+        frontier = [(heap[0], 0)] if heap else []  # (entry, index of the entry in the heap)
+        while frontier and len(best) < k:
+            (negative_points, seat), index = heapq.heappop(frontier)
+            if seat_points[seat] == -negative_points and (include is None or include(seat)):
+                best.append((seat, -negative_points))
+            # The entry's children in the heap are the next candidates
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return best
+
+    def reset(self):
+        """
+        Resets the standings for the next game
+        """
+        for kind in self._points:
+            self._points[kind].clear()
+            self._heaps[kind].clear()
@@ -1,5 +1,10 @@
+import json
 import sqlite3
 import random
+from array import array
+
+task_tables = ("pointTask", "raiseTask", "numberTask")  # Names of the category tables
+max_task_id = 2 ** 32 - 1  # Largest id the id index can hold, its arrays are of unsigned 32 bit ints
 
 
 class TaskDatabase:
@@ -14,6 +19,8 @@ class TaskDatabase:
         self.database_name = database_name
         self.conn = None    # Connection to database
         self.cur = None     # SQL cursor
+        self.task_ids = {}  # Category table name --> array of the live task ids in it
+        self._positions = {}  # Category table name --> dictionary of task id --> index of the id in task_ids
         self.init_database()  # Initializing the database
 
     def init_database(self):
@@ -32,53 +39,189 @@ class TaskDatabase:
         # Creating number task table
         sql = f"CREATE TABLE IF NOT EXISTS numberTask (id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT , task TEXT)"
         self.cur.execute(sql)
+        self._load_task_ids()  # Loading the id index of each category
 
-    # == Methods to add tasks ==
-    def add_task_point(self, task):
-        sql = f'INSERT INTO pointTask (task) VALUES("{task}")'
-        self.cur.execute(sql)
+    def _load_task_ids(self):
+        """
+        Loads the ids of every task in each category into the id index, called once when the database is initialized
+        """
+        for table in task_tables:
+            self.cur.execute(f"SELECT id FROM {table}")
+            ids = [row[0] for row in self.cur.fetchall()]
+            assert not ids or max(ids) <= max_task_id, f"{table} has task ids that don't fit in the id index"
+            # Compact array of unsigned ints, one per live task
+            self.task_ids[table] = array("I", ids)
+            self._positions[table] = {task_id: index for index, task_id in enumerate(ids)}
+
+    def _add_task(self, table, task):
+        """
+        Internal method, inserts a task into a category table and adds its id to the id index
+        :param table: Name of category table
+        :param task: Task to add
+        :return: Id of the added task
+        """
+        self.cur.execute(f"INSERT INTO {table} (task) VALUES(?)", (task,))
         self.conn.commit()
+        task_id = self.cur.lastrowid
+        # Keeping the id index in sync with the table
+        self._positions[table][task_id] = len(self.task_ids[table])
+        self.task_ids[table].append(task_id)
+        return task_id
 
-    def add_task_raise(self, task):
-        sql = f'INSERT INTO raiseTask (task) VALUES("{task}")'
-        self.cur.execute(sql)
+    def _delete_task(self, table, task_id):
+        """
+        Internal method, deletes a task from a category table and removes its id from the id index
+        :param table: Name of category table
+        :param task_id: Id of task to delete
+        """
+        self.cur.execute(f"DELETE FROM {table} WHERE id == ?", (task_id,))
         self.conn.commit()
+        self._remove_id(table, task_id)
+
+    def _remove_id(self, table, task_id):
+        """
+        Internal method, removes an id from the id index in O(1)
+        :param table: Name of category table
+        :param task_id: Id to remove, nothing happens if it isn't in the index
+        """
+        ids = self.task_ids[table]
+        positions = self._positions[table]
+        index = positions.pop(task_id, None)
+        if index is None:
+            return
+        # Moving the last id into the removed id's place so the array stays contiguous
+        last_id = ids.pop()
+        if index < len(ids):
+            ids[index] = last_id
+            positions[last_id] = index
+
+    def _random_task(self, table, rng=random):
+        """
+        Internal method, picks a uniformly random task from a category, works even if ids have gaps
+        :param table: Name of category table
+        :param rng: Random generator to pick with
+        :return: Tuple of the chosen task's id and the task
+        :raises LookupError: If the category has no tasks
+        """
+        while True:
+            ids = self.task_ids[table]
+            if not ids:
+                raise LookupError(f"No tasks in {table}")
+            rand_id = rng.choice(ids)  # Choosing a random live id
+            # Getting the task associated with the chosen id
+            self.cur.execute(f"SELECT * FROM {table} WHERE id == ?", (rand_id,))
+            task = self.cur.fetchone()
+            if task is not None:
+                return task
+            # Another connection deleted the task after the index was loaded, forgetting it and picking again
+            self._remove_id(table, rand_id)
+
+    # == Methods to add tasks, returns the id of the added task ==
+    def add_task_point(self, task):
+        return self._add_task("pointTask", task)
+
+    def add_task_raise(self, task):
+        return self._add_task("raiseTask", task)
 
     def add_task_number(self, task):
-        sql = f'INSERT INTO numberTask (task) VALUES("{task}")'
-        self.cur.execute(sql)
-        self.conn.commit()
+        return self._add_task("numberTask", task)
+
+    # == Methods to delete tasks by id ==
+    def delete_task_point(self, task_id):
+        self._delete_task("pointTask", task_id)
+
+    def delete_task_raise(self, task_id):
+        self._delete_task("raiseTask", task_id)
+
+    def delete_task_number(self, task_id):
+        self._delete_task("numberTask", task_id)
 
     # == Methods to pick a random task, returns a tuple of an id and the chosen task ==
-    def task_point(self):
-        sql = "SELECT COUNT(*) FROM pointTask"
-        self.cur.execute(sql)
-        count = self.cur.fetchall()[0][0]  # Getting the amount of tasks in the category
-        rand_id = random.randint(1, count)  # Choosing a random id
-        # Getting the task associated with the chosen id
-        sql = f"SELECT * FROM pointTask WHERE id == {rand_id}"
-        self.cur.execute(sql)
-        return self.cur.fetchall()[0]
+    def task_point(self, rng=random):
+        return self._random_task("pointTask", rng)
 
-    def task_number(self):
-        sql = "SELECT COUNT(*) FROM numberTask"
-        self.cur.execute(sql)
-        count = self.cur.fetchall()[0][0]  # Getting the amount of tasks in the category
-        rand_id = random.randint(1, count)  # Choosing a random id
-        # Getting the task associated with the chosen id
-        sql = f"SELECT * FROM numberTask WHERE id == {rand_id}"
-        self.cur.execute(sql)
-        return self.cur.fetchall()[0]
+    def task_number(self, rng=random):
+        return self._random_task("numberTask", rng)
 
-    def task_raise(self):
-        sql = "SELECT COUNT(*) FROM raiseTask"
-        self.cur.execute(sql)
-        count = self.cur.fetchall()[0][0]  # Getting the amount of tasks in the category
-        rand_id = random.randint(1, count)  # Choosing a random id
-        # Getting the task associated with the chosen id
-        sql = f"SELECT * FROM raiseTask WHERE id == {rand_id}"
-        self.cur.execute(sql)
-        return self.cur.fetchall()[0]
+    def task_raise(self, rng=random):
+        return self._random_task("raiseTask", rng)
+
+    def snapshot(self):
+        """
+        Loads every task into a TaskSnapshot, a read only copy of the tasks that doesn't touch the database. The
+        snapshot draws from a copy of the id index
+        """
+        tasks = {}
+        for table in task_tables:
+            self.cur.execute(f"SELECT id, task FROM {table}")
+            tasks[table] = dict(self.cur.fetchall())
+            # Forgetting tasks another connection deleted after the index was loaded
+            for task_id in [task_id for task_id in self.task_ids[table] if task_id not in tasks[table]]:
+                self._remove_id(table, task_id)
+        return TaskSnapshot(tasks, self.task_ids)
+
+
+class TaskSnapshot:
+    """
+    Immutable copy of the task pool, drawn from like a TaskDatabase. The server swaps in a new snapshot to reload the
+    tasks, rounds keep drawing from the snapshot they started with so a reload never changes a running round
+    """
+    __slots__ = ("_tasks", "_ids")
+
+    def __init__(self, tasks, task_ids):
+        """
+        :param tasks: Dictionary of category table name --> dictionary of task id --> task
+        :param task_ids: Id index of the database, category table name --> array of the live task ids in it
+        """
+        self._tasks = tasks
+        self._ids = {table: array("I", ids) for table, ids in task_ids.items()}  # Own copy of the ids to pick from
+
+    def _random_task(self, table, rng=random):
+        if not self._ids[table]:
+            raise LookupError(f"No tasks in {table}")
+        task_id = rng.choice(self._ids[table])
+        return task_id, self._tasks[table][task_id]
+
+    def count(self):
+        """
+        Returns the amount of tasks in the snapshot
+        """
+        return sum(len(ids) for ids in self._ids.values())
+
+    def empty_categories(self):
+        """
+        Returns the names of the category tables without any task, rounds of these categories can't draw their tasks
+        """
+        return [table for table in task_tables if not self._ids.get(table)]
+
+    def to_json(self):
+        """
+        Returns the snapshot as a JSON string, for recording it. The ids keep their order so from_json gives back a
+        snapshot that draws the same tasks
+        """
+        return json.dumps({table: [[task_id, self._tasks[table][task_id]] for task_id in ids]
+                           for table, ids in self._ids.items()})
+
+    @staticmethod
+    def from_json(data):
+        """
+        Creates a snapshot from a JSON string returned by to_json
+        :param data: JSON string
+        :return: TaskSnapshot
+        """
+        tables = json.loads(data)
+        return TaskSnapshot({table: dict(entries) for table, entries in tables.items()},
+                            {table: [task_id for task_id, _ in entries] for table, entries in tables.items()})
+
+    # == Methods to pick a random task, returns a tuple of an id and the chosen task ==
+    def task_point(self, rng=random):
+        return self._random_task("pointTask", rng)
+
+    def task_number(self, rng=random):
+        return self._random_task("numberTask", rng)
+
+    def task_raise(self, rng=random):
+        return self._random_task("raiseTask", rng)
 
 
 def main():
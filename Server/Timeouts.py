@@ -0,0 +1,93 @@
+import math
+import threading
+import time
+
+"""
+=== Timeouts ===
+Hashed timing wheel for the server's connection timeouts. Scheduling and cancelling are O(1) and advancing only looks at
+the timers of the slots that came due, so reaping costs O(expired) however many connections are open
+"""
+
+
+class TimingWheel:
+    """
+    Timing wheel of per key timers, a key has at most one live timer and scheduling a new one replaces it.
+    Timers fire up to one tick late. Safe to use from more than one thread, a failed send on the main server thread
+    cancels timers while the receiving thread advances the wheel
+    """
+    def __init__(self, tick=0.5, slots=256):
+        """
+        :param tick: Seconds per slot, the resolution of the timers
+        :param slots: Amount of slots, timers longer than a full turn of the wheel wait extra turns
+        """
+        self.tick = tick
+        self._slots = [[] for _ in range(slots)]  # Slot --> list of (key, generation, turns left) entries
+        self._cursor = 0                # Slot of the current tick
+        self._tick_start = time.monotonic()  # Time the current tick started
+        self._timers = {}               # Key --> (kind, generation) of its live timer
+        self._generation = 0            # Goes up on every schedule, entries of replaced timers are skipped by it
+        self._lock = threading.Lock()   # Held by every method, keeps a timer from firing while it's cancelled
+
+    def schedule(self, key, kind, delay):
+        """
+        Schedules a timer, replacing the key's previous timer
+        :param key: Key the timer is for, for example a socket
+        :param kind: Kind of timer, returned with the key when it fires
+        :param delay: Seconds until the timer fires
+        """
+        with self._lock:
+            if not self._timers:
+                # Nothing was scheduled, the wheel wasn't advanced while it was empty
+                self._tick_start = time.monotonic()
+            ticks = max(1, math.ceil(delay / self.tick))
+            self._generation += 1
+            self._timers[key] = (kind, self._generation)
+            slot = (self._cursor + ticks) % len(self._slots)
+            self._slots[slot].append((key, self._generation, (ticks - 1) // len(self._slots)))
+
+    def cancel(self, key):
+        """
+        Cancels the key's timer if it has one
+        """
+        with self._lock:
+            self._timers.pop(key, None)  # Its entry is skipped when its slot comes due
+
+    def kind(self, key):
+        """
+        Returns the kind of the key's timer, None if it has none
+        """
+        with self._lock:
+            timer = self._timers.get(key)
+        return timer[0] if timer is not None else None
+
+    def advance(self, now=None):
+        """
+        Moves the wheel forward to the current time
+        :param now: Current monotonic time, looked up if not given
+        :return: List of (key, kind) of the timers that fired
+        """
+        if now is None:
+            now = time.monotonic()
+        fired = []
+        with self._lock:
+            while now - self._tick_start >= self.tick:
+                self._tick_start += self.tick
+                self._cursor = (self._cursor + 1) % len(self._slots)
+                entries = self._slots[self._cursor]
+                if not entries:
+                    continue
+                waiting = []  # Entries that have more turns to wait
+                for key, generation, turns in entries:
+                    timer = self._timers.get(key)
+                    if timer is None or timer[1] != generation:
+                        continue  # Cancelled or replaced
+                    if turns:
+                        waiting.append((key, generation, turns - 1))
+                    else:
+                        del self._timers[key]
+                        fired.append((key, timer[0]))
+                self._slots[self._cursor] = waiting
+        return fired
+
+    def __len__(self):
+        return len(self._timers)
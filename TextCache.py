@@ -0,0 +1,135 @@
+import threading
+from collections import OrderedDict
+import pygame as pyg
+
+"""
+Shared cache of rendered text surfaces, used by the scenes and the UI classes instead of calling font.render every frame.
+Surfaces returned by the cache are shared so they must only be blitted, never drawn on.
+Fonts are part of the key, so a font's style (underline, bold...) must not change after it was first used
+"""
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces with a memory cap
+    """
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        """
+        :param max_bytes: Max amount of pixel memory the cached surfaces can take before evicting old ones
+        """
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        # (font, text, antialias, color, background) --> rendered surface, wrapped text uses the width instead of the
+        # background as the last item of the key
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # Scenes can be built on a background thread while the main thread renders
+
+    def render(self, font, text, antialias, color, background=None):
+        """
+        Same as font.render but returns a cached surface if the same text was already rendered
+        :param font: Font to render with
+        :param text: Text to render
+        :param antialias: Should the text be antialiased
+        :param color: Text color
+        :param background: Background color, None for a transparent background
+        :return: Rendered text surface
+        """
+        return self._get(("", font, text, antialias, color, background),
+                         lambda: font.render(text, antialias, color, background))
+
+    def render_wrapped(self, font, text, antialias, color, width):
+        """
+        Renders text wrapped into as many centered lines as needed to fit within a width, cached like render
+        :param font: Font to render with
+        :param text: Text to render
+        :param antialias: Should the text be antialiased
+        :param color: Text color
+        :param width: Max width of a line in pixels, a single word wider than this gets a line of its own
+        :return: Rendered text surface with a transparent background
+        """
+        return self._get(("wrap", font, text, antialias, color, width),
+                         lambda: _render_lines(font, wrap_text(font, text, width), antialias, color))
+
+    def _get(self, key, render):
+        """
+        Returns the cached surface of a key, rendering and caching it if needed
+        :param key: Cache key
+        :param render: Function that renders the surface
+        """
+        with self._lock:
+            surface = self._surfaces.get(key)
+            if surface is not None:
+                self._surfaces.move_to_end(key)  # Marking as recently used
+                self.hits += 1
+                return surface
+
+            self.misses += 1
+            surface = render()
+            self._surfaces[key] = surface
+            self.used_bytes += _surface_bytes(surface)
+            # Evicting the least recently used surfaces until we are back under the memory cap
+            while self.used_bytes > self.max_bytes and len(self._surfaces) > 1:
+                _, old_surface = self._surfaces.popitem(last=False)
+                self.used_bytes -= _surface_bytes(old_surface)
+            return surface
+
+    def clear(self):
+        """
+        Empties the cache
+        """
+        with self._lock:
+            self._surfaces.clear()
+            self.used_bytes = 0
+
+
+def wrap_text(font, text, width):
+    """
+    Greedily splits text into lines that fit within a width, measuring each word once
+    :param font: Font the text will be rendered with
+    :param text: Text to wrap
+    :param width: Max width of a line in pixels
+    :return: List of lines
+    """
+    space_width = font.size(" ")[0]
+    lines = []
+    line = []        # Words of the current line
+    line_width = 0   # Width of the current line
+    for word in text.split():
+        word_width = font.size(word)[0]
+        if line and line_width + space_width + word_width > width:
+            # Word doesn't fit, starting a new line with it
+            lines.append(" ".join(line))
+            line = [word]
+            line_width = word_width
+        else:
+            line_width += (space_width if line else 0) + word_width
+            line.append(word)
+    if line or not lines:
+        lines.append(" ".join(line))
+    return lines
+
+
+def _render_lines(font, lines, antialias, color):
+    """
+    Renders lines of text centered under each other into a single surface
+    """
+    line_surfaces = [font.render(line, antialias, color) for line in lines]
+    line_height = font.get_linesize()
+    surface = pyg.Surface((max(line.get_width() for line in line_surfaces), line_height * len(lines)), pyg.SRCALPHA)
+    for i, line in enumerate(line_surfaces):
+        surface.blit(line, ((surface.get_width() - line.get_width()) / 2, i * line_height))
+    return surface
+
+
+def _surface_bytes(surface):
+    """
+    Returns the amount of pixel memory a surface takes
+    """
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+text_cache = TextCache()        # Cache shared by the whole client
+render_text = text_cache.render  # Shortcut, use like font.render with the font as the first parameter
+render_wrapped = text_cache.render_wrapped  # Shortcut for rendering wrapped text
@@ -5,6 +5,7 @@
 # https://stackoverflow.com/questions/46390231/how-to-create-a-text-input-box-with-pygame/64613666#64613666
 
 import pygame
+from TextCache import render_text
 
 
 class TextInputBox(pygame.sprite.Sprite):
@@ -47,7 +48,7 @@ class TextInputBox(pygame.sprite.Sprite):
             box_text = self.text
             draw_color = self.text_color
 
-        t_surf = self.font.render(box_text, True, draw_color, self.backcolor)  # Text surface
+        t_surf = render_text(self.font, box_text, True, draw_color, self.backcolor)  # Text surface
         self.image = pygame.Surface((max(self.width, t_surf.get_width()+10), t_surf.get_height()+10), pygame.SRCALPHA)
         if self.backcolor:
             self.image.fill(self.backcolor)  # Filling back color
@@ -65,6 +66,7 @@ class TextInputBox(pygame.sprite.Sprite):
                 self.active = self.rect.collidepoint(event.pos)
 
             if event.type == pygame.KEYDOWN and self.active:
+                old_text = self.text
                 if event.key == pygame.K_RETURN:
                     self.active = False
                 elif event.key == pygame.K_BACKSPACE:
@@ -73,7 +75,8 @@ class TextInputBox(pygame.sprite.Sprite):
                     if self.max_letters is None or len(self.text) < self.max_letters:
                         if event.unicode.isalpha() or event.unicode.isdigit() or event.unicode == " ":
                             self.text += event.unicode
-                self._render_text()
+                if self.text != old_text:  # Only rendering again if the keystroke changed the text
+                    self._render_text()
 
     def get_text(self):
         """
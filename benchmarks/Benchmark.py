@@ -0,0 +1,113 @@
+import json
+import os
+import statistics
+import sys
+import time
+
+"""
+Minimal benchmark harness. Cases register a factory with the benchmark decorator, the factory does the setup and
+returns the function to time (or a tuple of the function and a cleanup function)
+"""
+
+# Making the client modules (repo root) and the server modules (Server folder) importable
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+server_dir = os.path.join(repo_dir, "Server")
+for path in (repo_dir, server_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+registry = {}  # Benchmark name --> factory
+
+
+def benchmark(name):
+    """
+    Decorator for registering a benchmark factory
+    :param name: Unique name of the benchmark
+    """
+    def register(factory):
+        registry[name] = factory
+        return factory
+    return register
+
+
+def measure(func, rounds=5, min_time=0.2):
+    """
+    Times a function, every round calls it repeatedly until min_time passes
+    :param func: Function with no parameters to time
+    :param rounds: Amount of rounds
+    :param min_time: Minimum seconds per round
+    :return: Dictionary of the per call statistics in seconds
+    """
+    func()  # Warming up
+    per_call = []
+    total_calls = 0
+    for _ in range(rounds):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        per_call.append(elapsed / calls)
+        total_calls += calls
+    return {"mean": statistics.mean(per_call), "min": min(per_call), "stdev": statistics.pstdev(per_call),
+            "calls": total_calls}
+
+
+def run(names, rounds=5, min_time=0.2):
+    """
+    Runs benchmarks and returns their results
+    :param names: Names of the benchmarks to run
+    :param rounds: Amount of rounds per benchmark
+    :param min_time: Minimum seconds per round
+    :return: Dictionary of benchmark name --> statistics
+    """
+    results = {}
+    for name in names:
+        made = registry[name]()
+        func, cleanup = made if isinstance(made, tuple) else (made, None)
+        try:
+            results[name] = measure(func, rounds, min_time)
+        finally:
+            if cleanup is not None:
+                cleanup()
+        print(f"{name:<40}{results[name]['mean'] * 1e6:>14.2f} us")
+    return results
+
+
+def save(results, path):
+    """
+    Saves results with some information about the machine as json
+    :param results: Results from run
+    :param path: Path of the json file
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as file:
+        json.dump({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "python": sys.version.split()[0],
+                   "platform": sys.platform, "results": results}, file, indent=2)
+
+
+def compare(results, old_path, threshold=0.1):
+    """
+    Prints the change of each benchmark compared to a previous results file
+    :param results: Results from run
+    :param old_path: Path of the previous json file
+    :param threshold: Relative slowdown that counts as a regression
+    :return: List of the names of the regressed benchmarks
+    """
+    with open(old_path) as file:
+        old_results = json.load(file)["results"]
+    regressions = []
+    for name, stats in results.items():
+        if name not in old_results:
+            continue
+        ratio = stats["mean"] / old_results[name]["mean"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<40}{old_results[name]['mean'] * 1e6:>14.2f} us -> {stats['mean'] * 1e6:>10.2f} us"
+              f"  ({ratio:.2f}x){flag}")
+    return regressions
@@ -0,0 +1,129 @@
+import os
+from Benchmark import benchmark
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Rendering without opening a window
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import pygame as pyg
+import Scenes
+import Messages
+from TextCache import render_text, wrap_text
+from Button import Button
+
+players = ["Alice", "Bob", "Charlie", "Dana", "Eve", "Frank", "Grace", "Heidi"]
+task = "Hold up the amount of fingers, that represents how handy you consider yourself around the house."
+
+
+def _init_scenes():
+    """
+    Initializes the scenes with a full lobby
+    """
+    if Scenes.screen is None:  # Setting a SCALED display mode a second time fails, initializing once
+        Scenes.init_scenes("127.0.0.1", (1200, 800))
+    Scenes.active_players.replace(enumerate(players))
+
+
+def _entries(values):
+    """
+    Formats values as the seat:value entries the server sends, seats are the value indexes
+    """
+    return "&".join(f"{seat}:{value}" for seat, value in enumerate(values))
+
+
+def _frame(scene):
+    """
+    Returns a function that draws a single frame of a scene
+    """
+    def frame():
+        scene.process_input([])
+        scene.draw()
+        pyg.display.flip()
+    return frame
+
+
+@benchmark("frame_lobby")
+def frame_lobby():
+    _init_scenes()
+    return _frame(Scenes.LobbyScene())
+
+
+@benchmark("frame_game_round")
+def frame_game_round():
+    _init_scenes()
+    scene = Scenes.GameRound()
+    scene.point_round()
+    scene.set_task(task)
+    return _frame(scene)
+
+
+@benchmark("frame_voting")
+def frame_voting():
+    _init_scenes()
+    scene = Scenes.VotingRound()
+    scene.set_answers(*Messages.parse("V" + _entries(players) + "&" + task))
+    return _frame(scene)
+
+
+@benchmark("frame_round_results")
+def frame_round_results():
+    _init_scenes()
+    scene = Scenes.RoundResults()
+    scene.set_player_points(Messages.parse("P" + _entries(seat * 25 for seat in range(len(players)))).points)
+    return _frame(scene)
+
+
+@benchmark("frame_final_results")
+def frame_final_results():
+    _init_scenes()
+    scene = Scenes.FinalResults()
+    scene.set_winners(*Messages.parse("W0:950&1:1125&1:1125"))
+    return _frame(scene)
+
+
+@benchmark("text_render")
+def text_render():
+    _init_scenes()
+    return lambda: [Scenes.player_name_font.render(f"{player} - 125", True, Scenes.black) for player in players]
+
+
+@benchmark("text_render_cached")
+def text_render_cached():
+    _init_scenes()
+    return lambda: [render_text(Scenes.player_name_font, f"{player} - 125", True, Scenes.black) for player in players]
+
+
+@benchmark("task_wrap")
+def task_wrap():
+    # Measuring and wrapping a long task, done once per task before the wrapped surface gets cached
+    _init_scenes()
+    return lambda: wrap_text(Scenes.task_font, task * 2, Scenes.screenWidth - 80)
+
+
+@benchmark("button_update")
+def button_update():
+    _init_scenes()
+    button = Button(Scenes.dark_beige, Scenes.darker_beige, 0, 0, 225, 70, font=Scenes.send_button_font, text="Send",
+                    text_color=Scenes.black)
+    return lambda: button.update([])
+
+
+@benchmark("frame_idle_lobby")
+def frame_idle_lobby():
+    # A frame where nothing changed, with dirty rect rendering nothing gets drawn
+    _init_scenes()
+    scene = Scenes.LobbyScene()
+
+    def frame():
+        scene.process_input([])
+        rects = scene.render()
+        if rects:
+            pyg.display.update(rects)
+    return frame
+
+
+@benchmark("message_parse")
+def message_parse():
+    # A burst of one of each message a client gets during a game
+    burst = ["Y", "L8&" + _entries(players), "J9&8:Ivan", "X10&8", "C&0", "CY", "TP" + task,
+             "V" + _entries(players) + "&" + task, "GT1F", "GF", "P" + _entries(seat * 25 for seat in range(len(players))),
+             "W0:950&1:1125&1:1125", "Q"]
+    return lambda: [Messages.parse(msg) for msg in burst]
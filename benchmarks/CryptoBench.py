@@ -0,0 +1,34 @@
+from Benchmark import benchmark
+from KeyComm import RSACipher, RSA_encrypt, AESCipher, gen_AES_key
+
+task = "Hold up the amount of fingers, that represents how handy you consider yourself around the house."
+
+
+@benchmark("aes_encrypt")
+def aes_encrypt():
+    cipher = AESCipher(gen_AES_key())
+    return lambda: cipher.encrypt(task)
+
+
+@benchmark("aes_decrypt")
+def aes_decrypt():
+    cipher = AESCipher(gen_AES_key())
+    enc = cipher.encrypt(task)
+    return lambda: cipher.decrypt(enc)
+
+
+@benchmark("rsa_keygen")
+def rsa_keygen():
+    # Done by every client when it starts
+    return RSACipher
+
+
+@benchmark("rsa_handshake")
+def rsa_handshake():
+    # Server encrypts a new AES key with the client's public key and the client decrypts it
+    client_rsa = RSACipher()
+    public_key = client_rsa.key.publickey().exportKey()
+
+    def handshake():
+        client_rsa.decrypt(RSA_encrypt(gen_AES_key(), public_key))
+    return handshake
@@ -0,0 +1,48 @@
+import argparse
+import importlib
+import os
+import sys
+import time
+import Benchmark
+
+"""
+Runs the benchmark suite and saves the results as json, optionally comparing them to a previous run.
+Example: python benchmarks/RunBenchmarks.py --compare benchmarks/results/last.json
+"""
+
+case_modules = ("CryptoBench", "ServerBench", "ClientBench")  # Modules that register benchmarks
+results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the benchmark suite")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=5, help="Rounds per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per round")
+    parser.add_argument("--output", help="Path of the results json, defaults to a new file in benchmarks/results")
+    parser.add_argument("--compare", help="Path of a previous results json to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    for module in case_modules:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:  # pygame or Cryptodome may be missing on a server-only machine
+            print(f"Skipping {module}: {e}")
+
+    names = [name for name in Benchmark.registry if args.filter in name]
+    results = Benchmark.run(names, args.rounds, args.min_time)
+
+    regressions = []
+    if args.compare:
+        regressions = Benchmark.compare(results, args.compare, args.threshold)
+
+    output = args.output or os.path.join(results_dir, time.strftime("%Y%m%d_%H%M%S.json"))
+    Benchmark.save(results, output)
+    Benchmark.save(results, os.path.join(results_dir, "last.json"))  # Saved after comparing, it may be the old file
+    print(f"Saved results to {output}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
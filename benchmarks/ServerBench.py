@@ -0,0 +1,128 @@
+import os
+import queue
+import select
+import socket
+import threading
+import time
+from Benchmark import benchmark, server_dir
+from KeyComm import gen_AES_key
+from Player import Player
+from Servercom import ServerComm
+from Replay import ReplayComm
+from Standings import Standings, FAKER, DETECTIVE
+from TaskDatabase import TaskDatabase
+import Phases
+
+
+def _loopback_pair(listener):
+    """
+    Returns a connected (server side, client side) pair of tcp sockets over the loopback interface
+    """
+    client = socket.create_connection(listener.getsockname())
+    server, _ = listener.accept()
+    return server, client
+
+
+def _make_broadcast(player_count, encrypted):
+    """
+    Creates a ServerComm with player_count loopback clients and returns a function broadcasting one message to them
+    """
+    comm = ServerComm(0, queue.Queue())
+    # Letting the receiving thread block on its listening socket first, so it never sees the injected sockets
+    while comm.socket is None:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    listener = socket.create_server(("127.0.0.1", 0))
+    clients = []
+    for seat in range(player_count):
+        server_side, client_side = _loopback_pair(listener)
+        comm.open_clients[server_side] = Player("127.0.0.1", gen_AES_key(), f"player{seat}", seat)
+        clients.append(client_side)
+
+    # Draining the client sides on another thread so the socket buffers never fill up
+    running = True
+
+    def drain():
+        while running:
+            ready, _, _ = select.select(clients, [], [], 0.1)
+            for client in ready:
+                client.recv(65536)
+    drain_thread = threading.Thread(target=drain, daemon=True)
+    drain_thread.start()
+
+    def cleanup():
+        nonlocal running
+        running = False
+        drain_thread.join()
+        server_sides = list(comm.open_clients.keys())
+        comm.open_clients.clear()
+        for sock in server_sides + clients + [listener]:
+            sock.close()
+
+    if encrypted:
+        return (lambda: comm.send_all_exl_encrypted("TPPoint at the person who will probably outlive you all.", None),
+                cleanup)
+    return (lambda: comm.send_all("L4&0:Player1&1:Player2&2:Player3&3:Player4"), cleanup)
+
+
+for _count in (4, 16, 64):
+    benchmark(f"broadcast[n={_count}]")(lambda count=_count: _make_broadcast(count, False))
+    benchmark(f"broadcast_encrypted[n={_count}]")(lambda count=_count: _make_broadcast(count, True))
+
+
+def _make_goto_results(player_count):
+    """
+    Creates a round with player_count players and returns a function scoring a vote where half found the faker
+    """
+    comm = ReplayComm()
+    for seat in range(player_count):
+        comm.join(seat, f"player{seat}")
+    round_phase = Phases.Round(comm, queue.Queue(), None, Standings(), wait=lambda seconds: None)
+    round_phase.choose_faker()
+    round_phase.reset_round_points()
+    round_phase.task_counter = 3  # Last task, so scoring doesn't draw another task
+    players = list(comm.open_clients.values())
+    faker_seat = str(comm.open_clients[round_phase.faker[0]].seat)
+
+    def goto_results():
+        for index, player in enumerate(players):
+            # Half vote for the faker, the rest vote for the next player
+            player.current_ans = faker_seat if index % 2 else str(players[(index + 1) % player_count].seat)
+        round_phase.is_in_voting = True
+        round_phase._goto_results()
+        while not round_phase.events.empty():
+            round_phase.events.get()
+    return goto_results
+
+
+for _count in (4, 16, 64):
+    benchmark(f"goto_results[n={_count}]")(lambda count=_count: _make_goto_results(count))
+
+
+def _make_final_results(player_count):
+    """
+    Creates a final screen with player_count players that each scored a few times and returns a function broadcasting
+    the final results
+    """
+    comm = ReplayComm()
+    standings = Standings()
+    for seat in range(player_count):
+        comm.join(seat, f"player{seat}")
+        for task in range(1, 4):
+            standings.award(seat, DETECTIVE if (seat + task) % 2 else FAKER, 50 * task + seat % 5)
+    final_screen = Phases.FinalScreen(comm, queue.Queue(), standings, wait=lambda seconds: None)
+
+    def final_results():
+        final_screen.broadcast_final_results()
+        final_screen.events.get()
+    return final_results
+
+
+for _count in (4, 16, 64):
+    benchmark(f"final_results[n={_count}]")(lambda count=_count: _make_final_results(count))
+
+
+@benchmark("task_draw")
+def task_draw():
+    task_db = TaskDatabase(os.path.join(server_dir, "task_database"))
+    return task_db.task_point
@@ -0,0 +1,72 @@
+import os
+import sys
+import threading
+import time
+import pytest
+import pygame as pyg
+
+# Making the client modules (game folder) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Assets import AssetManager, asset_dir
+
+"""
+Tests of the asset manager - every asset is loaded once and shared, even when several threads ask for it at the same
+time
+"""
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """
+    Asset manager whose image and font loading is slowed down, so threads asking for the same asset overlap
+    """
+    pyg.font.init()
+    load_image, load_font = pyg.image.load, pyg.font.Font
+
+    def slow_image(*args):
+        time.sleep(0.05)
+        return load_image(*args)
+
+    def slow_font(*args):
+        time.sleep(0.05)
+        return load_font(*args)
+
+    monkeypatch.setattr(pyg.image, "load", slow_image)
+    monkeypatch.setattr(pyg.font, "Font", slow_font)
+    return AssetManager(asset_dir)
+
+
+loaders = {
+    "image": lambda manager: manager.image("Icon.png", convert=False),
+    "bundled font": lambda manager: manager.font("DejaVuSans", 20),
+    "default font": lambda manager: manager.font(None, 20, underline=True),
+    "lazy font": lambda manager: manager.lazy_font("DejaVuSans", 20).get(),
+}
+
+
+@pytest.mark.parametrize("asset", loaders)
+@pytest.mark.parametrize("threads", [2, 8])
+def test_concurrent_gets_load_once(manager, asset, threads):
+    barrier = threading.Barrier(threads)
+    loaded = []
+
+    def get():
+        barrier.wait()
+        loaded.append(loaders[asset](manager))
+
+    workers = [threading.Thread(target=get) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(manager.load_times) == 1
+    assert len(loaded) == threads
+    assert all(item is loaded[0] for item in loaded)
+
+
+def test_different_keys_load_separately(manager):
+    fonts = [manager.font("DejaVuSans", 20), manager.font("DejaVuSans", 20, underline=True),
+             manager.font("DejaVuSans", 30)]
+    assert len({id(font) for font in fonts}) == 3
+    assert manager.font("DejaVuSans", 30) is fonts[2]
+    assert len(manager.load_times) == 3
@@ -0,0 +1,73 @@
+import os
+import sys
+import pytest
+
+# Making the client modules (game folder) and the server's framing importable
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root)
+sys.path.append(os.path.join(root, "Server"))
+from Clientcom import ClientComm, frame_msg
+from KeyComm import AESCipher, gen_AES_key
+from Servercom import frame
+
+"""
+Tests of the client's receive buffer - whatever way the server's frames are split by the network, the same messages
+come out in order, and pings are answered without reaching the main client program
+"""
+
+long_msg = "L" + "&".join(f"{seat}:player{seat}" for seat in range(12))  # Over 99 bytes, framed with a long header
+
+
+def _client():
+    """
+    Returns a client comm with an AES key, as if it already traded keys with the server
+    """
+    client = ClientComm("127.0.0.1", 0)
+    client.AES_cipher = AESCipher(gen_AES_key())
+    return client
+
+
+def _encrypted(client, msg):
+    """
+    Frames a message the way the server sends encrypted messages
+    """
+    enc_data = client.AES_cipher.encrypt(msg)
+    return b"04!ENC" + str(len(enc_data)).zfill(3).encode() + enc_data
+
+
+def _stream(client):
+    """
+    Returns the bytes of a few frames of every kind and the messages they hold
+    """
+    data = frame(b"Y") + frame(b"H") + frame(long_msg.encode()) + _encrypted(client, "Tpoint at") + frame(b"G0")
+    return data, ["Y", long_msg, "Tpoint at", "G0"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 64, None])
+def test_split_frames_parse_the_same(chunk_size):
+    client = _client()
+    data, expected = _stream(client)
+    chunk_size = chunk_size or len(data)
+    messages = []
+    for start in range(0, len(data), chunk_size):
+        client._in_buffer += data[start:start + chunk_size]
+        messages += client._parse_messages()
+    assert messages == expected
+    assert client._in_buffer == b""
+    assert client._out_buffer == frame_msg("H")  # The ping was answered once
+
+
+@pytest.mark.parametrize("partial", [b"0", b"04!EN", b"04!ENC1", b"04!LNG012", b"04!LNG0120L0:a"])
+def test_incomplete_frame_waits(partial):
+    client = _client()
+    client._in_buffer += frame(b"Y") + partial
+    assert client._parse_messages() == ["Y"]
+    assert client._in_buffer == partial  # Kept for when the rest arrives
+
+
+@pytest.mark.parametrize("pings", [1, 3])
+def test_pings_are_answered_once_each(pings):
+    client = _client()
+    client._in_buffer += frame(b"H") * pings + _encrypted(client, "H")
+    assert client._parse_messages() == []
+    assert client._out_buffer == frame_msg("H") * (pings + 1)
@@ -0,0 +1,85 @@
+import os
+import sys
+import pytest
+
+# Making the client modules (game folder) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Messages
+from Messages import (UsernameApproved, UsernameDenied, SpectatingApproved, PlayerList, PlayerJoined, PlayerLeft,
+                      BackToLobby, Ping, CategoryTurn, Task, Answers, VoteResult, RoundPoints, Winners, Score)
+
+"""
+Tests of the server message parser - every message the server sends becomes its typed tuple, and malformed messages
+raise ValueError instead of reaching the handlers half parsed
+"""
+
+
+@pytest.mark.parametrize("msg, message", [
+    ("Y", UsernameApproved()),
+    ("NUsername taken", UsernameDenied("Username taken")),
+    ("O", SpectatingApproved()),
+    ("L0", PlayerList(0, [])),
+    ("L3&0:alice&4:bob", PlayerList(3, [(0, "alice"), (4, "bob")])),
+    ("J7&12:carol", PlayerJoined(7, 12, "carol")),
+    ("X8&12", PlayerLeft(8, 12)),
+    ("Q", BackToLobby()),
+    ("H", Ping()),
+    ("CY", CategoryTurn(None)),
+    ("C&3", CategoryTurn(3)),
+    ("TPPoint at the tallest player", Task("P", "Point at the tallest player")),
+    ("TN", Task("N", "")),
+    ("V0:alice&2:bob&Who is it?", Answers({0: "alice", 2: "bob"}, "Who is it?")),
+    ("VWho is it?", Answers({}, "Who is it?")),
+    ("GF", VoteResult(None, False)),
+    ("GT5T", VoteResult(5, True)),
+    ("GT10F", VoteResult(10, False)),
+    ("P0:3&2:0&5:-1", RoundPoints({0: 3, 2: 0, 5: -1})),
+    ("W1:6&:0&3:9", Winners(Score(1, 6), Score(None, 0), Score(3, 9))),
+])
+def test_parse(msg, message):
+    assert Messages.parse(msg) == message
+
+
+@pytest.mark.parametrize("msg", [
+    "",
+    "Z",
+    "Lx&0:alice",
+    "L1&alice",
+    "L1&a:alice",
+    "J1&alice",
+    "X1&",
+    "Xa&1",
+    "C",
+    "C3",
+    "C&",
+    "TX task",
+    "T",
+    "V0alice&task",
+    "Vx:alice&task",
+    "G",
+    "GT",
+    "GTF",
+    "GX1T",
+    "GT1X",
+    "P0:x",
+    "P0",
+    "W1:6&3:9",
+    "W1:6&:0&3:9&4:1",
+    "W1&:0&3:9",
+])
+def test_malformed_messages_raise(msg):
+    with pytest.raises(ValueError):
+        Messages.parse(msg)
+
+
+@pytest.mark.parametrize("message", [Ping(), Task("R", "Raise your hand"), UsernameDenied("")])
+def test_dispatch_calls_the_message_handler(message):
+    handled = []
+    handlers = {message_type: (lambda m, message_type=message_type: handled.append((message_type, m)))
+                for message_type in (Ping, Task, UsernameDenied)}
+    Messages.dispatch(handlers, message)
+    assert handled == [(type(message), message)]
+
+
+def test_dispatch_ignores_messages_without_handler():
+    Messages.dispatch({Ping: pytest.fail}, BackToLobby())
@@ -0,0 +1,137 @@
+import os
+import queue
+import random
+import sys
+import pytest
+
+# Making the server modules (Server folder) and the client's message parser importable
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(root, "Server"))
+sys.path.append(root)
+import Messages
+from Phases import Round
+from Replay import ReplayComm
+from Standings import Standings
+
+"""
+Tests of the round phase - what players send is checked before it reaches the broadcasts every client parses, and
+votes name players by their seat
+"""
+
+task = "Point at the player who would survive a zombie apocalypse"
+
+
+class SentComm(ReplayComm):
+    """
+    ReplayComm that keeps every message sent to everyone
+    """
+    def __init__(self):
+        ReplayComm.__init__(self)
+        self.broadcasts = []
+
+    def send_all(self, data):
+        ReplayComm.send_all(self, data)
+        self.broadcasts.append(data)
+
+
+def _answering_round(usernames, seats=None):
+    """
+    Returns a round waiting for answers to the task and its SentComm, with a player in each seat
+    :param usernames: Usernames of the players
+    :param seats: Seat of each player, 0, 1, 2... if None
+    """
+    comm = SentComm()
+    for seat, username in zip(seats or range(len(usernames)), usernames):
+        comm.join(seat, username)
+    game_round = Round(comm, queue.Queue(), None, Standings(), random.Random(0), lambda seconds: None)
+    game_round.cur_task = task
+    return game_round, comm
+
+
+@pytest.mark.parametrize("answer, stored", [
+    ("bob", "bob"),
+    ("a&b", "ab"),
+    ("1:2", "12"),
+    ("x&1:y&" + task, "x1y" + task),
+])
+def test_answers_broadcast_parses(answer, stored):
+    game_round, comm = _answering_round(["alice", "bob", "carol", "dave"])
+    for seat, msg in enumerate(["Acarol", "Aalice", "A" + answer, "Abob"]):
+        comm.receive(seat, msg)
+    game_round.process_queue()
+
+    assert game_round.is_in_voting
+    message = Messages.parse(comm.broadcasts[-1])
+    assert message == Messages.Answers({0: "carol", 1: "alice", 2: stored, 3: "bob"}, task)
+
+
+@pytest.mark.parametrize("empty", ["A", "A&", "A:&:"])
+def test_empty_answers_are_ignored(empty):
+    game_round, comm = _answering_round(["alice", "bob", "carol", "dave"])
+    for seat in range(3):
+        comm.receive(seat, "Abob")
+    comm.receive(3, empty)
+    game_round.process_queue()
+    assert not game_round.is_in_voting  # Still waiting for the last player
+
+    comm.receive(3, "Acarol")
+    game_round.process_queue()
+    assert Messages.parse(comm.broadcasts[-1]).answers == {0: "bob", 1: "bob", 2: "bob", 3: "carol"}
+
+
+seats = [0, 3, 7, 12]  # Seats with gaps, as after players left and joined
+
+
+def _voting_round():
+    """
+    Returns a round on its last task waiting for votes, with dave in seat 12 as the faker, and its SentComm
+    """
+    game_round, comm = _answering_round(["alice", "bob", "carol", "dave"], seats)
+    game_round.task_counter = 3
+    game_round.cur_category = "P"
+    game_round.faker = (comm.seats[12], "dave")
+    game_round.faker_seat = 12
+    game_round.is_in_voting = True
+    game_round.reset_history()
+    game_round.reset_round_points()
+    return game_round, comm
+
+
+@pytest.mark.parametrize("vote", ["", "x", "-3", "1", "3.0", " 3", "99", "alice"])
+def test_invalid_votes_are_ignored(vote):
+    game_round, comm = _voting_round()
+    for seat in seats[:3]:
+        comm.receive(seat, "V12")
+    comm.receive(12, "V" + vote)
+    game_round.process_queue()
+    assert comm.open_clients[comm.seats[12]].current_ans == ""
+    assert not any(broadcast.startswith("G") for broadcast in comm.broadcasts)  # Still waiting for the last vote
+
+
+@pytest.mark.parametrize("votes, result", [
+    ({0: "12", 3: "12", 7: "12", 12: "0"}, Messages.VoteResult(12, True)),
+    ({0: "7", 3: "7", 7: "12", 12: "7"}, Messages.VoteResult(7, False)),
+    ({0: "3", 3: "0", 7: "12", 12: "3"}, Messages.VoteResult(None, False)),
+])
+def test_votes_name_seats(votes, result):
+    game_round, comm = _voting_round()
+    for seat, vote in votes.items():
+        comm.receive(seat, "V" + vote)
+    game_round.process_queue()
+    vote_results = [broadcast for broadcast in comm.broadcasts if broadcast.startswith("G")]
+    assert [Messages.parse(broadcast) for broadcast in vote_results] == [result]
+    assert game_round.votes == [(3, seat, int(vote)) for seat, vote in votes.items()]
+
+
+def test_votes_for_a_player_that_left_are_not_counted():
+    game_round, comm = _voting_round()
+    for seat in seats[:3]:
+        comm.receive(seat, "V7")
+    game_round.process_queue()
+    comm.disconnect(7)
+    comm.receive(12, "V7")  # Seat 7 left, the vote is ignored
+    game_round.process_queue()
+    assert comm.open_clients[comm.seats[12]].current_ans == ""
+    comm.receive(12, "V0")
+    game_round.process_queue()
+    assert game_round.votes == [(3, 12, 0)]  # The votes for seat 7 aren't counted either
@@ -0,0 +1,126 @@
+import os
+import random
+import struct
+import sys
+import pytest
+
+# Making the server modules (Server folder) importable
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Server"))
+import Recorder
+from GameFlow import State
+from Recorder import Recorder as SessionRecorder, read_records, JOIN, MESSAGE, DISCONNECT, STEP, RELOAD
+from Replay import ReplayComm, replay
+from Room import Room
+from TaskDatabase import TaskSnapshot, task_tables
+
+"""
+Tests of recording and replaying sessions - a replay takes the recorded messages in the recorded steps and swaps in
+the recorded task reloads, so it sends exactly what the recorded room sent. Recordings of other format versions are
+refused
+"""
+
+steps = 3000  # Steps of the room in a recorded session
+
+
+def _snapshot(name, size):
+    """
+    Returns a snapshot with size tasks in every category table, named after the snapshot. A game doesn't repeat
+    tasks, so a snapshot needs a task for every task of a game (up to 15) in each category
+    """
+    tasks = {table: {task_id: f"{name} {table} {task_id}" for task_id in range(1, size + 1)} for table in task_tables}
+    return TaskSnapshot(tasks, {table: list(table_tasks) for table, table_tasks in tasks.items()})
+
+
+def _random_msg(rng, seats):
+    """
+    Returns a random message a player could send at any point of the game
+    """
+    return rng.choice(["RY", "RY", "RN", "CPOINT", "CNUMBER", "CRAISE", "Abob", "A42", "A", f"V{rng.choice(seats)}"])
+
+
+def _record_session(path, seed):
+    """
+    Runs a room over a ReplayComm with random players sending random messages in random batches, recording it like
+    the server does
+    """
+    recorder = SessionRecorder(path)
+    comm = ReplayComm(log_sent=True)  # Printing what's sent the same way replaying does
+    room = Room(comm, _snapshot("first", 20), seed=seed, wait=lambda seconds: None, recorder=recorder)
+    recorder.record_seed(room.seed)
+    rng = random.Random(seed)
+    next_seat = 0
+    for step in range(steps):
+        # Players join in the lobby and leave at any time, keeping enough of them to play
+        if len(comm.open_clients) < 5 and room.state == State.LOBBY and rng.random() < 0.2:
+            recorder.record(JOIN, next_seat, f"player{next_seat}")
+            comm.join(next_seat, f"player{next_seat}")
+            next_seat += 1
+        elif len(comm.open_clients) > 4 and rng.random() < 0.01:
+            seat = rng.choice(list(comm.seats))
+            recorder.record(DISCONNECT, seat)
+            comm.disconnect(seat)
+        if step == 200:
+            room.reload_tasks(_snapshot("second", 15))  # Most likely during a game
+        # A random batch of messages, the room takes them all in its next step
+        for _ in range(rng.choice([0, 0, 1, 2, 5]) if comm.seats else 0):
+            seat = rng.choice(list(comm.seats))
+            msg = _random_msg(rng, list(comm.seats))
+            recorder.record(MESSAGE, seat, msg)
+            comm.receive(seat, msg)
+        room.step()
+    recorder.close()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_replay_sends_what_the_room_sent(tmp_path, capsys, seed):
+    path = str(tmp_path / "session.rec")
+    _record_session(path, seed)
+    sent = capsys.readouterr().out
+    assert ": W" in sent  # At least a whole game was played
+
+    records = list(read_records(path))
+    kinds = [kind for (_, kind, _, _) in records]
+    assert kinds.count(RELOAD) == 1
+    assert kinds.count(STEP) < steps  # Steps that took nothing aren't recorded
+
+    replay(records, _snapshot("first", 20), log_sent=True)
+    assert capsys.readouterr().out == sent
+    assert "second" in sent  # Tasks of the reload were sent after it was swapped in
+
+
+@pytest.mark.parametrize("header", [
+    b"",
+    b"FKRC",
+    struct.pack("<dcIH", 0.0, b"S", 0, 1) + b"1",  # Recorded before recordings had a version
+    struct.pack("<4sH", b"FKRC", Recorder.version + 1),
+    struct.pack("<4sH", b"FKRC", Recorder.version - 1),
+])
+def test_other_formats_are_refused(tmp_path, header):
+    path = tmp_path / "session.rec"
+    path.write_bytes(header)
+    with pytest.raises(ValueError):
+        list(read_records(str(path)))
+
+
+def test_records_round_trip(tmp_path):
+    path = str(tmp_path / "session.rec")
+    tasks = _snapshot("reloaded", 3)
+    recorder = SessionRecorder(path)
+    recorder.record_seed(7)
+    recorder.record(JOIN, 70000, "alice")
+    recorder.record(MESSAGE, 70000, "Aé&:")
+    recorder.record_step(1)
+    recorder.record_reload(tasks)
+    recorder.record(DISCONNECT, 70000)
+    recorder.close()
+    SessionRecorder(path).close()  # Reopening appends without another file header
+
+    records = [(kind, seat, payload) for (_, kind, seat, payload) in read_records(path)]
+    assert records[:4] == [(Recorder.SEED, 0, "7"), (JOIN, 70000, "alice"), (MESSAGE, 70000, "Aé&:"), (STEP, 0, "1")]
+    assert records[5] == (DISCONNECT, 70000, "")
+    kind, _, payload = records[4]
+    assert kind == RELOAD
+    reloaded = TaskSnapshot.from_json(payload)
+    assert reloaded.to_json() == tasks.to_json()
+    for seed in range(10):  # Draws the same tasks
+        assert reloaded.task_point(random.Random(seed)) == tasks.task_point(random.Random(seed))
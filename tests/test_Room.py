@@ -0,0 +1,106 @@
+import itertools
+import os
+import sys
+import pytest
+
+# Making the server modules (Server folder) importable
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Server"))
+from GameFlow import State, AllReady, CategoryChosen, RoundOver, GameOver, ResultsShown, NotEnoughPlayers
+from Metrics import metrics
+from Phases import min_players
+from Replay import ReplayComm
+from Room import Room, transitions
+from TaskDatabase import TaskSnapshot, task_tables
+
+"""
+Tests of the room's transition table - events without a transition from the current state are ignored without
+touching the room, and a draining room never leaves the lobby. Reloaded tasks only reach the game between games
+"""
+
+events = [AllReady(), CategoryChosen("P"), RoundOver(), GameOver(), ResultsShown(), NotEnoughPlayers()]
+# (State, event) pairs without a transition
+invalid = [(state, event) for state, event in itertools.product(State, events)
+           if (state, type(event)) not in transitions]
+
+
+def _room(tasks=None):
+    """
+    Returns a room in the lobby with enough players in it for a game, over a ReplayComm
+    :param tasks: Tasks the room draws from
+    """
+    comm = ReplayComm()
+    for seat in range(min_players):
+        comm.join(seat, f"player{seat}")
+    return Room(comm, tasks, seed=0, wait=lambda seconds: None)
+
+
+def _snapshot(*empty):
+    """
+    Returns a snapshot with a task in every category table but the empty ones
+    """
+    tasks = {table: {} if table in empty else {1: f"{table} task"} for table in task_tables}
+    return TaskSnapshot(tasks, {table: list(table_tasks) for table, table_tasks in tasks.items()})
+
+
+@pytest.mark.parametrize("state, event", invalid, ids=lambda item: getattr(item, "name", type(item).__name__))
+def test_invalid_transitions_are_ignored(state, event):
+    room = _room()
+    room.state = state
+    room.cur_phase = room.phases[state]
+    ignored = metrics.counters[("ignored_events", type(event).__name__)]
+
+    room.handle_event(event)
+    assert room.state == state
+    assert room.cur_phase is room.phases[state]
+    assert room.server_comm.frames_sent == 0  # The transition's action never ran
+    assert room.events.empty()
+    assert metrics.counters[("ignored_events", type(event).__name__)] == ignored + 1
+
+
+def test_stale_event_between_steps_is_ignored():
+    # A category chosen right as players left reaches the room after it went back to the lobby
+    room = _room()
+    room.events.put(AllReady())
+    room.step()
+    assert room.state == State.CHOOSING_CATEGORY
+    room.events.put(NotEnoughPlayers())
+    room.events.put(CategoryChosen("P"))
+    room.step()
+    assert room.state == State.LOBBY
+    assert room.cur_phase is room.connecting_and_lobby
+
+
+@pytest.mark.parametrize("draining", [False, True])
+def test_draining_room_stays_in_the_lobby(draining):
+    room = _room()
+    if draining:
+        room.drain()
+    room.handle_event(AllReady())
+    assert room.state == (State.LOBBY if draining else State.CHOOSING_CATEGORY)
+    assert room.server_comm.is_in_progress != draining
+
+
+@pytest.mark.parametrize("empty", [("pointTask",), ("raiseTask", "numberTask"), task_tables])
+def test_reload_with_an_empty_category_is_refused(empty):
+    tasks = _snapshot()
+    room = _room(tasks)
+    with pytest.raises(ValueError):
+        room.reload_tasks(_snapshot(*empty))
+    room.step()
+    assert room.game_round.task_source is tasks
+
+
+@pytest.mark.parametrize("state", [state for state in State if state != State.LOBBY])
+def test_reload_waits_for_the_game_to_end(state):
+    tasks, new_tasks = _snapshot(), _snapshot()
+    room = _room(tasks)
+    room.state = state
+    room.cur_phase = room.phases[state]
+    room.reload_tasks(new_tasks)
+    room.step()
+    assert room.game_round.task_source is tasks
+
+    room.state = State.LOBBY
+    room.cur_phase = room.phases[State.LOBBY]
+    room.step()
+    assert room.game_round.task_source is new_tasks
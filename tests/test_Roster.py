@@ -0,0 +1,89 @@
+import os
+import sys
+import pytest
+
+# Making the client modules (game folder) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Roster import PlayerRoster
+
+"""
+Tests of the client's player list - deltas apply only in sequence, duplicates and deltas older than the last snapshot
+are ignored, and a gap asks for a snapshot without touching the list
+"""
+
+
+def _roster():
+    """
+    Returns a roster with alice in seat 0 and bob in seat 3, at sequence number 5
+    """
+    return PlayerRoster([(0, "alice"), (3, "bob")], 5)
+
+
+@pytest.mark.parametrize("seq, in_sync, players", [
+    (6, True, [(0, "alice"), (3, "bob"), (7, "carol")]),  # Next delta, applied
+    (5, True, [(0, "alice"), (3, "bob")]),                # Duplicate of the last update, ignored
+    (2, True, [(0, "alice"), (3, "bob")]),                # Older than the snapshot, already part of it
+    (7, False, [(0, "alice"), (3, "bob")]),               # A delta was missed
+    (50, False, [(0, "alice"), (3, "bob")]),
+])
+def test_add(seq, in_sync, players):
+    roster = _roster()
+    assert roster.add(7, "carol", seq) == in_sync
+    assert list(roster.items()) == players
+    assert roster.seq == (6 if seq == 6 else 5)
+
+
+@pytest.mark.parametrize("seq, in_sync, players", [
+    (6, True, [(3, "bob")]),
+    (5, True, [(0, "alice"), (3, "bob")]),
+    (1, True, [(0, "alice"), (3, "bob")]),
+    (8, False, [(0, "alice"), (3, "bob")]),
+])
+def test_remove(seq, in_sync, players):
+    roster = _roster()
+    assert roster.remove(0, seq) == in_sync
+    assert list(roster.items()) == players
+    assert ("alice" in roster) == (seq != 6)
+
+
+@pytest.mark.parametrize("order", [
+    [6, 7, 8],
+    [6, 6, 7, 7, 8, 8],   # Every delta twice
+    [6, 5, 7, 4, 8],      # Old deltas in between
+])
+def test_deltas_in_order(order):
+    roster = _roster()
+    deltas = {6: lambda seq: roster.add(7, "carol", seq),
+              7: lambda seq: roster.remove(3, seq),
+              8: lambda seq: roster.add(9, "dave", seq),
+              5: lambda seq: roster.add(4, "stale", seq),
+              4: lambda seq: roster.remove(0, seq)}
+    assert all(deltas[seq](seq) for seq in order)
+    assert list(roster.items()) == [(0, "alice"), (7, "carol"), (9, "dave")]
+    assert roster.seq == 8
+
+
+@pytest.mark.parametrize("order", [[7, 6, 8], [8, 6, 7], [6, 8, 7]])
+def test_out_of_order_deltas_need_a_snapshot(order):
+    roster = _roster()
+    deltas = {6: lambda seq: roster.add(7, "carol", seq),
+              7: lambda seq: roster.remove(3, seq),
+              8: lambda seq: roster.add(9, "dave", seq)}
+    results = [deltas[seq](seq) for seq in order]
+    assert not all(results)  # A delta arrived before the one it follows
+
+    # The snapshot the client asks for replaces the list, later deltas apply on top of it
+    roster.replace([(0, "alice"), (7, "carol"), (9, "dave")], 8)
+    assert roster.add(10, "erin", 9)
+    assert roster.copy() == ["alice", "carol", "dave", "erin"]
+    assert roster.seat("erin") == 10 and roster.name(3) is None
+
+
+def test_seat_lookups_follow_the_deltas():
+    roster = _roster()
+    roster.remove(3, 6)
+    roster.add(3, "bobby", 7)  # The server can give a freed seat to a new player
+    assert roster.seat("bob") is None and "bob" not in roster
+    assert roster.seat("bobby") == 3 and roster.name(3) == "bobby"
+    assert roster.name(12, "left") == "left"
+    assert len(roster) == 2 and list(roster) == ["alice", "bobby"]
@@ -0,0 +1,103 @@
+import os
+import socket
+import sys
+import time
+import pytest
+
+# Making the server modules (Server folder) importable
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Server"))
+import Servercom
+from Servercom import ServerComm
+from RateLimit import FairQueue
+from KeyComm import RSACipher
+
+"""
+Tests of the server's receiving loop over loopback connections - clients that stop sending in the middle of a frame
+or a handshake never hold up the loop
+"""
+
+rsa_cipher = RSACipher()  # Generating an RSA key is slow, every test client shares this one
+
+
+@pytest.fixture
+def comm():
+    server_comm = ServerComm(0, FairQueue())
+    while server_comm.socket is None:  # Waiting for the receiving thread to start listening
+        time.sleep(0.01)
+    yield server_comm
+    server_comm.close()
+
+
+def _connect(server_comm, trade_keys=True):
+    """
+    Connects a client to the server
+    :param server_comm: ServerComm to connect to
+    :param trade_keys: Should the client trade keys before returning
+    :return: Client socket, times out after 5 seconds
+    """
+    client = socket.create_connection(server_comm.socket.getsockname(), timeout=5)
+    if trade_keys:
+        client.sendall(rsa_cipher.key.publickey().exportKey())
+        _recv_exactly(client, 172)  # Encrypted AES key
+    return client
+
+
+def _recv_exactly(client, size):
+    """
+    Receives exactly size bytes, empty bytes if the server closed the connection first
+    """
+    data = b""
+    while len(data) < size:
+        chunk = client.recv(size - len(data))
+        if not chunk:
+            return b""
+        data += chunk
+    return data
+
+
+def _recv_frame(client):
+    """
+    Receives a frame with 2 digits of length
+    :return: Message (Bytes), empty bytes if the server closed the connection
+    """
+    data_len = _recv_exactly(client, 2)
+    return _recv_exactly(client, int(data_len)) if data_len else b""
+
+
+def _frame(msg):
+    return str(len(msg)).zfill(2).encode() + msg
+
+
+@pytest.mark.parametrize("partial", [b"0", b"05U", b"06Ualic"])
+def test_stalled_join_times_out(comm, monkeypatch, partial):
+    # The timing wheel is advanced by the receiving loop, so it only fires if the loop isn't stuck on the stalled client
+    monkeypatch.setattr(Servercom, "username_timeout", 0.5)
+    stalled = _connect(comm)
+    stalled.sendall(partial)
+    start = time.monotonic()
+    assert stalled.recv(16) == b""  # Disconnected
+    assert time.monotonic() - start < 3
+
+
+@pytest.mark.parametrize("trade_keys, partial", [(False, b"x" * 100), (True, b"0"), (True, b"05U")])
+def test_stalled_client_does_not_block_others(comm, trade_keys, partial):
+    stalled = _connect(comm, trade_keys)
+    stalled.sendall(partial)
+    time.sleep(0.2)  # Letting the receiving loop read the partial frame first
+    client = _connect(comm)
+    client.sendall(_frame(b"Ualice"))
+    assert _recv_frame(client) == b"Y"
+    assert _recv_frame(client) == b"L1&0:alice"
+    # Messages of the approved player keep reaching the room
+    client.sendall(_frame(b"RY"))
+    assert comm.msg_q.get(timeout=5)[1] == "RY"
+    stalled.close()
+
+
+def test_frame_arriving_in_pieces(comm):
+    client = _connect(comm)
+    client.sendall(b"06Ual")
+    time.sleep(0.2)
+    client.sendall(b"ice")
+    assert _recv_frame(client) == b"Y"
+    assert _recv_frame(client).startswith(b"L")
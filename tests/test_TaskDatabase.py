@@ -0,0 +1,99 @@
+import os
+import random
+import sqlite3
+import sys
+import pytest
+
+# Making the server modules (Server folder) importable
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Server"))
+from TaskDatabase import TaskDatabase, max_task_id
+
+"""
+Property tests of the task id index - after deleting random rows every live task is drawn uniformly and deleted tasks
+are never drawn, from the database and from its snapshots
+"""
+
+draws_per_task = 200
+
+
+def _chi_square_limit(degrees):
+    """
+    Upper limit of the chi square statistic at p = 0.0005 (Wilson-Hilferty approximation), only a broken draw goes
+    over it
+    """
+    z = 3.29
+    return degrees * (1 - 2 / (9 * degrees) + z * (2 / (9 * degrees)) ** 0.5) ** 3
+
+
+def _check_uniform(draw, live_tasks):
+    """
+    Draws many tasks and checks that only live tasks are drawn and that every live task is drawn about equally
+    :param draw: Function drawing a (task id, task) tuple
+    :param live_tasks: Dictionary of task id --> task of the tasks that weren't deleted
+    """
+    counts = dict.fromkeys(live_tasks, 0)
+    for _ in range(draws_per_task * len(live_tasks)):
+        task_id, task = draw()
+        assert task_id in counts, f"Drew deleted task {task_id}"
+        assert task == live_tasks[task_id]
+        counts[task_id] += 1
+    if len(live_tasks) > 1:
+        chi_square = sum((count - draws_per_task) ** 2 / draws_per_task for count in counts.values())
+        assert chi_square < _chi_square_limit(len(live_tasks) - 1)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_draws_stay_uniform_after_random_deletes(tmp_path, seed):
+    rng = random.Random(seed)
+    random.seed(seed)  # The database draws with the random module
+    task_db = TaskDatabase(str(tmp_path / "tasks"))
+    live_tasks = {}  # Task id --> task
+    for number in range(rng.randint(2, 60)):
+        live_tasks[task_db.add_task_point(f"task {number}")] = f"task {number}"
+
+    # Deleting a random part of the rows, leaving at least one
+    for task_id in rng.sample(sorted(live_tasks), rng.randint(0, len(live_tasks) - 1)):
+        task_db.delete_task_point(task_id)
+        del live_tasks[task_id]
+
+    assert sorted(task_db.task_ids["pointTask"]) == sorted(live_tasks)
+    _check_uniform(task_db.task_point, live_tasks)
+    _check_uniform(task_db.snapshot().task_point, live_tasks)
+
+    # A new connection rebuilds the same index from the table
+    reopened = TaskDatabase(str(tmp_path / "tasks"))
+    assert sorted(reopened.task_ids["pointTask"]) == sorted(live_tasks)
+
+
+@pytest.mark.parametrize("from_snapshot", [False, True])
+def test_empty_category_raises(tmp_path, from_snapshot):
+    task_db = TaskDatabase(str(tmp_path / "tasks"))
+    task_db.delete_task_point(task_db.add_task_point("only task"))
+    source = task_db.snapshot() if from_snapshot else task_db
+    with pytest.raises(LookupError):
+        source.task_point()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rows_deleted_by_another_connection_are_never_drawn(tmp_path, seed):
+    rng = random.Random(seed)
+    task_db = TaskDatabase(str(tmp_path / "tasks"))
+    task_ids = [task_db.add_task_point(f"task {number}") for number in range(10)]
+    kept = rng.choice(task_ids)
+
+    other = TaskDatabase(str(tmp_path / "tasks"))  # Like a DatabaseGen run while the server is up
+    for task_id in task_ids:
+        if task_id != kept:
+            other.delete_task_point(task_id)
+
+    assert [task_db.task_point(rng)[0] for _ in range(50)] == [kept] * 50
+    assert task_db.snapshot().task_point(rng)[0] == kept
+    assert list(task_db.task_ids["pointTask"]) == [kept]  # A snapshot forgets every deleted row
+
+
+def test_ids_over_32_bits_are_refused(tmp_path):
+    TaskDatabase(str(tmp_path / "tasks"))  # Creating the tables
+    with sqlite3.connect(str(tmp_path / "tasks.db")) as conn:
+        conn.execute("INSERT INTO pointTask (id, task) VALUES (?, ?)", (max_task_id + 1, "task"))
+    with pytest.raises(AssertionError):
+        TaskDatabase(str(tmp_path / "tasks"))
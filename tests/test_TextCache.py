@@ -0,0 +1,117 @@
+import os
+import sys
+import threading
+import time
+import pytest
+import pygame as pyg
+
+# Making the client modules (game folder) importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from TextCache import TextCache, wrap_text
+
+"""
+Tests of the rendered text cache - it stays under its memory cap by evicting the least recently used surfaces, and
+renders every text once even when several threads ask for it at the same time. Wrapped text fills each line greedily
+"""
+
+
+class CountingFont:
+    """
+    Stands in for a font, renders every character as a 10x10 block and counts how many times it rendered
+    """
+    def __init__(self, delay=0):
+        """
+        :param delay: Seconds each render takes, to let other threads run in the middle of it
+        """
+        self.delay = delay
+        self.renders = 0
+
+    def render(self, text, antialias, color, background=None):
+        self.renders += 1
+        time.sleep(self.delay)
+        return pyg.Surface((10 * len(text), 10), pyg.SRCALPHA)
+
+    def size(self, text):
+        return 10 * len(text), 10
+
+    def get_linesize(self):
+        return 12
+
+
+text_bytes = 10 * 10 * 4  # Pixel memory of a single character rendered by CountingFont
+
+
+@pytest.mark.parametrize("max_texts", [1, 2, 5])
+def test_least_recently_used_texts_are_evicted_at_the_cap(max_texts):
+    font = CountingFont()
+    cache = TextCache(max_bytes=max_texts * text_bytes)
+    texts = [str(number) for number in range(max_texts + 1)]
+    for text in texts[:-1]:
+        cache.render(font, text, True, (0, 0, 0))
+    cache.render(font, texts[0], True, (0, 0, 0))  # The first text becomes the most recently used
+    assert cache.used_bytes == max_texts * text_bytes
+
+    cache.render(font, texts[-1], True, (0, 0, 0))
+    assert cache.used_bytes == max_texts * text_bytes
+    # The least recently used text was evicted, re-rendered when asked for again
+    evicted = texts[1] if max_texts > 1 else texts[0]
+    renders = font.renders
+    cache.render(font, evicted, True, (0, 0, 0))
+    assert font.renders == renders + 1
+
+
+def test_surface_bigger_than_the_cap_is_kept():
+    font = CountingFont()
+    cache = TextCache(max_bytes=text_bytes)
+    surface = cache.render(font, "too long", True, (0, 0, 0))
+    assert cache.render(font, "too long", True, (0, 0, 0)) is surface
+    assert font.renders == 1
+
+
+@pytest.mark.parametrize("threads", [2, 8])
+def test_concurrent_renders_render_once(threads):
+    font = CountingFont(delay=0.05)
+    cache = TextCache()
+    barrier = threading.Barrier(threads)
+    surfaces = []
+
+    def render():
+        barrier.wait()
+        surfaces.append(cache.render(font, "hello", True, (0, 0, 0)))
+
+    workers = [threading.Thread(target=render) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert font.renders == 1
+    assert all(surface is surfaces[0] for surface in surfaces)
+    assert (cache.hits, cache.misses) == (threads - 1, 1)
+
+
+@pytest.mark.parametrize("text, width, lines", [
+    ("", 100, [""]),
+    ("short", 100, ["short"]),
+    ("fits exactly", 120, ["fits exactly"]),
+    ("one too long", 110, ["one too", "long"]),
+    ("a b c d e f", 30, ["a b", "c d", "e f"]),
+    ("  extra   spaces  ", 200, ["extra spaces"]),
+    ("unbreakable words", 50, ["unbreakable", "words"]),
+    ("x unbreakable y", 50, ["x", "unbreakable", "y"]),
+])
+def test_wrap_text(text, width, lines):
+    assert wrap_text(CountingFont(), text, width) == lines
+
+
+@pytest.mark.parametrize("text, width, size", [
+    ("one too long", 110, (70, 24)),
+    ("a b c d e f", 30, (30, 36)),
+    ("short", 100, (50, 12)),
+])
+def test_wrapped_surface_fits_the_lines(text, width, size):
+    font = CountingFont()
+    cache = TextCache()
+    surface = cache.render_wrapped(font, text, True, (0, 0, 0), width)
+    assert surface.get_size() == size
+    assert cache.render_wrapped(font, text, True, (0, 0, 0), width) is surface
+    assert cache.render_wrapped(font, text, True, (0, 0, 0), width + 1) is not surface  # The width is part of the key